@@ -1,15 +1,15 @@
 """Learning MCP V2.0 - FastAPI Job Management Server."""
 
 import asyncio
+import json
 import logging
 import os
-import uuid
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, Query, Body
+from fastapi import FastAPI, HTTPException, Query, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 # Configure logging to show all INFO level messages including AutoGen flow
@@ -21,11 +21,14 @@ logging.basicConfig(
 
 # Reuse existing infrastructure
 from learning_mcp.config import settings, get_profile
-from learning_mcp.embeddings import EmbeddingConfig, Embedder
-from learning_mcp.vdb import VDB
-from learning_mcp.jobs_db import JobsDB, JobStatus, JobPhase
+from learning_mcp.embeddings import EmbeddingConfig, hedge_stats
+from learning_mcp.circuit_breaker import breaker_states
+from learning_mcp.jobs_db import JobStatus, JobsDB
+from learning_mcp.job_store import get_job_store, close_job_stores
+from learning_mcp.job_scheduler import get_scheduler
+from learning_mcp.progress import job_pct
+from learning_mcp.job_events import get_event_bus, coalesce, is_terminal, TERMINAL_STATUSES
 from learning_mcp.document_loaders import (
-    collect_chunks,
     known_document_count,
     estimate_pages_total,
 )
@@ -54,20 +57,8 @@ app.add_middleware(
 app.include_router(search_router, prefix="", tags=["Search"])
 app.include_router(config_router, prefix="", tags=["Config"])
 
-# In-memory task registry (job_id -> asyncio.Task)
-_RUNNING_TASKS: Dict[str, asyncio.Task] = {}
-
-
-def _register_task(job_id: str, task: asyncio.Task) -> None:
-    _RUNNING_TASKS[job_id] = task
-
-
-def _pop_task(job_id: str) -> Optional[asyncio.Task]:
-    return _RUNNING_TASKS.pop(job_id, None)
-
-
-def _list_running_ids() -> List[str]:
-    return [jid for jid, t in _RUNNING_TASKS.items() if not t.done()]
+# SSE keep-alive comment interval (proxies drop idle streams)
+SSE_KEEPALIVE_S = float(os.getenv("JOB_EVENTS_KEEPALIVE_S", "15"))
 
 
 # ---------- Schemas ----------
@@ -75,6 +66,7 @@ def _list_running_ids() -> List[str]:
 class IngestRequest(BaseModel):
     profile: str = Field(..., example="dahua-camera")
     truncate: bool = Field(False, description="Clear collection before ingest")
+    priority: int = Field(0, ge=-100, le=100, description="Higher runs first among queued jobs")
 
 
 class IngestResponse(BaseModel):
@@ -109,109 +101,28 @@ class JobDetail(BaseModel):
     error_msg: Optional[str]
     started_at: Optional[str]
     finished_at: Optional[str]
+    pct: int = 0
+    current_file: Optional[str] = None
+    current_page: Optional[int] = None
+    current_file_pages: Optional[int] = None
+    chunks_total: Optional[int] = None
+    chunks_embedded: Optional[int] = None
+    chunks_per_min: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    phase_durations: Dict[str, float] = Field(default_factory=dict, description="Seconds spent per phase")
+    dead_letters: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Chunks that failed on every embedding backend (not ingested)"
+    )
 
 
-# ---------- Background Worker ----------
-
-async def _worker_run_ingest(job_id: str, prof: dict, truncate: bool):
-    """
-    Background worker that loads, chunks, embeds, and upserts documents.
-    Tracks progress in SQLite jobs_db.
-    """
-    db = JobsDB()
-    profile_name = prof.get("name")
-    
+def _phase_durations(job: dict) -> Dict[str, float]:
+    raw = job.get("phase_durations")
+    if not raw:
+        return {}
     try:
-        # Setup
-        ecfg = EmbeddingConfig.from_profile(prof)
-        vcfg = prof.get("vectordb", {}) or {}
-        cparams = prof.get("chunking", {}) or {}
-        collection = vcfg.get("collection", profile_name)
-        
-        embedder = Embedder(ecfg)
-        vdb = VDB(
-            url=vcfg.get("url"),
-            collection=collection,
-            dim=ecfg.dim,
-            distance=vcfg.get("distance", "cosine")
-        )
-        
-        # Phase: LOAD
-        db.set_phase(job_id, JobPhase.EXTRACT)
-        log.info(f"Job {job_id}: Loading documents for profile '{profile_name}'")
-        
-        # Optionally truncate
-        if truncate:
-            log.info(f"Job {job_id}: Truncating collection '{collection}'")
-            vdb.truncate()
-        else:
-            vdb.ensure_collection()
-        
-        # Load chunks
-        chunks, stats = collect_chunks(
-            prof,
-            chunk_size=cparams.get("size", 1200),
-            chunk_overlap=cparams.get("overlap", 200)
-        )
-        
-        if not chunks:
-            db.finish_job(job_id, status=JobStatus.COMPLETED, error="No chunks loaded")
-            log.warning(f"Job {job_id}: No chunks to ingest")
-            return
-        
-        db.update_progress(job_id, files_done=stats.get("files_done", 0))
-        
-        # Phase: EMBED
-        db.set_phase(job_id, JobPhase.EMBED)
-        log.info(f"Job {job_id}: Embedding {len(chunks)} chunks...")
-        
-        texts = [c["text"] for c in chunks]
-        try:
-            vectors = await embedder.embed(texts)
-        except Exception as e:
-            log.error(f"Job {job_id}: Embedding failed: {e}")
-            db.finish_job(job_id, status=JobStatus.FAILED, error=str(e))
-            return
-        finally:
-            await embedder.close()
-        
-        # Phase: UPSERT
-        db.set_phase(job_id, JobPhase.UPSERT)
-        log.info(f"Job {job_id}: Upserting {len(vectors)} vectors to Qdrant...")
-        
-        ids = []
-        payloads = []
-        for i, (chunk, vec) in enumerate(zip(chunks, vectors)):
-            point_id = str(uuid.uuid5(
-                uuid.NAMESPACE_DNS,
-                f"{chunk['metadata'].get('doc_id')}|{chunk['metadata'].get('doc_path')}|{i}"
-            ))
-            ids.append(point_id)
-            payloads.append({
-                "text": chunk["text"],
-                "doc_id": chunk["metadata"].get("doc_id"),
-                "doc_path": chunk["metadata"].get("doc_path"),
-                "chunk_idx": i,
-                "profile": profile_name,
-                "ingested_at": datetime.utcnow().isoformat()
-            })
-        
-        vdb.upsert(vectors, payloads, ids)
-        db.update_progress(job_id, chunks_done=len(ids))
-        
-        # Complete
-        db.finish_job(job_id, status=JobStatus.COMPLETED)
-        log.info(f"Job {job_id}: Completed successfully ({len(ids)} chunks)")
-        
-    except asyncio.CancelledError:
-        log.warning(f"Job {job_id}: Cancelled by user")
-        db.finish_job(job_id, status=JobStatus.CANCELED, error="Cancelled by user")
-        raise
-    except Exception as e:
-        log.error(f"Job {job_id}: Failed with error: {e}")
-        db.finish_job(job_id, status=JobStatus.FAILED, error=str(e))
-    finally:
-        _pop_task(job_id)
+        return {str(k): float(v) for k, v in json.loads(raw).items()}
+    except (TypeError, ValueError, AttributeError):
+        return {}
 
 
 # ---------- Endpoints ----------
@@ -219,9 +130,10 @@ async def _worker_run_ingest(job_id: str, prof: dict, truncate: bool):
 @app.post("/ingest/jobs", response_model=IngestResponse, tags=["Ingest"])
 async def start_ingest_job(req: IngestRequest = Body(...)):
     """
-    Start a background ingest job for a profile.
+    Enqueue an ingest job for a profile.
     
-    Returns job_id immediately, job runs asynchronously.
+    Returns job_id immediately with status `queued`; the scheduler starts it in an
+    ingest worker when a slot is free and no other job of the profile is running.
     """
     profile_name = req.profile.strip()
     
@@ -244,12 +156,13 @@ async def start_ingest_job(req: IngestRequest = Body(...)):
     vcfg = prof.get("vectordb", {}) or {}
     collection = vcfg.get("collection", profile_name)
     
-    # Cancel any previous jobs for this profile
-    db = JobsDB()
-    canceled_prev = db.cancel_queued_or_running_for_profile(profile_name)
+    # Cancel any previous jobs for this profile (stops its worker if running)
+    db = get_job_store()
+    scheduler = get_scheduler()
+    canceled_prev = await scheduler.cancel_profile(profile_name)
     
     # Create job record
-    job_id = db.start_job(
+    job_id = await db.start_job(
         profile=profile_name,
         provider=(prof.get("embedding") or {}).get("backend", {}).get("primary", "unknown"),
         model_name=ecfg.ollama_model,
@@ -259,66 +172,86 @@ async def start_ingest_job(req: IngestRequest = Body(...)):
         truncate=req.truncate,
         files_total=files_total,
         pages_total=pages_total,
+        priority=req.priority,
     )
+    scheduler.wake()
     
-    # Start background worker
-    task = asyncio.create_task(
-        _worker_run_ingest(job_id, prof, req.truncate),
-        name=f"ingest:{job_id}"
-    )
-    _register_task(job_id, task)
-    
-    log.info(f"Job {job_id}: Enqueued (profile={profile_name}, truncate={req.truncate}, canceled_previous={canceled_prev})")
+    log.info(f"Job {job_id}: Enqueued (profile={profile_name}, truncate={req.truncate}, priority={req.priority}, canceled_previous={canceled_prev})")
     
     return IngestResponse(
         job_id=job_id,
         profile=profile_name,
         status=JobStatus.QUEUED,
-        message=f"Ingest job started for profile '{profile_name}'",
+        message=f"Ingest job queued for profile '{profile_name}'",
         collection=collection,
         canceled_previous=canceled_prev
     )
 
 
+@app.post("/ingest/jobs/{job_id}/resume", response_model=IngestResponse, tags=["Ingest"])
+async def resume_ingest_job(job_id: str):
+    """
+    Requeue a failed or canceled ingest job.
+    
+    The job continues from its checkpoint: files already upserted are not
+    re-extracted and chunks already upserted are not re-embedded. A job that
+    failed before its first checkpoint starts over.
+    """
+    db = get_job_store()
+    job = await db.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] not in (JobStatus.FAILED.value, JobStatus.CANCELED.value):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {job['status']}; only failed or canceled jobs can be resumed",
+        )
+    
+    profile_name = job["profile"]
+    for status in (JobStatus.QUEUED.value, JobStatus.RUNNING.value):
+        active = await db.list_jobs(profile=profile_name, status=status, limit=1)
+        if active:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Profile '{profile_name}' already has a {status} job ({active[0]['job_id']})",
+            )
+    
+    checkpoint = JobsDB.checkpoint_of(job) or {}
+    await db.requeue_job(job_id)
+    get_scheduler().wake()
+    
+    upserted = checkpoint.get("upserted") or 0
+    log.info(f"Job {job_id}: Requeued for resume (profile={profile_name}, upserted={upserted})")
+    
+    return IngestResponse(
+        job_id=job_id,
+        profile=profile_name,
+        status=JobStatus.QUEUED,
+        message=(
+            f"Resuming from chunk {upserted}" if checkpoint
+            else "No checkpoint; the job will start over"
+        ),
+        collection=job.get("collection"),
+    )
+
+
 @app.post("/ingest/cancel_all", tags=["Ingest"])
 async def cancel_all_jobs():
     """
     Cancel all running ingest jobs.
     """
-    db = JobsDB()
-    running = _list_running_ids()
+    scheduler = get_scheduler()
+    running = scheduler.running_ids()
     
     log.warning(f"Cancelling all jobs: {running}")
     
     cancelled_ids = []
-    
-    # Issue cancellations
-    for job_id in running:
-        task = _RUNNING_TASKS.get(job_id)
-        if task and not task.done():
-            task.cancel()
-    
-    # Wait for tasks to handle cancellation
-    await asyncio.sleep(0.1)
-    
-    # Collect results
     for job_id in running:
-        task = _RUNNING_TASKS.get(job_id)
-        if not task:
-            continue
-        
         try:
-            await asyncio.wait_for(task, timeout=1.0)
-        except asyncio.CancelledError:
-            pass
-        except asyncio.TimeoutError:
-            log.warning(f"Job {job_id}: Timeout during cancellation")
+            if await scheduler.cancel(job_id):
+                cancelled_ids.append(job_id)
         except Exception as e:
             log.error(f"Job {job_id}: Error during cancellation: {e}")
-        finally:
-            db.finish_job(job_id, status=JobStatus.CANCELED, error="Cancelled by user")
-            cancelled_ids.append(job_id)
-            _pop_task(job_id)
     
     log.warning(f"Cancelled {len(cancelled_ids)} jobs")
     
@@ -339,8 +272,8 @@ async def list_jobs(
     """
     List recent jobs with optional filters.
     """
-    db = JobsDB()
-    jobs = db.list_jobs(profile=profile, status=status, limit=limit)
+    db = get_job_store()
+    jobs = await db.list_jobs(profile=profile, status=status, limit=limit)
     
     return [
         JobBrief(
@@ -348,9 +281,9 @@ async def list_jobs(
             profile=j["profile"],
             status=j["status"],
             phase=j["phase"],
-            pages_done=j["pages_done"],
-            pages_total=j["pages_total"],
-            pct=j["pct"]
+            pages_done=j["pages_done"] or 0,
+            pages_total=j["pages_total"] or 0,
+            pct=job_pct(j)
         )
         for j in jobs
     ]
@@ -361,12 +294,72 @@ async def get_job_detail(job_id: str):
     """
     Get detailed status for a specific job.
     """
-    db = JobsDB()
-    job = db.get_job(job_id)
+    db = get_job_store()
+    job = await db.get_job(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
+    return _job_detail(job)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a job's progress.
+
+    Sends one `snapshot` event (JobDetail from the DB) on connect, then
+    `phase`, `progress` and `status` events pushed by the ingest worker.
+    The stream ends after a terminal status (completed/failed/canceled).
+    """
+    bus = get_event_bus()
+    # Subscribe before reading the snapshot so nothing published in between is lost
+    queue = bus.subscribe(job_id)
+    try:
+        job = await get_job_store().get_job(job_id)
+    except Exception:
+        bus.unsubscribe(job_id, queue)
+        raise
+    if not job:
+        bus.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def _events():
+        try:
+            yield _sse("snapshot", _job_detail(job).model_dump())
+            if job.get("status") in TERMINAL_STATUSES:
+                return
+            while True:
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                # Drain whatever else is queued and merge progress ticks (latest wins)
+                burst = [first]
+                while not queue.empty():
+                    burst.append(queue.get_nowait())
+                for evt in coalesce(burst):
+                    yield _sse(evt["event"], {"job_id": job_id, **evt["data"]})
+                    if is_terminal(evt):
+                        return
+        finally:
+            bus.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _job_detail(job: dict) -> JobDetail:
     return JobDetail(
         job_id=job["job_id"],
         profile=job["profile"],
@@ -379,20 +372,50 @@ async def get_job_detail(job_id: str):
         chunks_done=job.get("chunks_done", 0),
         error_msg=job.get("error"),
         started_at=job.get("created_at"),
-        finished_at=job.get("updated_at")
+        finished_at=job.get("updated_at"),
+        pct=job_pct(job),
+        current_file=job.get("current_file"),
+        current_page=job.get("current_page"),
+        current_file_pages=job.get("current_file_pages"),
+        chunks_total=job.get("chunks_total"),
+        chunks_embedded=job.get("chunks_embedded"),
+        chunks_per_min=job.get("chunks_per_min"),
+        eta_seconds=job.get("eta_seconds"),
+        phase_durations=_phase_durations(job),
+        dead_letters=JobsDB.dead_letters_of(job),
     )
 
 
+@app.on_event("startup")
+async def _start_scheduler():
+    """Pick up queued jobs (including ones queued before a restart)."""
+    await get_scheduler().start()
+
+
+@app.on_event("shutdown")
+async def _flush_job_store():
+    """Stop ingest workers, then persist any coalesced progress before exit."""
+    await get_scheduler().stop()
+    await close_job_stores()
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
     Health check endpoint.
     """
+    scheduler = get_scheduler()
+    counts = await get_job_store().count_by_status()
     return {
         "status": "ok",
         "service": "job-server",
         "version": "2.0.0",
-        "running_jobs": len(_list_running_ids())
+        "running_jobs": len(scheduler.running_ids()),
+        "queued_jobs": counts.get(JobStatus.QUEUED.value, 0),
+        "ingest_workers": scheduler.max_workers,
+        "ingest_worker_mode": scheduler.mode,
+        "embedding_backends": breaker_states(),
+        "embedding_hedges": hedge_stats(),
     }
 
 
@@ -1,14 +1,28 @@
 # /src/learning_mcp/autogen_agent.py
 """
-AutoGen planner (with critic) that pulls per-profile hints from learning.yaml
-via /config/profile/{name}, builds templated system messages, and iterates
-search → plan → critique up to MAX_LOOPS (default 3).
+AutoGen planner (with critic) that pulls per-profile hints from learning.yaml,
+builds templated system messages, and iterates search → plan → critique up to
+MAX_LOOPS (default 3).
 
 Key features:
 - YAML-driven, but with a stable base template in code (templated system messages).
 - Planner & Critic are separate AssistantAgent instances (same client).
 - Two-pass JSON validation (generate → repair).
 - Enriched outputs (confidence, evidence_used, missing_info, recommended_queries, etc.).
+- Each loop's queries (the user query, then the critic's next_search) are searched
+  together (retriever.search_many) under AUTOGEN_SEARCH_BUDGET_S; evidence is
+  deduplicated by chunk across queries and loops, keeping the best score.
+- Rule-based fast path (rule_planner): before any LLM call, the top hits for the
+  goal plus the profile's templates/endpoint_examples are tried; a plan that
+  passes the same acceptance rules is returned directly (AUTOGEN_FAST_PATH=0 to
+  disable). Works without autogen installed.
+- Accepted plans (fast-path ones too) are cached (learning_mcp.plan_cache) by
+  normalized goal, profile, hints version and collection generation; a repeated
+  goal returns the cached plan without any LLM call or search until the profile
+  is re-ingested or its hints change.
+- Hints and evidence come from a retriever (learning_mcp.retrieval): in-process by
+  default (shared embedder/VDB, cached config); HTTP to API_AGENT_BASE_URL
+  (/config/profile, /search/api_context) when API_AGENT_RETRIEVER=http.
 
 ENV:
   USE_AUTOGEN=1
@@ -16,13 +30,18 @@ ENV:
   AUTOGEN_MODEL=@cf/meta/llama-3.1-8b-instruct
   OPENAI_API_KEY=...
   OPENAI_BASE_URL=...
-  API_AGENT_BASE_URL=http://localhost:8013
+  API_AGENT_RETRIEVER=local           # local | http
+  API_AGENT_BASE_URL=http://localhost:8013   # used when API_AGENT_RETRIEVER=http
   API_AGENT_SEARCH_TIMEOUT=90          # total client timeout (seconds)
+  AUTOGEN_SEARCH_BUDGET_S=15           # per-loop budget for the loop's concurrent searches
   AUTOGEN_MAX_LOOPS=3
+  AUTOGEN_FAST_PATH=1                  # rule-based plan before the LLM loop
+  PLAN_CACHE=1                         # see learning_mcp.plan_cache (PLAN_CACHE_PATH)
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
 import re
 import json
@@ -32,6 +51,10 @@ from typing import Any, Dict, Optional, Tuple, List
 
 import httpx
 
+from learning_mcp.agents.rule_planner import plan_kind, rule_plan
+from learning_mcp.plan_cache import PlanCache, get_plan_cache, hints_version
+from learning_mcp.retrieval import HttpRetriever, LocalRetriever, merge_hits, ranked
+
 log = logging.getLogger("autogen_agent")
 log.setLevel(logging.INFO)
 
@@ -62,6 +85,7 @@ except Exception as e:
     ModelInfo = None
 
 BASE_URL = os.getenv("API_AGENT_BASE_URL", "http://localhost:8014").rstrip("/")
+RETRIEVER = os.getenv("API_AGENT_RETRIEVER", "local").strip().lower()
 BACKEND = os.getenv("AUTOGEN_BACKEND", "cloudflare")
 MODEL = os.getenv("AUTOGEN_MODEL", "@cf/meta/llama-3.1-8b-instruct")
 OPENAI_KEY = os.getenv("OPENAI_API_KEY")
@@ -72,6 +96,8 @@ CF_GATEWAY_TOKEN = os.getenv("CF_GATEWAY_TOKEN")
 
 MAX_LOOPS = int(os.getenv("AUTOGEN_MAX_LOOPS", "3"))
 SEARCH_TIMEOUT_S = float(os.getenv("API_AGENT_SEARCH_TIMEOUT", "90"))
+SEARCH_BUDGET_S = float(os.getenv("AUTOGEN_SEARCH_BUDGET_S", "15"))
+FAST_PATH = os.getenv("AUTOGEN_FAST_PATH", "1") not in ("0", "false", "False")
 
 _CODEFENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
 
@@ -147,19 +173,20 @@ def _fmt_params(d: dict) -> str:
 # -----------------------
 # Config / Hints loader
 # -----------------------
-async def _load_profile_hints(profile_name: str) -> dict:
+def _make_retriever():
+    """In-process retriever unless API_AGENT_RETRIEVER=http (planner away from the index)."""
+    if RETRIEVER == "http":
+        return HttpRetriever(BASE_URL, timeout_s=SEARCH_TIMEOUT_S)
+    return LocalRetriever()
+
+
+async def _load_profile_hints(profile_name: str, retriever) -> dict:
     """
-    Fetch autogen_hints for a profile via /config/profile/{name}.
+    Fetch autogen_hints for a profile through the retriever.
     Returns {} on error/missing.
     """
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            r = await client.get(f"{BASE_URL}/config/profile/{profile_name}")
-            r.raise_for_status()
-            data = r.json() or {}
-            prof = data.get("profile") or {}
-            hints = prof.get("autogen_hints") or {}
-            return hints
+        return await retriever.hints(profile_name)
     except Exception as e:
         log.warning("autogen.hints.load.failed profile=%s err=%s", profile_name, e)
         return {}
@@ -222,23 +249,22 @@ def _build_system_messages_from_hints(hints: dict) -> tuple[str, str]:
 # -----------------------
 # Evidence retrieval
 # -----------------------
-async def _search_once(q: str, profile: str, top_k: int = 8) -> List[dict]:
-    payload = {"q": q, "profile": profile, "top_k": top_k, "read_only": True}
-    timeout = httpx.Timeout(SEARCH_TIMEOUT_S)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        r = await client.post(f"{BASE_URL}/search/api_context", json=payload)
-        r.raise_for_status()
-        data = r.json()
-    return data.get("results") or []
+async def _search_once(q: str, profile: str, retriever, top_k: int = 8) -> List[dict]:
+    return await retriever.search(q, profile, top_k=top_k)
 
 
-async def _fetch_evidence(q: str, profile: str | None) -> Tuple[list[dict], Optional[str]]:
+async def _search_many(queries: List[str], profile: str, retriever, top_k: int = 8) -> List[List[dict]]:
+    """All of a loop's queries at once, bounded by SEARCH_BUDGET_S."""
+    return await retriever.search_many(queries, profile, top_k=top_k, timeout_s=SEARCH_BUDGET_S)
+
+
+async def _fetch_evidence(q: str, profile: str | None, retriever) -> Tuple[list[dict], Optional[str]]:
     """
     Get evidence and return a small preview (top-3 with useful fields)
     for the planner prompt.
     """
     try:
-        hits = await _search_once(q, profile or "default")
+        hits = await _search_once(q, profile or "default", retriever)
         preview = []
         for h in hits[:3]:
             hints = h.get("hints") or {}
@@ -316,26 +342,27 @@ def _make_client() -> Tuple[Optional[OpenAIChatCompletionClient], Optional[str]]
         return None, f"Client init failed: {e}"
 
 
-def _valid_endpoint(endpoint: str, allow_pattern: str, forbid_patterns: List[str]) -> bool:
-    try:
-        if allow_pattern and not re.search(allow_pattern, endpoint or ""):
-            return False
-        for fp in forbid_patterns or []:
-            if re.search(fp, endpoint or ""):
-                return False
-        return True
-    except Exception:
-        return False
-
-
 # -----------------------
 # Main entry
 # -----------------------
-async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str, Any]:
+async def plan_with_autogen(query: str, profile: str | None = None, retriever=None) -> Dict[str, Any]:
     """
     Generate an API call plan using a planner+critic loop with YAML-driven
     system messages. Returns enriched payload on success or needs_input on failure.
+
+    retriever: LocalRetriever/HttpRetriever for hints and evidence; default per
+    API_AGENT_RETRIEVER (closed on return when created here).
     """
+    own = retriever is None
+    retriever = retriever or _make_retriever()
+    try:
+        return await _plan(query, profile, retriever)
+    finally:
+        if own:
+            await retriever.close()
+
+
+async def _plan(query: str, profile: str | None, retriever) -> Dict[str, Any]:
     # Always log flow start (both minimal and full)
     log.info("=" * 80)
     log.info("🚀 AUTOGEN: %s [%s]", query, profile or "default")
@@ -343,16 +370,43 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
         log.info("  Backend: %s | Model: %s | Gateway: %s", BACKEND, MODEL, USE_AI_GATEWAY)
     log.info("=" * 80)
 
+    # Load profile hints (safe if empty)
+    hints = await _load_profile_hints(profile or "default", retriever)
+
+    # Plan cache: an accepted plan for this goal on the current collection
+    cache = _open_cache()
+    cache_key = (query, profile or "default", hints_version(hints), await _generation(profile or "default", retriever, cache))
+    if cache is not None:
+        try:
+            cached = await asyncio.to_thread(cache.get, *cache_key)
+            report = await asyncio.to_thread(_cache_report, cache, cache_key[1], cached is not None)
+        except Exception as e:
+            log.warning("  ⚠️  Plan cache lookup failed: %s", e)
+            cached = None
+        if cached is not None:
+            log.info("⚡ PLAN CACHE HIT: %s %s", (cached.get("plan") or {}).get("method"), (cached.get("plan") or {}).get("endpoint"))
+            log.info("=" * 80)
+            return {**cached, "cache": report}
+
+    # Rule-based fast path: routine lookups/toggles need no LLM
+    prefetched: Optional[List[List[dict]]] = None
+    if FAST_PATH:
+        try:
+            prefetched = await _search_many([query], profile or "default", retriever)
+        except Exception as e:
+            log.warning("  ❌ Search error: %s", e)
+        fast = rule_plan(query, hints, prefetched[0]) if prefetched else None
+        if fast is not None:
+            log.info("⚡ FAST PATH: %s %s %s", fast["plan"]["method"], fast["plan"]["endpoint"], _fmt_params(fast["plan"]["params"]))
+            log.info("=" * 80)
+            # stored too (0 LLM calls saved), so the lookup above counts a hit next time
+            return await _remember(cache, cache_key, fast, 0)
+
     if AssistantAgent is None or OpenAIChatCompletionClient is None:
         return {"status": "needs_input", "reason": "AutoGen not installed"}
 
-    # Load profile hints (safe if empty)
-    hints = await _load_profile_hints(profile or "default")
     planner_msg, critic_msg = _build_system_messages_from_hints(hints)
 
-    allow_pattern = (hints.get("endpoint") or {}).get("allow_pattern", "")
-    forbid_patterns = (hints.get("endpoint") or {}).get("forbid_patterns") or []
-    read_template = (hints.get("templates") or {}).get("read") or {}
     write_template = (hints.get("templates") or {}).get("write") or {}
     write_req_example = bool(write_template.get("require_example_in_evidence"))
 
@@ -377,6 +431,7 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
 
     # Loop state
     trace: List[dict] = []
+    evidence: Dict[str, dict] = {}  # chunk key -> best hit, across queries and loops
     all_hits: List[dict] = []
     queries: List[str] = [query]
 
@@ -393,26 +448,30 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
 
         # 1) Search (merge new hits)
         log.info("🔍 SEARCH: Retrieving relevant documents...")
-        new_hits_all: List[dict] = []
-        for qtext in queries:
-            try:
-                hits = await _search_once(qtext, profile or "default")
-                new_hits_all.extend(hits)
-                log.info("  ✅ Found %d chunks for query: '%s'", len(hits), qtext[:60])
-            except Exception as e:
-                log.warning("  ❌ Search error: %s", e)
+        queries = list(dict.fromkeys(q for q in queries if q)) or [query]
+        try:
+            if prefetched is not None and queries == [query]:
+                per_query = prefetched  # the fast path already searched the goal
+            else:
+                per_query = await _search_many(queries, profile or "default", retriever)
+            prefetched = None
+        except Exception as e:
+            log.warning("  ❌ Search error: %s", e)
+            per_query = [[] for _ in queries]
+        for qtext, hits in zip(queries, per_query):
+            log.info("  ✅ Found %d chunks for query: '%s'", len(hits), qtext[:60])
+        new_hits = ranked(merge_hits(None, *per_query))
 
         # If we found nothing new, keep working with what we have
-        if not new_hits_all and not all_hits:
+        if not new_hits and not evidence:
             return {"status": "needs_input", "reason": "Retriever returned no evidence."}
 
-        if new_hits_all:
-            all_hits.extend(new_hits_all)
-            # Removed duplicate log - already logged with emoji above
+        merge_hits(evidence, new_hits)
+        all_hits = ranked(evidence)
 
         # Top-3 preview for the planner
         preview = []
-        for h in (new_hits_all or all_hits)[:3]:
+        for h in (new_hits or all_hits)[:3]:
             hints_h = h.get("hints") or {}
             preview.append(
                 {
@@ -560,16 +619,10 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
         missing = cobj.get("missing") or []
         next_search = cobj.get("next_search") or []
         
-        endpoint_ok = _valid_endpoint(candidate_plan.get("endpoint", ""), allow_pattern, forbid_patterns)
-        method = (candidate_plan.get("method") or "").upper()
-        params = candidate_plan.get("params") or {}
-
-        is_read = params.get("action") == (read_template.get("params") or {}).get("action")
-        has_feature = "name" in params or "<Feature>" in json.dumps(read_template.get("params") or {})
-        is_write = params.get("action") == (write_template.get("params") or {}).get("action")
+        kind = plan_kind(candidate_plan, hints)
 
         # Accept READ when endpoint matches pattern, action=getConfig, and has a 'name' feature
-        if endpoint_ok and is_read and has_feature:
+        if kind == "read":
             log.info("✅ ACCEPTED: Read operation (endpoint matches, has feature)")
             session_time = time.time() - session_start
             log.info("")
@@ -581,10 +634,11 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
             log.info("   Status: ✅ ACCEPTED (READ)")
             log.info("   Execution time: %.2fs", session_time)
             log.info("━" * 80)
-            return _final_ok(candidate_plan, confidence, all_hits, missing, next_search, trace)
+            result = _final_ok(candidate_plan, confidence, all_hits, missing, next_search, trace)
+            return await _remember(cache, cache_key, result, total_llm_calls)
 
         # Accept WRITE only if endpoint OK AND critic didn't flag missing example (when required)
-        if endpoint_ok and is_write:
+        if kind == "write":
             if not write_req_example or ("example" not in " ".join(missing).lower()):
                 log.info("✅ ACCEPTED: Write operation (endpoint matches, sufficient evidence)")
                 session_time = time.time() - session_start
@@ -597,7 +651,8 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
                 log.info("   Status: ✅ ACCEPTED (WRITE)")
                 log.info("   Execution time: %.2fs", session_time)
                 log.info("━" * 80)
-                return _final_ok(candidate_plan, confidence, all_hits, missing, next_search, trace)
+                result = _final_ok(candidate_plan, confidence, all_hits, missing, next_search, trace)
+                return await _remember(cache, cache_key, result, total_llm_calls)
 
         # Not accepted → iterate or stop
         if loop_idx >= MAX_LOOPS:
@@ -632,6 +687,47 @@ async def plan_with_autogen(query: str, profile: str | None = None) -> Dict[str,
     return _final_needs_input(all_hits, trace, ["plan not accepted"], reason="Loop budget exhausted")
 
 
+# -----------------------
+# Plan cache
+# -----------------------
+def _open_cache() -> Optional[PlanCache]:
+    try:
+        return get_plan_cache()
+    except Exception as e:
+        log.warning("  ⚠️  Plan cache unavailable: %s", e)
+        return None
+
+
+async def _generation(profile: str, retriever, cache: Optional[PlanCache]) -> Optional[str]:
+    """Collection generation for the cache key; None (bypass the cache) if unknown."""
+    if cache is None:
+        return None
+    try:
+        return await retriever.generation(profile)
+    except Exception as e:
+        log.warning("  ⚠️  Plan cache bypassed (generation unavailable: %s)", e)
+        return None
+
+
+def _cache_report(cache: PlanCache, profile: str, hit: bool) -> dict:
+    stats = cache.stats(profile)
+    log.info(
+        "  🗄️  Plan cache %s | hit rate %.0f%% (%d/%d) | LLM calls saved: %d",
+        "hit" if hit else "miss", stats["hit_rate"] * 100, stats["hits"], stats["lookups"], stats["saved_llm_calls"],
+    )
+    return {"hit": hit, "hit_rate": stats["hit_rate"], "saved_llm_calls": stats["saved_llm_calls"]}
+
+
+async def _remember(cache: Optional[PlanCache], cache_key: tuple, result: dict, llm_calls: int) -> dict:
+    """Store an accepted result (best effort) and return it."""
+    if cache is not None:
+        try:
+            await asyncio.to_thread(cache.put, *cache_key, result, llm_calls)
+        except Exception as e:
+            log.warning("  ⚠️  Plan cache store failed: %s", e)
+    return result
+
+
 # -----------------------
 # Finalizers
 # -----------------------
@@ -0,0 +1,200 @@
+# src/learning_mcp/agents/rule_planner.py
+"""
+Deterministic API planning from profile hints + api_context evidence (no LLM).
+
+Purpose:
+- Most plan_api_call goals are routine lookups ("get audio encode config") or
+  toggles ("enable audio") whose answer is spelled out by the profile's
+  autogen_hints (endpoint allow_pattern, read/write templates,
+  endpoint_examples) and the top search hits. rule_plan() builds that plan
+  directly; the planner/critic LLM loop only sees the ambiguous cases.
+- Steps:
+    intent    : write if the goal toggles/sets something, else read
+    endpoint  : paths in the evidence (snippets, url_candidates) or the hints'
+                endpoint_examples that pass valid_endpoint()
+    params    : read  -> template params with the feature `name` from the
+                         evidence (name=Feature) or endpoint_examples
+                write -> template action + one Param=Value; the Param must
+                         appear in the evidence when the write template has
+                         require_example_in_evidence, and the value comes
+                         from the goal (enable/disable, "to <value>")
+    candidate : names are scored by the goal words they contain (CamelCase and
+                dotted names are split); only a unique best with at least one
+                match is used. A name taken from endpoint_examples alone must
+                cover every goal word or appear in the evidence text
+    accept    : the same rules as the LLM loop (plan_kind)
+- Anything not covered (no templates, ties, no value for a write, ...) returns
+  None and planning falls through to the LLM.
+
+Usage (autogen_planner):
+    result = rule_plan(goal, hints, hits)    # hits: /search/api_context results
+    if result: return result                 # {"status": "ok", "plan": ..., "confidence": ...}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+_PATH = re.compile(r"(?:https?://[^/\s]+)?(/[A-Za-z0-9_\-.~/]+)")
+_QUERY = re.compile(r"(?:https?://[^/\s]+)?(/[A-Za-z0-9_\-.~/]+)\?([^\s\"'<>]+)")
+_PAIR = re.compile(r"([A-Za-z][\w.\[\]]*)=([^\s&\"'<>,;)]+)")
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_SET_TO = re.compile(r"\bto\s+[\"']?([\w.\-]+)[\"']?\s*$", re.IGNORECASE)
+
+_TRUE_VERBS = {"enable", "activate", "start", "unmute"}
+_FALSE_VERBS = {"disable", "deactivate", "stop", "mute"}
+_WRITE_VERBS = _TRUE_VERBS | _FALSE_VERBS | {"set", "change", "configure", "update", "turn", "switch"}
+_STOP = {
+    "a", "an", "the", "on", "off", "of", "for", "to", "in", "at", "my", "me", "is", "what", "how",
+    "get", "show", "read", "current", "check", "list", "please", "config", "configuration",
+    "settings", "setting", "value", "camera", "device", "api",
+} | _WRITE_VERBS
+
+
+def valid_endpoint(endpoint: str, allow_pattern: str, forbid_patterns: List[str]) -> bool:
+    try:
+        if allow_pattern and not re.search(allow_pattern, endpoint or ""):
+            return False
+        for fp in forbid_patterns or []:
+            if re.search(fp, endpoint or ""):
+                return False
+        return True
+    except Exception:
+        return False
+
+
+def plan_kind(plan: Dict[str, Any], hints: Dict[str, Any]) -> Optional[str]:
+    """
+    Acceptance rules shared with the LLM loop: "read" when the endpoint passes
+    and params carry the read template's action plus a feature, "write" when the
+    endpoint passes and params carry the write template's action, else None.
+    """
+    endpoint = hints.get("endpoint") or {}
+    if not valid_endpoint(plan.get("endpoint", ""), endpoint.get("allow_pattern", ""), endpoint.get("forbid_patterns") or []):
+        return None
+    templates = hints.get("templates") or {}
+    read_params = (templates.get("read") or {}).get("params") or {}
+    write_params = (templates.get("write") or {}).get("params") or {}
+    params = plan.get("params") or {}
+    if params.get("action") == read_params.get("action") and ("name" in params or "<Feature>" in json.dumps(read_params)):
+        return "read"
+    if params.get("action") == write_params.get("action"):
+        return "write"
+    return None
+
+
+def _name_tokens(name: str) -> Set[str]:
+    return {t.lower() for part in re.split(r"[.\[\]_\d]+", name) for t in _CAMEL.findall(part)}
+
+
+def _goal_tokens(goal: str) -> Set[str]:
+    return {t for t in _WORD.findall(goal.lower()) if t not in _STOP}
+
+
+def _best(candidates: Iterable[str], goal: str) -> Tuple[Optional[str], int]:
+    """
+    (candidate sharing the most goal words, words shared). The candidate is None
+    when nothing matches (0) or the best is tied (ambiguous).
+    """
+    words = _goal_tokens(goal)
+    scored = sorted(((len(_name_tokens(c) & words), c) for c in set(candidates)), reverse=True)
+    if not scored or scored[0][0] == 0:
+        return None, 0
+    if len(scored) > 1 and scored[1][0] == scored[0][0]:
+        return None, scored[0][0]
+    return scored[0][1], scored[0][0]
+
+
+def _is_write(goal: str) -> bool:
+    return bool(set(_WORD.findall(goal.lower())) & _WRITE_VERBS)
+
+
+def _write_value(goal: str) -> Optional[str]:
+    m = _SET_TO.search(goal.strip())
+    if m:
+        return m.group(1)
+    words = set(_WORD.findall(goal.lower()))
+    if words & _TRUE_VERBS or ("turn" in words and "on" in words):
+        return "true"
+    if words & _FALSE_VERBS or ("turn" in words and "off" in words):
+        return "false"
+    return None
+
+
+def _examples(texts: Iterable[str]) -> List[Tuple[str, Dict[str, str]]]:
+    """(path, {key: value}) for every path?query in the texts."""
+    out = []
+    for text in texts:
+        for m in _QUERY.finditer(text or ""):
+            out.append((m.group(1), dict(_PAIR.findall(m.group(2)))))
+    return out
+
+
+def rule_plan(goal: str, hints: Dict[str, Any], hits: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A confident plan for `goal` without any LLM call, or None to fall through."""
+    templates = hints.get("templates") or {}
+    endpoint_hints = hints.get("endpoint") or {}
+    allow, forbid = endpoint_hints.get("allow_pattern", ""), endpoint_hints.get("forbid_patterns") or []
+    if not templates or not allow:
+        return None
+
+    snippets = [h.get("snippet") or "" for h in hits]
+    evidence = _examples(snippets)
+    curated = _examples(hints.get("endpoint_examples") or [])
+
+    # endpoint: evidence first, then the hints' examples
+    paths = [m.group(1).rstrip(".") for s in snippets for m in _PATH.finditer(s)]
+    paths += [u for h in hits for u in ((h.get("hints") or {}).get("url_candidates") or [])]
+    paths += [p for p, _ in curated]
+    endpoint = next((p for p in paths if valid_endpoint(p, allow, forbid)), None)
+    if endpoint is None:
+        return None
+
+    write = _is_write(goal)
+    template = templates.get("write" if write else "read") or {}
+    t_params = template.get("params") or {}
+    action = t_params.get("action")
+    if not action:
+        return None
+
+    if write:
+        value = _write_value(goal)
+        seen = [k for _, q in evidence if q.get("action") == action for k in q if k != "action"]
+        if not template.get("require_example_in_evidence"):
+            seen += [k for _, q in curated if q.get("action") == action for k in q if k != "action"]
+        param, _ = _best(seen, goal)
+        if value is None or param is None:
+            return None
+        if "enable" in _name_tokens(param) and value not in ("true", "false"):
+            return None  # "set audio to 5" is not a toggle
+        params = {"action": action, param: value}
+        from_evidence = True
+    else:
+        names = [q["name"] for _, q in evidence if q.get("action") == action and q.get("name")]
+        names += [n for h in hits for n in [((h.get("hints") or {}).get("query_candidates") or {}).get("name")] if n]
+        feature, matched = _best(names, goal)
+        from_evidence = feature is not None
+        if matched == 0:  # evidence names nothing relevant (not merely ambiguous): try the hints' examples
+            feature, _ = _best([q["name"] for _, q in curated if q.get("action") == action and q.get("name")], goal)
+            # one shared word ("audio" in "show audio input volume") is a guess, not a plan
+            if feature is not None and not (
+                _goal_tokens(goal) <= _name_tokens(feature) or any(feature in s for s in snippets)
+            ):
+                return None
+        if feature is None:
+            return None
+        params = {k: v for k, v in t_params.items() if not str(v).startswith("<")}
+        params["name"] = feature
+
+    plan = {"endpoint": endpoint, "method": (template.get("method") or "GET").upper(), "params": params, "body": None}
+    if plan_kind(plan, hints) != ("write" if write else "read"):
+        return None
+    return {
+        "status": "ok",
+        "plan": plan,
+        "confidence": 0.9 if from_evidence else 0.75,
+        "notes": "rule-based plan from profile templates and evidence (no LLM)",
+    }
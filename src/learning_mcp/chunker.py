@@ -1,9 +1,36 @@
 # /src/learning_mcp/chunker.py
 """
-Token-based chunker with overlap (word-splitting).
-Purpose: Split long text into overlapping word chunks for embedding.
+Chunking engine shared by all loaders (PDF, JSON, JSONL).
 
-User question: "How do I chunk extracted PDF text with overlap?"
+Purpose:
+- One single-pass splitter that returns chunks with character offsets into the
+  source text (TextChunk(text, start, end)), so callers get accurate char_start /
+  char_end and overlap never re-slices or re-joins strings.
+- Size and overlap in one of three units:
+    chars  : characters (default; matches the historical `chunking.size`)
+    tokens : tokenizer tokens (tiktoken, `cl100k_base` by default) so chunks fill
+             the embedding model's context instead of being cut by EMBED_MAX_CHARS
+    words  : whitespace-separated words
+- Two break policies:
+    sentence : end chunks after . ! ? when that keeps them at least half full,
+               else at a word boundary, else a hard cut (prose)
+    lines    : end chunks at a line break, else a word boundary (code, tables)
+- Overlap restarts the next chunk `overlap` units before the previous end,
+  snapped forward to a word start.
+
+If the tiktoken encoding cannot be loaded (e.g. offline, no cached BPE file),
+tokens are approximated by words and punctuation marks (logged once).
+
+Usage:
+    from learning_mcp.chunker import split_text
+    for c in split_text(text, 480, 64, unit="tokens"):
+        c.text, c.start, c.end
+
+Profile:
+    chunking: { size: 1200, overlap: 200 }              # characters
+    chunking: { max_tokens: 480, overlap: 64 }          # tokens (overlap in tokens too)
+    chunking: { size: 200, overlap: 20, unit: words }
+    CHUNK_TOKEN_ENCODING=cl100k_base                    # env: tiktoken encoding for tokens
 
 Example (PowerShell):
   docker compose exec api python /app/src/tools/run_snippet.py `
@@ -12,25 +39,208 @@ Example (PowerShell):
     --kwargs '{"text":"one two three four five six seven eight nine ten", "size":4, "overlap":1}'
 """
 
-from typing import List
+from __future__ import annotations
+
+import logging
+import os
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+log = logging.getLogger("learning_mcp.chunker")
+
+UNITS = ("chars", "tokens", "words")
+DEFAULT_ENCODING = os.getenv("CHUNK_TOKEN_ENCODING", "cl100k_base")
+
+_SENTENCE_END = re.compile(r"[.!?]\s+")
+_WORD = re.compile(r"\S+")
+_SPACE = re.compile(r"\s+")
+_NEWLINE = re.compile(r"\n")
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class TextChunk(NamedTuple):
+    text: str
+    start: int  # char offset of text[0] in the source
+    end: int    # char offset just past the chunk
+
+
+# ---------- units ----------
+
+@lru_cache(maxsize=8)
+def _encoding(name: str):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        log.warning(f"tiktoken encoding '{name}' unavailable ({e}); approximating tokens by words/punctuation")
+        return None
+
+
+def _token_starts(text: str, encoding: str) -> List[int]:
+    enc = _encoding(encoding)
+    if enc is None:
+        return [m.start() for m in _APPROX_TOKEN.finditer(text)]
+    _, offsets = enc.decode_with_offsets(enc.encode(text, disallowed_special=()))
+    # tokens inside one multi-byte char share its offset; keep the list non-decreasing for bisect
+    starts: List[int] = []
+    for off in offsets:
+        starts.append(max(off, starts[-1]) if starts else off)
+    return starts
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """Token count of `text` (approximate when the encoding cannot be loaded)."""
+    enc = _encoding(encoding)
+    if enc is None:
+        return len(_APPROX_TOKEN.findall(text))
+    return len(enc.encode(text, disallowed_special=()))
+
+
+class _Units:
+    """Maps between unit positions and char offsets (identity for chars)."""
+
+    def __init__(self, text: str, unit: str, encoding: str):
+        self.n = len(text)
+        if unit == "chars":
+            self.starts: Optional[List[int]] = None
+        elif unit == "words":
+            self.starts = [m.start() for m in _WORD.finditer(text)]
+        elif unit == "tokens":
+            self.starts = _token_starts(text, encoding)
+        else:
+            raise ValueError(f"unknown chunk unit {unit!r} (expected one of {', '.join(UNITS)})")
+
+    def pos(self, char: int) -> int:
+        """Units that start before `char`."""
+        return char if self.starts is None else bisect_left(self.starts, char)
+
+    def char(self, pos: int) -> int:
+        """Char offset where unit `pos` starts (text length past the end)."""
+        if self.starts is None:
+            return min(pos, self.n)
+        return self.starts[pos] if pos < len(self.starts) else self.n
+
+
+# ---------- splitting ----------
+
+def _last_at_most(offsets: Sequence[int], lo: int, hi: int) -> Optional[int]:
+    """Largest offset in (lo, hi], or None."""
+    i = bisect_right(offsets, hi) - 1
+    return offsets[i] if i >= 0 and offsets[i] > lo else None
+
+
+def _word_break(text: str, lo: int, hi: int) -> Optional[int]:
+    """Offset just after the last whitespace in text[lo:hi], or None."""
+    i = max(text.rfind(" ", lo, hi), text.rfind("\n", lo, hi), text.rfind("\t", lo, hi))
+    return i + 1 if i >= lo and i + 1 > lo else None
+
+
+def _trimmed(text: str, start: int, end: int) -> Optional[TextChunk]:
+    seg = text[start:end]
+    left = len(seg) - len(seg.lstrip())
+    body = seg.strip()
+    if not body:
+        return None
+    return TextChunk(body, start + left, start + left + len(body))
+
+
+def split_text(
+    text: str,
+    size: int,
+    overlap: int = 0,
+    *,
+    unit: str = "chars",
+    breaks: str = "sentence",
+    encoding: str = DEFAULT_ENCODING,
+) -> List[TextChunk]:
+    """
+    Split `text` into chunks of at most `size` units overlapping by `overlap` units.
+
+    One left-to-right pass: sentence/line break offsets are found once, each chunk
+    end is a bisect into them, and chunks are returned as stripped slices with
+    their offsets. size <= 0 returns the whole (stripped) text as one chunk.
+    """
+    if not text or not text.strip():
+        return []
+    if size <= 0 or (len(text) <= size and unit != "tokens"):
+        # whole text fits (a word or char count never exceeds the length): no scan needed
+        one = _trimmed(text, 0, len(text))
+        return [one] if one else []
+    overlap = max(0, min(overlap, size - 1))
+
+    units = _Units(text, unit, encoding)
+    if breaks == "sentence":
+        preferred = [m.end() for m in _SENTENCE_END.finditer(text)]
+    elif breaks == "lines":
+        preferred = [m.end() for m in _NEWLINE.finditer(text)]
+    else:
+        raise ValueError(f"unknown break policy {breaks!r} (expected 'sentence' or 'lines')")
+
+    n = len(text)
+    out: List[TextChunk] = []
+    start = 0
+    while start < n:
+        k = units.pos(start)
+        limit = units.char(k + size)
+        if limit >= n:
+            end = n
+        else:
+            half = units.char(k + max(1, size // 2))
+            end = (
+                _last_at_most(preferred, half - 1, limit)
+                or _word_break(text, half - 1, limit)
+                or _word_break(text, start, limit)
+                or limit
+            )
+            end = max(end, start + 1)  # several tokens can start at one char: always advance
+        piece = _trimmed(text, start, end)
+        if piece:
+            out.append(piece)
+        if end >= n:
+            break
+
+        nxt = end
+        if overlap:
+            back = units.char(max(units.pos(end) - overlap, k + 1))
+            # snap forward to a line (lines) or word start so the overlap doesn't begin mid-word
+            if 0 < back < end and not text[back - 1] == "\n":
+                nl = text.find("\n", back, end) if breaks == "lines" else -1
+                if 0 <= nl < end - 1:
+                    back = nl + 1
+                elif not text[back - 1].isspace():
+                    ws = _SPACE.search(text, back, end)
+                    back = ws.end() if ws is not None and ws.end() < end else back
+            if start < back < end:
+                nxt = back
+        start = nxt
+    return out
+
+
+def split_chunks(text: str, size: int, overlap: int = 0, **kwargs: Any) -> List[str]:
+    """split_text, texts only."""
+    return [c.text for c in split_text(text, size, overlap, **kwargs)]
+
+
+def chunking_params(cparams: Optional[Dict[str, Any]]) -> Tuple[int, int, str]:
+    """
+    Profile `chunking:` block -> (size, overlap, unit).
+
+    `max_tokens` selects token sizing (overlap then counts tokens too); otherwise
+    `size` is in `unit` (default chars).
+    """
+    cparams = cparams or {}
+    if cparams.get("max_tokens") is not None:
+        return int(cparams["max_tokens"]), int(cparams.get("overlap", 0)), "tokens"
+    unit = str(cparams.get("unit") or "chars").lower()
+    if unit not in UNITS:
+        raise ValueError(f"unknown chunking.unit {unit!r} (expected one of {', '.join(UNITS)})")
+    return int(cparams.get("size", 1200)), int(cparams.get("overlap", 200)), unit
 
 
 def chunk_text(text: str, size: int = 1200, overlap: int = 200) -> List[str]:
+    """Word-window chunks: `size` words each, `overlap` words shared (line breaks preferred)."""
     if size <= 0:
         return [text]
-    tokens = text.split()
-    if overlap >= size:
-        overlap = max(0, size - 1)
-
-    chunks: List[str] = []
-    i = 0
-    n = len(tokens)
-
-    while i < n:
-        j = min(i + size, n)
-        chunks.append(" ".join(tokens[i:j]))
-        if j == n:
-            break
-        i += max(1, size - overlap)
-
-    return [c for c in chunks if c.strip()]
+    return split_chunks(text, size, overlap, unit="words", breaks="lines")
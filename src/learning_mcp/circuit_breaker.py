@@ -0,0 +1,188 @@
+# src/learning_mcp/circuit_breaker.py
+"""
+Per-backend circuit breakers for embedding endpoints.
+
+Purpose:
+- Stop paying a dead backend's full timeout + retries on every request. After
+  EMBED_BREAKER_FAILURES consecutive bad calls (errors, or successes slower than
+  EMBED_BREAKER_SLOW_MS) the breaker OPENS and the Embedder routes straight to
+  the other backend.
+- After EMBED_BREAKER_OPEN_S the breaker goes HALF-OPEN: a single probe request
+  is let through; success closes it, failure re-opens it.
+- Also keeps a small window of recent latencies (p50/p95) per backend, shown in
+  /health and used to size hedging delays.
+
+State is process-wide and keyed by backend identity (e.g. "ollama:http://host:11434:nomic-embed-text"),
+so the short-lived Embedders created per search request share it.
+
+Usage:
+    br = get_breaker("cloudflare:@cf/baai/bge-small-en-v1.5")
+    if br.allow():
+        ... call ...
+        br.record_success(latency_ms)   # or br.record_failure(exc)
+    breaker_states()                    # -> {"cloudflare:...": {"state": "open", ...}}
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+BREAKER_FAILURES = int(os.getenv("EMBED_BREAKER_FAILURES", "3"))
+BREAKER_OPEN_S = float(os.getenv("EMBED_BREAKER_OPEN_S", "30"))
+BREAKER_SLOW_MS = float(os.getenv("EMBED_BREAKER_SLOW_MS", "15000"))
+LATENCY_WINDOW = int(os.getenv("EMBED_LATENCY_WINDOW", "200"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single-probe half-open state."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = BREAKER_FAILURES,
+        open_s: float = BREAKER_OPEN_S,
+        slow_ms: float = BREAKER_SLOW_MS,
+        latency_window: int = LATENCY_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_s = max(0.0, open_s)
+        self.slow_ms = slow_ms
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._latencies: Deque[float] = deque(maxlen=max(1, latency_window))
+        self.trips = 0
+
+    # ---------- gating ----------
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked(self._clock())
+
+    def available(self) -> bool:
+        """Would a call be let through right now? (does not take the probe slot)"""
+        with self._lock:
+            now = self._clock()
+            state = self._state_locked(now)
+            if state == CLOSED:
+                return True
+            return state == HALF_OPEN and not self._probe_busy_locked(now)
+
+    def allow(self) -> bool:
+        """Admit a call; in half-open only one probe is admitted at a time."""
+        with self._lock:
+            now = self._clock()
+            state = self._state_locked(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_busy_locked(now):
+                self._probe_at = now
+                return True
+            return False
+
+    # ---------- feedback ----------
+    def record_success(self, latency_ms: float) -> None:
+        if latency_ms > self.slow_ms:
+            self.record_failure(f"slow response ({latency_ms:.0f} ms > {self.slow_ms:.0f} ms)", latency_ms)
+            return
+        with self._lock:
+            self._latencies.append(latency_ms)
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_at = None
+
+    def record_failure(self, error: Any = None, latency_ms: Optional[float] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            if latency_ms is not None:
+                self._latencies.append(latency_ms)
+            self._last_error = str(error)[:200] if error is not None else None
+            self._failures += 1
+            state = self._state_locked(now)
+            if state == HALF_OPEN or (state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = now
+                self._probe_at = None
+                self.trips += 1
+
+    # ---------- stats ----------
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """q in [0, 100] over the recent latency window (None until there is data)."""
+        with self._lock:
+            data = sorted(self._latencies)
+        if not data:
+            return None
+        k = min(len(data) - 1, max(0, int(round(q / 100.0 * (len(data) - 1)))))
+        return data[k]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.latency_percentile(50), self.latency_percentile(95)
+        with self._lock:
+            now = self._clock()
+            state = self._state_locked(now)
+            retry_in = None
+            if state == OPEN and self._opened_at is not None:
+                retry_in = round(max(0.0, self._opened_at + self.open_s - now), 1)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "retry_in_s": retry_in,
+                "last_error": self._last_error,
+                "latency_p50_ms": None if p50 is None else round(p50, 1),
+                "latency_p95_ms": None if p95 is None else round(p95, 1),
+            }
+
+    # ---------- internal ----------
+    def _state_locked(self, now: float) -> str:
+        if self._state == OPEN and self._opened_at is not None and now - self._opened_at >= self.open_s:
+            self._state = HALF_OPEN
+            self._probe_at = None
+        return self._state
+
+    def _probe_busy_locked(self, now: float) -> bool:
+        # A probe that never reported back (e.g. cancelled) frees the slot after open_s
+        return self._probe_at is not None and now - self._probe_at < max(self.open_s, 1.0)
+
+
+# ---------- Process-wide registry ----------
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_breaker(key: str) -> CircuitBreaker:
+    with _REGISTRY_LOCK:
+        br = _BREAKERS.get(key)
+        if br is None:
+            br = _BREAKERS[key] = CircuitBreaker(key)
+        return br
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every backend seen by this process (for /health)."""
+    with _REGISTRY_LOCK:
+        items = list(_BREAKERS.items())
+    return {key: br.snapshot() for key, br in items}
+
+
+def reset_breakers() -> None:
+    """Forget all breaker state (tests, config reloads)."""
+    with _REGISTRY_LOCK:
+        _BREAKERS.clear()
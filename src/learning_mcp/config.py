@@ -41,6 +41,25 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
+_PROFILES_CACHE: dict[str, Any] = {}
+
+
+def load_profiles_cached() -> dict[str, Any]:
+    """
+    settings.load_profiles(), re-read only when learning.yaml changes (path, mtime, size).
+    Treat the result as read-only: it is shared by every caller.
+    """
+    p = Path(settings.PROFILES_PATH)
+    try:
+        st = p.stat()
+        key = (str(p), st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = (str(p), None, None)
+    if _PROFILES_CACHE.get("key") != key:
+        _PROFILES_CACHE.update(key=key, data=settings.load_profiles())
+    return _PROFILES_CACHE["data"]
+
+
 def get_config() -> dict:
     """Get the full configuration dict from learning.yaml."""
     return settings.load_profiles()
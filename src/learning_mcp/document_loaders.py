@@ -11,26 +11,49 @@ list of chunk dicts:
 
 Supported types
 ---------------
-- pdf  : via pdf_loader.load_pdf_structured (rich metadata)
+- pdf  : via pdf_loader.load_pdf_structured (rich metadata;
+         `cross_pages: true` on the doc lets chunks span page breaks;
+         section/title come from the PDF outline unless `outline: false`)
 - json : via json_loader.load_json (flat, schema-agnostic)
+- jsonl: via json_loader.iter_jsonl_chunks (one record per line)
+
+Streaming
+---------
+JSON/JSONL files of at least JSON_STREAM_MIN_BYTES (default 32 MiB), or any
+doc with `stream: true`, come back as a ChunkStream instead of a list: a
+re-iterable that re-reads the file on each pass. Loading only opens the file;
+parsing (and parse errors) happen while it is iterated, and len() costs one
+extra pass. Consumers that iterate (the ingest worker) then hold one batch of
+chunks, not the whole file, and count the chunks as they go.
 
 Stats
 -----
-Also returns (files_total, pages_total) for preflight/progress.
+Also returns (files_total, files_done, pages_total) for preflight/progress.
+
+Progress
+--------
+Pass `progress=IngestProgress(...)` to collect_chunks to get live
+current_file / pages_done / files_done updates while loading.
 
 Usage (in worker)
 -----------------
 from learning_mcp.document_loaders import collect_chunks, known_document_count, estimate_pages_total
 chunks, stats = collect_chunks(profile, chunk_size, chunk_overlap)
+# chunk_unit="tokens" sizes chunks in tokenizer tokens (see chunker.chunking_params)
 # embed -> upsert using chunks (no need to know pdf/json in the worker)
+
+# per file, e.g. to skip files a resumed job already upserted
+for doc, pieces in iter_document_chunks(profile, chunk_size=..., chunk_overlap=...,
+                                        skip=lambda d: d["path"] in done):
+    ...
 """
 
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple, Iterable, Callable, Optional
+from typing import Dict, Any, List, Tuple, Iterable, Iterator, Callable, Optional
 import os
 
-from .pdf_loader import load_pdf_structured
-from .json_loader import load_json
+from .pdf_loader import load_pdf_structured, section_ancestors
+from .json_loader import iter_json_chunks, iter_jsonl_chunks, load_json, load_jsonl
 
 # prefer pypdf if available (faster), fallback to PyPDF2
 try:
@@ -39,20 +62,55 @@ except Exception:
     from PyPDF2 import PdfReader  # type: ignore
 
 from .page_ranges import compute_pages
+from .progress import IngestProgress
 
 
 Chunk = Dict[str, Any]  # {"text": str, "metadata": {...}}
 
+# JSON/JSONL files at least this large are streamed instead of loaded into a list
+JSON_STREAM_MIN_BYTES = int(os.getenv("JSON_STREAM_MIN_BYTES", str(32 * 1024 * 1024)))
+
+
+class ChunkStream:
+    """
+    Re-iterable, lazily produced chunks of one document.
+
+    Each iteration calls `factory()` afresh (re-reading the file); len() is
+    one counting pass, cached. Iterate it, don't index it.
+    """
+
+    def __init__(self, factory: Callable[[], Iterable[Chunk]]):
+        self._factory = factory
+        self._len: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Chunk]:
+        return iter(self._factory())
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self._factory())
+        return self._len
+
 
 # -------- registry --------
 
-def _load_pdf(doc_spec: Dict[str, Any], *, profile_name: str, chunk_size: int, chunk_overlap: int) -> List[Chunk]:
+def _load_pdf(
+    doc_spec: Dict[str, Any],
+    *,
+    profile_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+) -> List[Chunk]:
     """
     Use structured PDF loader and normalize to Chunk shape.
     """
     path = (doc_spec.get("path") or "").strip()
     if not path or not os.path.exists(path):
         return []
+    if progress is not None:
+        progress.start_file(path)
 
     # Allow per-doc include/exclude override; fallback to profile-level
     include_pages = doc_spec.get("include_pages")
@@ -65,6 +123,10 @@ def _load_pdf(doc_spec: Dict[str, Any], *, profile_name: str, chunk_size: int, c
         exclude_pages=exclude_pages,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
+        chunk_unit=chunk_unit,
+        cross_pages=bool(doc_spec.get("cross_pages", False)),
+        use_outline=bool(doc_spec.get("outline", True)),
+        on_page=(progress.page_done if progress is not None else None),
     )
     out: List[Chunk] = []
     for it in items:
@@ -84,41 +146,104 @@ def _load_pdf(doc_spec: Dict[str, Any], *, profile_name: str, chunk_size: int, c
             "page_start": it.get("page_start"),
             "page_end": it.get("page_end"),
             "hash": it.get("hash"),
+            # outline section plus its ancestors, for section-scoped search
+            "sections": section_ancestors(it.get("section_id") or ""),
         }
         out.append({"text": text, "metadata": meta})
     return out
 
 
-def _load_json(doc_spec: Dict[str, Any], *, profile_name: str, chunk_size: int, chunk_overlap: int) -> List[Chunk]:
-    """
-    Use flat JSON loader and normalize to Chunk shape.
-    """
+def _json_chunk(it: Chunk, *, profile_name: str, path: str) -> Chunk:
+    """Normalize a json_loader chunk to the registry Chunk shape."""
+    meta_in = it.get("metadata") or {}
+    meta = {
+        "section": meta_in.get("section") or "json",
+        "title": meta_in.get("title"),
+        "source": meta_in.get("source"),
+        "source_id": meta_in.get("source_id") or meta_in.get("path"),
+        "path": meta_in.get("path"),
+        "doc_id": profile_name,
+        "doc_path": path,
+    }
+    return {"text": it.get("text", ""), "metadata": meta}
+
+
+def _should_stream(doc_spec: Dict[str, Any], path: str) -> bool:
+    if doc_spec.get("stream") is not None:
+        return bool(doc_spec.get("stream"))
+    return os.path.getsize(path) >= JSON_STREAM_MIN_BYTES
+
+
+def _json_source(
+    load_list: Callable[..., List[Chunk]],
+    iter_chunks: Callable[..., Iterable[Chunk]],
+    doc_spec: Dict[str, Any],
+    *,
+    profile_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+) -> Iterable[Chunk]:
+    """List via load_list for ordinary files, ChunkStream over iter_chunks for big ones."""
     path = (doc_spec.get("path") or "").strip()
     if not path or not os.path.exists(path):
         return []
-    items = load_json(path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    out: List[Chunk] = []
-    for it in items:
-        text = it.get("text", "")
-        if not text:
-            continue
-        meta_in = it.get("metadata") or {}
-        meta = {
-            "section": meta_in.get("section") or "json",
-            "title": meta_in.get("title"),
-            "source": meta_in.get("source"),
-            "source_id": meta_in.get("source_id") or meta_in.get("path"),
-            "path": meta_in.get("path"),
-            "doc_id": profile_name,
-            "doc_path": path,
-        }
-        out.append({"text": text, "metadata": meta})
-    return out
+    if progress is not None:
+        progress.start_file(path)
+
+    if not _should_stream(doc_spec, path):
+        items = load_list(path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit)
+        return [_json_chunk(it, profile_name=profile_name, path=path) for it in items if it.get("text")]
+
+    def produce() -> Iterator[Chunk]:
+        for it in iter_chunks(path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit):
+            if it.get("text"):
+                yield _json_chunk(it, profile_name=profile_name, path=path)
+
+    return ChunkStream(produce)
+
+
+def _load_json(
+    doc_spec: Dict[str, Any],
+    *,
+    profile_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+) -> Iterable[Chunk]:
+    """
+    Use flat JSON loader and normalize to Chunk shape (streamed for big files).
+    """
+    return _json_source(
+        load_json, iter_json_chunks, doc_spec, profile_name=profile_name,
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit, progress=progress,
+    )
+
+
+def _load_jsonl(
+    doc_spec: Dict[str, Any],
+    *,
+    profile_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+) -> Iterable[Chunk]:
+    """
+    JSON Lines, one record per line (streamed for big files).
+    """
+    return _json_source(
+        load_jsonl, iter_jsonl_chunks, doc_spec, profile_name=profile_name,
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit, progress=progress,
+    )
 
 
-_LOADER_BY_TYPE: Dict[str, Callable[..., List[Chunk]]] = {
+_LOADER_BY_TYPE: Dict[str, Callable[..., Iterable[Chunk]]] = {
     "pdf": _load_pdf,
     "json": _load_json,
+    "jsonl": _load_jsonl,
 }
 
 
@@ -129,7 +254,7 @@ def known_document_count(profile: Dict[str, Any]) -> int:
     Count documents that have a known loader.
     """
     docs = profile.get("documents") or []
-    return sum(1 for d in docs if _LOADER_BY_TYPE.get(str(d.get("type") or "").lower()))
+    return sum(1 for d in docs if document_type(d))
 
 
 def estimate_pages_total(profile: Dict[str, Any]) -> int:
@@ -158,40 +283,113 @@ def estimate_pages_total(profile: Dict[str, Any]) -> int:
     return total
 
 
+def document_type(doc_spec: Dict[str, Any]) -> Optional[str]:
+    """The doc's type if it has a known loader, else None."""
+    dtype = str(doc_spec.get("type") or "").lower()
+    return dtype if dtype in _LOADER_BY_TYPE else None
+
+
+def load_document(
+    doc_spec: Dict[str, Any],
+    *,
+    profile_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+) -> Iterable[Chunk]:
+    """
+    Chunks of one document through its type's loader ([] for unknown types and
+    missing files). Synchronous and self-contained, so it can run in a worker
+    thread or process (see load_stage).
+    """
+    loader = _LOADER_BY_TYPE.get(document_type(doc_spec) or "")
+    if not loader:
+        return []
+    pieces = loader(
+        doc_spec,
+        profile_name=profile_name,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        chunk_unit=chunk_unit,
+        progress=progress,
+    )
+    return [] if pieces is None else pieces  # not `or`: len() of a ChunkStream is a full pass
+
+
+def iter_document_chunks(
+    profile: Dict[str, Any],
+    *,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+    skip: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Iterator[Tuple[Dict[str, Any], Optional[Iterable[Chunk]]]]:
+    """
+    Yield (doc_spec, chunks) for each document with a known loader, in profile order.
+
+    chunks is a list, or a ChunkStream for large JSON/JSONL files (see Streaming):
+    both support len() and iteration.
+
+    Documents for which skip(doc_spec) is true are not loaded; they are yielded
+    with chunks=None so callers can still account for them.
+    """
+    profile_name = str(profile.get("name") or "profile").strip()
+    for d in profile.get("documents") or []:
+        if not document_type(d):
+            # unknown type → skip; caller may log a warning
+            continue
+        if skip is not None and skip(d):
+            yield d, None
+            continue
+        pieces = load_document(
+            d,
+            profile_name=profile_name,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunk_unit=chunk_unit,
+            progress=progress,
+        )
+        if progress is not None:
+            progress.file_done()
+        yield d, pieces
+
+
 def collect_chunks(
     profile: Dict[str, Any],
     *,
     chunk_size: int,
     chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
 ) -> Tuple[List[Chunk], Dict[str, int]]:
     """
     Collect chunks from all known document types in the given profile.
 
     Returns:
         (chunks, stats)
-        where stats = {"files_total": int, "pages_total": int}
+        where stats = {"files_total": int, "files_done": int, "pages_total": int}
 
     Behavior:
         - Ignores unknown doc types (logs can be added by caller).
         - Skips missing files.
     """
-    profile_name = str(profile.get("name") or "profile").strip()
-    docs = profile.get("documents") or []
-
     chunks: List[Chunk] = []
     files_total = 0
+    files_done = 0
 
-    for d in docs:
-        dtype = str(d.get("type") or "").lower()
-        loader = _LOADER_BY_TYPE.get(dtype)
-        if not loader:
-            # unknown type → skip; caller may log a warning
-            continue
-
-        pieces = loader(d, profile_name=profile_name, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for _doc, pieces in iter_document_chunks(
+        profile,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        chunk_unit=chunk_unit,
+        progress=progress,
+    ):
         files_total += 1  # counted only for known types
-        if pieces:
+        files_done += 1
+        if pieces is not None:
             chunks.extend(pieces)
 
     pages_total = estimate_pages_total(profile)  # JSON contributes 0
-    return chunks, {"files_total": files_total, "pages_total": pages_total}
+    return chunks, {"files_total": files_total, "files_done": files_done, "pages_total": pages_total}
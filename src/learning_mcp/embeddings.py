@@ -5,29 +5,59 @@ Unified embeddings with primary/fallback selection + per-request logging.
 Enhancements:
 - EMBED_PACING_MS applies to BOTH Cloudflare and Ollama.
 - Timing/outcome logs (duration ms, backend).
-- Input trimming via EMBED_MAX_CHARS; vector sanitization (no NaN/Inf).
+- Input trimming via EMBED_MAX_CHARS; vector sanitization (no NaN/Inf), done
+  as one vectorized NumPy check per vector.
+- Array path: `embed_array()` writes straight into a contiguous float32
+  (n, dim) matrix, which VDB.upsert takes as-is (ingest uses this).
+  `embed()` keeps returning Python lists for existing callers.
 - Optional caching hook: pass `ids` aligned with `texts`, and a `cache`
   (dict-like or object with get/set). Cache short-circuits hits.
+- Per-item failure tracking: vectors that succeed on a backend are kept; only
+  the items that failed (after retries / NaN / wrong dim) go to the fallback.
+  Items that fail everywhere raise, or, with `dead_letters=[]`, are reported
+  there and left as None so one poison chunk cannot sink a whole ingest.
+- Circuit breakers (circuit_breaker.py): each backend's calls feed a shared
+  breaker; while one is open, requests go straight to the other backend and
+  in-flight batches stop sending it new items.
+- Backends: "ollama", "cloudflare", and "hashing" (hashing_embeddings.py: local,
+  deterministic, CPU-only; for benchmarks and air-gapped runs).
+- Single-flight (EMBED_SINGLE_FLIGHT=1, default): duplicate texts in one call
+  are embedded once and fanned back out; a text already in flight in another
+  concurrent call (same models/dim) awaits that request instead of resending.
+- Hedged query embeddings (opt-in, `embed_query`): if the primary has not
+  answered within its recent p95 latency, the same text is sent to the
+  fallback (only when both backends serve the same model at the same dim)
+  or again to the primary; the first valid vector wins and the loser is
+  cancelled. Meant for interactive searches only; ingest keeps using embed().
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple, Iterable
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Callable
 import asyncio
 import logging
 import os
 import time
-import math
 import random
 
 import httpx
+import numpy as np
 from httpx import HTTPStatusError
 
+from .circuit_breaker import CircuitBreaker, get_breaker
+from .hashing_embeddings import hashed_ngram_embed
+
 log = logging.getLogger("learning_mcp.embeddings")
 
 EMBED_PACING_MS = int(os.getenv("EMBED_PACING_MS", "150"))
 EMBED_MAX_CHARS = int(os.getenv("EMBED_MAX_CHARS", "8000"))  # trim long inputs defensively
+CF_API_BASE_URL = os.getenv("CF_API_BASE_URL", "https://api.cloudflare.com/client/v4")
+EMBED_SINGLE_FLIGHT = os.getenv("EMBED_SINGLE_FLIGHT", "1").lower() in ("1", "true", "yes")
+EMBED_HEDGE = os.getenv("EMBED_HEDGE", "0").lower() in ("1", "true", "yes")
+EMBED_HEDGE_PERCENTILE = float(os.getenv("EMBED_HEDGE_PERCENTILE", "95"))
+EMBED_HEDGE_MIN_MS = float(os.getenv("EMBED_HEDGE_MIN_MS", "50"))
+EMBED_HEDGE_DEFAULT_MS = float(os.getenv("EMBED_HEDGE_DEFAULT_MS", "500"))  # before any latency is known
 
 
 # ---------------------------
@@ -40,7 +70,7 @@ class EmbeddingConfig:
     dim: int
 
     # Primary/fallback
-    primary: str = "ollama"                 # "ollama" | "cloudflare"
+    primary: str = "ollama"                 # "ollama" | "cloudflare" | "hashing"
     fallback: Optional[str] = None          # same choices, optional
 
     # Ollama
@@ -55,6 +85,17 @@ class EmbeddingConfig:
     cf_account_id: Optional[str] = None
     cf_api_token: Optional[str] = None
     cf_model: Optional[str] = None          # e.g. "@cf/baai/bge-small-en-v1.5"
+    cf_base_url: str = CF_API_BASE_URL      # override for proxies / local mock servers
+
+    # Hashing (offline): character n-gram range
+    hashing_ngram_min: int = 3
+    hashing_ngram_max: int = 5
+
+    # Hedged query embeddings (embed_query only)
+    hedge: bool = EMBED_HEDGE
+    hedge_percentile: float = EMBED_HEDGE_PERCENTILE
+    hedge_min_delay_ms: float = EMBED_HEDGE_MIN_MS
+    hedge_default_delay_ms: float = EMBED_HEDGE_DEFAULT_MS
 
     @staticmethod
     def from_profile(profile: Dict[str, Any]) -> "EmbeddingConfig":
@@ -64,7 +105,7 @@ class EmbeddingConfig:
         embedding:
           dim: 768
           backend:
-            primary: ollama           # or 'cloudflare'
+            primary: ollama           # or 'cloudflare' / 'hashing' (offline)
             fallback: cloudflare      # optional
           keep_alive: "15m"
           batch_size: 32
@@ -76,10 +117,16 @@ class EmbeddingConfig:
             account_id: "..."
             api_token: "..."
             model: "@cf/baai/bge-small-en-v1.5"
+            base_url: "https://api.cloudflare.com/client/v4"   # optional
+          hashing:                    # only for backend 'hashing'
+            ngram_min: 3
+            ngram_max: 5
+          hedge: true                 # or {enabled, percentile, min_delay_ms, default_delay_ms}
         """
         emb = profile.get("embedding", {}) or {}
         ol = emb.get("ollama", {}) or {}
         cf = emb.get("cloudflare", {}) or {}
+        hs = emb.get("hashing", {}) or {}
         be = emb.get("backend", {}) or {}
 
         dim = int(emb.get("dim", 768))
@@ -90,7 +137,7 @@ class EmbeddingConfig:
         fallback = str(fallback).strip().lower() if fallback else None
 
         def _ok(name: Optional[str]) -> Optional[str]:
-            return name if name in ("ollama", "cloudflare") else None
+            return name if name in ("ollama", "cloudflare", "hashing") else None
 
         primary = _ok(primary) or "ollama"
         fallback = _ok(fallback)
@@ -108,6 +155,11 @@ class EmbeddingConfig:
         cf_account_id = cf.get("account_id") or os.getenv("CF_ACCOUNT_ID")
         cf_api_token  = cf.get("api_token")  or os.getenv("CF_API_TOKEN")
         cf_model      = cf.get("model")      or os.getenv("CF_EMBED_MODEL")
+        cf_base_url   = (cf.get("base_url")  or CF_API_BASE_URL).rstrip("/")
+
+        # Hedging: bool shorthand or a mapping
+        hd = emb.get("hedge", EMBED_HEDGE)
+        hd = hd if isinstance(hd, dict) else {"enabled": bool(hd)}
 
         return EmbeddingConfig(
             dim=dim,
@@ -122,6 +174,13 @@ class EmbeddingConfig:
             cf_account_id=cf_account_id,
             cf_api_token=cf_api_token,
             cf_model=cf_model,
+            cf_base_url=cf_base_url,
+            hashing_ngram_min=int(hs.get("ngram_min", 3)),
+            hashing_ngram_max=int(hs.get("ngram_max", 5)),
+            hedge=bool(hd.get("enabled", True)),
+            hedge_percentile=float(hd.get("percentile", EMBED_HEDGE_PERCENTILE)),
+            hedge_min_delay_ms=float(hd.get("min_delay_ms", EMBED_HEDGE_MIN_MS)),
+            hedge_default_delay_ms=float(hd.get("default_delay_ms", EMBED_HEDGE_DEFAULT_MS)),
         )
 
 
@@ -129,6 +188,19 @@ class EmbeddingError(RuntimeError):
     pass
 
 
+class PartialEmbeddingError(EmbeddingError):
+    """
+    Raised by a backend when only some items failed.
+    `vectors` is aligned with the backend's input (None where failed);
+    `errors` maps input index -> exception.
+    """
+
+    def __init__(self, vectors: List[Optional[List[float]]], errors: Dict[int, Exception]):
+        super().__init__(f"{len(errors)}/{len(vectors)} item(s) failed: {next(iter(errors.values()), '')}")
+        self.vectors = vectors
+        self.errors = errors
+
+
 # ---------------------------
 # Helpers (trim/sanitize/cache)
 # ---------------------------
@@ -146,15 +218,53 @@ def _trim_texts(texts: List[str]) -> List[str]:
     return out
 
 
-def _sanitize_vec(vec: List[float]) -> List[float]:
-    if any(
-        (v is None or isinstance(v, bool) or math.isnan(v) or math.isinf(v))
-        for v in vec
-    ):
-        raise EmbeddingError("Invalid number in embedding vector (NaN/Inf/None/bool).")
+def _json_vector(vec: Any) -> Any:
+    """
+    A vector as decoded from a backend's JSON response, with JSON true/false
+    rejected (float32 would take them as 1.0/0.0). Runs once per response;
+    map(type) walks the list in C.
+    """
+    if isinstance(vec, list) and bool in set(map(type, vec)):
+        raise EmbeddingError("Invalid number in embedding vector (bool).")
     return vec
 
 
+def _sanitize_vec(vec: Any) -> np.ndarray:
+    """Vector -> 1-D float32 array; NaN/Inf/None rejected in one vectorized check (bools: _json_vector)."""
+    if isinstance(vec, np.ndarray) and vec.dtype == np.bool_:
+        raise EmbeddingError("Invalid number in embedding vector (bool).")
+    try:
+        arr = np.asarray(vec, dtype=np.float32)  # None -> NaN, caught below
+    except (TypeError, ValueError) as e:
+        raise EmbeddingError(f"Invalid number in embedding vector (NaN/Inf/None): {e}")
+    if arr.ndim != 1 or not arr.size:
+        raise EmbeddingError(f"Embedding vector must be a flat non-empty list (got shape {arr.shape}).")
+    if not np.isfinite(arr).all():
+        raise EmbeddingError("Invalid number in embedding vector (NaN/Inf/None).")
+    return arr
+
+
+def _is_health_error(exc: Any) -> bool:
+    """Does this failure say the backend itself is unhealthy (vs. a bad input)?"""
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, HTTPStatusError):
+        code = exc.response.status_code
+        return code in (408, 429) or code >= 500
+    return False
+
+
+def _model_identity(name: Optional[str]) -> str:
+    """
+    Backend-neutral model name, so the same model served by Ollama and
+    Cloudflare compares equal: "@cf/baai/bge-small-en-v1.5" and
+    "bge-small-en-v1.5:latest" -> "bge-small-en-v1.5".
+    """
+    n = (name or "").strip().lower()
+    n = n.rsplit("/", 1)[-1]
+    return n.split(":", 1)[0]
+
+
 def _cache_get(cache: Any, key: str) -> Optional[List[float]]:
     if cache is None:
         return None
@@ -178,6 +288,57 @@ def _cache_set(cache: Any, key: str, value: List[float]) -> None:
         pass
 
 
+# ---------------------------
+# Single-flight registry
+# ---------------------------
+
+# (model identity, text) -> future of (vec, float32 array) for requests in flight.
+# Process-wide so the short-lived Embedders built per search request share it.
+_INFLIGHT: Dict[Tuple[str, str], asyncio.Future] = {}
+
+
+def _inflight_get(key: str, text: str) -> Optional[asyncio.Future]:
+    if not EMBED_SINGLE_FLIGHT:
+        return None
+    fut = _INFLIGHT.get((key, text))
+    if fut is None or fut.done() or fut.get_loop() is not asyncio.get_running_loop():
+        return None
+    return fut
+
+
+def _inflight_lead(key: str, text: str) -> asyncio.Future:
+    fut = asyncio.get_running_loop().create_future()
+    _INFLIGHT[(key, text)] = fut
+    return fut
+
+
+def _inflight_settle(
+    key: str,
+    led: Dict[str, asyncio.Future],
+    got: Dict[str, Tuple[Any, np.ndarray]],
+    failures: Dict[str, Exception],
+) -> None:
+    """Resolve the futures this call leads (always, even on error/cancel) and unregister them."""
+    for text, fut in led.items():
+        if _INFLIGHT.get((key, text)) is fut:
+            del _INFLIGHT[(key, text)]
+        if fut.done():
+            continue
+        if text in got:
+            fut.set_result(got[text])
+        else:
+            fut.set_exception(failures.get(text) or EmbeddingError("in-flight request was abandoned"))
+            fut.exception()  # mark retrieved: joiners are optional
+
+
+_HEDGE_STATS: Dict[str, int] = {"fired": 0, "won": 0}
+
+
+def hedge_stats() -> Dict[str, int]:
+    """Process-wide hedging counters: hedges fired, and how many the hedge won."""
+    return dict(_HEDGE_STATS)
+
+
 # ---------------------------
 # Embedder
 # ---------------------------
@@ -223,20 +384,65 @@ class Embedder:
         *,
         ids: Optional[List[str]] = None,
         cache: Any = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        dead_letters: Optional[List[Dict[str, Any]]] = None,
     ) -> List[List[float]]:
         """
         Embed a list of texts.
         - Optional `ids` (same length as `texts`) enable cache short-circuiting.
         - `cache` can be a dict or object exposing get/set(key, value).
+        - Optional `on_progress(n)` is called as items complete (cache hits included),
+          for live ingest progress.
+        - Optional `dead_letters` list: items that failed on every backend are
+          appended as {"index", "error", "backends"} and their result slot is None,
+          instead of raising. If nothing at all succeeded it still raises (that's
+          an outage, not a poison item).
         """
         if not texts:
             return []
+        return await self._embed_into(texts, None, ids, cache, on_progress, dead_letters)  # type: ignore[return-value]
+
+    async def embed_array(
+        self,
+        texts: List[str],
+        *,
+        ids: Optional[List[str]] = None,
+        cache: Any = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        dead_letters: Optional[List[Dict[str, Any]]] = None,
+    ) -> np.ndarray:
+        """
+        Same as embed(), but returns a C-contiguous float32 matrix of shape
+        (len(texts), dim). Rows of dead-lettered items are NaN (so they can
+        never be upserted by accident); drop them using `dead_letters` indices.
+        """
+        out = np.full((len(texts), self.cfg.dim), np.nan, dtype=np.float32)
+        if texts:
+            await self._embed_into(texts, out, ids, cache, on_progress, dead_letters)
+        return out
+
+    async def _embed_into(
+        self,
+        texts: List[str],
+        out: Optional[np.ndarray],
+        ids: Optional[List[str]],
+        cache: Any,
+        on_progress: Optional[Callable[[int], None]],
+        dead_letters: Optional[List[Dict[str, Any]]],
+    ) -> Any:
+        """Shared body of embed()/embed_array(): rows go to `out` if given, else to a list."""
 
         # Trim overly long inputs defensively
         texts = _trim_texts(texts)
 
         # Try cache first (if provided and ids aligned)
         results: List[Optional[List[float]]] = [None] * len(texts)
+
+        def place(idx: int, vec: Any, arr: np.ndarray) -> None:
+            if out is None:
+                results[idx] = vec if isinstance(vec, list) else arr.tolist()
+            else:
+                out[idx] = arr
         pending_indices: List[int] = list(range(len(texts)))
         if ids is not None and cache is not None and len(ids) == len(texts):
             hit = 0
@@ -244,76 +450,285 @@ class Embedder:
             for i in pending_indices:
                 vec = _cache_get(cache, ids[i])
                 if vec is not None:
-                    results[i] = _sanitize_vec(vec)
+                    place(i, vec, _sanitize_vec(vec))
                     hit += 1
                 else:
                     new_pending.append(i)
             pending_indices = new_pending
             if hit:
                 log.info("embed.cache hits=%s miss=%s total=%s", hit, len(pending_indices), len(texts))
+                if on_progress is not None:
+                    on_progress(hit)
         else:
             log.info("embed.cache disabled (ids or cache not provided/aligned)")
 
         if not pending_indices:
             # All hits
-            return [results[i] for i in range(len(results))]  # type: ignore[list-item]
+            return results if out is None else out
+
+        # Single-flight: identical texts are sent once per call, and texts another
+        # call already has in flight are awaited instead of sent again.
+        groups: Dict[str, List[int]] = {}
+        for i in pending_indices:
+            groups.setdefault(texts[i], []).append(i)
+        lead: List[str] = []
+        joined: Dict[str, asyncio.Future] = {}
+        led: Dict[str, asyncio.Future] = {}
+        flight_key = self._flight_key()
+        for text in groups:
+            fut = _inflight_get(flight_key, text)
+            if fut is not None:
+                joined[text] = fut
+                continue
+            lead.append(text)
+            if EMBED_SINGLE_FLIGHT:
+                led[text] = _inflight_lead(flight_key, text)
+        if len(groups) < len(pending_indices) or joined:
+            log.info(
+                "embed.dedup items=%s unique=%s joined_in_flight=%s",
+                len(pending_indices), len(groups), len(joined),
+            )
 
+        t0_all = time.time()
+        got: Dict[str, Tuple[Any, np.ndarray]] = {}
+        failures: Dict[str, Exception] = {}
+        tried: List[str] = []
+        try:
+            if lead:
+                lead_got, lead_failed, tried = await self._embed_unique(lead, on_progress)
+                got.update((lead[j], v) for j, v in lead_got.items())
+                failures.update((lead[j], e) for j, e in lead_failed.items())
+        finally:
+            _inflight_settle(flight_key, led, got, failures)
+
+        for text, fut in joined.items():
+            try:
+                got[text] = await asyncio.shield(fut)
+                if on_progress is not None:
+                    on_progress(1)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise  # we were cancelled, not the call we joined
+                failures[text] = EmbeddingError("joined in-flight request was cancelled")
+            except Exception as e:
+                failures[text] = e
+
+        # fan results back out to every index; duplicates count as progress too
+        remaining: List[int] = []
+        dup_done = 0
+        for text, idxs in groups.items():
+            if text not in got:
+                remaining.extend(idxs)
+                continue
+            vec, arr = got[text]
+            for idx in idxs:
+                place(idx, vec, arr)
+                if ids is not None and cache is not None:
+                    _cache_set(cache, ids[idx], vec)
+            dup_done += len(idxs) - 1
+        if dup_done and on_progress is not None:
+            on_progress(dup_done)
+
+        if remaining:
+            remaining.sort()
+            first_error = failures[texts[remaining[0]]]
+            if dead_letters is None or len(remaining) == len(pending_indices):
+                # every backend failed (for everything, or the caller wants all-or-nothing)
+                raise EmbeddingError(str(first_error))
+            for idx in remaining:
+                dead_letters.append({"index": idx, "error": str(failures[texts[idx]])[:300], "backends": list(tried)})
+            log.error("embed.dead_letters n=%s of=%s first=%s", len(remaining), len(texts), first_error)
+
+        total_ms = (time.time() - t0_all) * 1000.0
+        log.info("embed.total n=%s ms=%.1f backends_tried=%s", len(texts), total_ms, ",".join(tried))
+        return results if out is None else out
+
+    async def _embed_unique(
+        self,
+        texts: List[str],
+        on_progress: Optional[Callable[[int], None]],
+    ) -> Tuple[Dict[int, Tuple[Any, np.ndarray]], Dict[int, Exception], List[str]]:
+        """
+        Send texts through primary, then fallback for the failures.
+        Returns ({pos: (vec, float32 array)}, {pos: error}, backends tried).
+        """
         conc = self._embed_concurrency()
-        log.info("embed.start to_embed=%s dim_expected=%s concurrency=%s", len(pending_indices), self.cfg.dim, conc)
+        log.info("embed.start to_embed=%s dim_expected=%s concurrency=%s", len(texts), self.cfg.dim, conc)
 
-        t0_all = time.time()
         order = self._backend_order()
-        last_error: Optional[Exception] = None
+        # Route around backends whose breaker is open (unless none is available)
+        order = [b for b in order if self._breaker(b).available()] or order
+        # Only pass the per-item hook when asked for (keeps backend signatures minimal)
+        item_kwargs: Dict[str, Any] = {"on_item": on_progress} if on_progress is not None else {}
 
-        # Build a compact list of texts to embed this round
-        pending_texts = [texts[i] for i in pending_indices]
+        remaining = list(range(len(texts)))
+        got: Dict[int, Tuple[Any, np.ndarray]] = {}
+        failures: Dict[int, Exception] = {}
+        tried: List[str] = []
 
         for backend in order:
+            if not remaining:
+                break
+            tried.append(backend)
             t0 = time.time()
+            # Only the items still missing go to this backend (fallback gets the failures)
+            batch_texts = [texts[i] for i in remaining]
             try:
                 if backend == "ollama":
                     if not self._ollama_url:
                         raise EmbeddingError("Ollama not configured (missing host).")
-                    log.info("embed.backend=ollama model=%s url=%s", self.cfg.ollama_model, self._ollama_url)
-                    vecs = await self._embed_ollama(pending_texts, conc)
+                    log.info("embed.backend=ollama model=%s url=%s n=%s", self.cfg.ollama_model, self._ollama_url, len(remaining))
+                    vecs: List[Any] = await self._embed_ollama(batch_texts, conc, **item_kwargs)
+                elif backend == "hashing":
+                    log.info("embed.backend=hashing dim=%s n=%s", self.cfg.dim, len(remaining))
+                    vecs = await self._embed_hashing(batch_texts, conc, **item_kwargs)
                 else:
                     if not (self._cf_url and self._cf_headers and self.cfg.cf_model):
                         raise EmbeddingError("Cloudflare not configured (account_id/api_token/model).")
-                    log.info("embed.backend=cloudflare model=%s url=%s", self.cfg.cf_model, self._cf_url)
-                    vecs = await self._embed_cloudflare(pending_texts, conc)
-
-                # sanitize + validate dim
-                vecs = [_sanitize_vec(v) for v in vecs]
-                self._validate(vecs, backend)
-
-                # place into results and populate cache
-                for j, idx in enumerate(pending_indices):
-                    results[idx] = vecs[j]
-                    if ids is not None and cache is not None:
-                        _cache_set(cache, ids[idx], vecs[j])
-
-                dur_ms = (time.time() - t0) * 1000.0
-                log.info("embed.done backend=%s n=%s ms=%.1f", backend, len(pending_indices), dur_ms)
-                break  # success → exit backend loop
-
+                    log.info("embed.backend=cloudflare model=%s url=%s n=%s", self.cfg.cf_model, self._cf_url, len(remaining))
+                    vecs = await self._embed_cloudflare(batch_texts, conc, **item_kwargs)
+                errors: Dict[int, Exception] = {}
+            except PartialEmbeddingError as e:
+                vecs, errors = e.vectors, dict(e.errors)
             except Exception as e:
-                last_error = e
+                vecs, errors = [None] * len(remaining), {j: e for j in range(len(remaining))}
+
+            # sanitize + validate dim per item
+            still_failed: List[int] = []
+            for j, idx in enumerate(remaining):
+                vec = vecs[j] if j < len(vecs) else None
+                if j not in errors and vec is not None:
+                    try:
+                        arr = self._validate_one(_sanitize_vec(vec), backend)
+                    except EmbeddingError as e:
+                        errors[j] = e
+                if j in errors or vec is None:
+                    failures[idx] = errors.get(j) or EmbeddingError("backend returned no vector")
+                    still_failed.append(idx)
+                    continue
+                got[idx] = (vec, arr)
+                failures.pop(idx, None)
+
+            dur_ms = (time.time() - t0) * 1000.0
+            if still_failed:
                 log.warning(
-                    "embed.primary_failed backend=%s model=%s reason=%s",
+                    "embed.partial backend=%s model=%s ok=%s failed=%s ms=%.1f reason=%s",
                     backend,
-                    (self.cfg.cf_model if backend == "cloudflare" else self.cfg.ollama_model),
-                    e,
+                    self._model_name(backend),
+                    len(remaining) - len(still_failed), len(still_failed), dur_ms,
+                    failures[still_failed[0]],
                 )
-                # try next backend (fallback) if any
-                continue
+            else:
+                log.info("embed.done backend=%s n=%s ms=%.1f", backend, len(remaining), dur_ms)
+            remaining = still_failed
 
-        if any(v is None for v in results):
-            # both primary and fallback failed for pending items
-            raise EmbeddingError(str(last_error) if last_error else "Embedding failed")
+        return got, failures, tried
 
-        total_ms = (time.time() - t0_all) * 1000.0
-        log.info("embed.total n=%s ms=%.1f backend_used=%s", len(texts), total_ms, (order[0] if results else "n/a"))
-        return [results[i] for i in range(len(results))]  # type: ignore[list-item]
+    async def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed one interactive query as a float32 vector. With hedging enabled
+        (profile `embedding.hedge` or EMBED_HEDGE=1) a slow primary is raced
+        against a hedge request after `_hedge_delay_s()`; otherwise this is
+        embed_array([text])[0].
+        """
+        primary = self._backend_order()[0]
+        if not self.cfg.hedge or not self._breaker(primary).available():
+            # open primary: embed() already routes straight to the fallback
+            return (await self.embed_array([text]))[0]
+
+        text = _trim_texts([text])[0]
+        key = self._flight_key()
+        fut = _inflight_get(key, text)
+        if fut is not None:
+            return (await asyncio.shield(fut))[1]
+        led = {text: _inflight_lead(key, text)} if EMBED_SINGLE_FLIGHT else {}
+        got: Dict[str, Tuple[Any, np.ndarray]] = {}
+        failures: Dict[str, Exception] = {}
+        try:
+            arr = await self._embed_hedged(primary, text)
+            got[text] = (arr.tolist(), arr)
+            return arr
+        except Exception as e:
+            failures[text] = e
+            raise
+        finally:
+            _inflight_settle(key, led, got, failures)
+
+    async def _embed_hedged(self, primary: str, text: str) -> np.ndarray:
+        """Race `primary` against a hedge request fired after the hedge delay."""
+        hedge_to = self._hedge_target()
+        delay = self._hedge_delay_s(primary)
+
+        first = asyncio.create_task(self._embed_one_on(primary, text))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done and first.exception() is None:
+                return first.result()
+
+            log.info(
+                "embed.hedge fire to=%s after_ms=%.0f primary_%s",
+                hedge_to, delay * 1000.0, "failed" if done else "slow",
+            )
+            _HEDGE_STATS["fired"] += 1
+            second = asyncio.create_task(self._embed_one_on(hedge_to, text))
+            tasks.append(second)
+            pending = {second} if done else {first, second}
+            last_exc: Optional[BaseException] = first.exception() if done else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            _HEDGE_STATS["won"] += 1
+                        return task.result()
+                    last_exc = task.exception()
+        finally:
+            # cancel the loser (or everything, if we were cancelled ourselves)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        raise EmbeddingError(f"Hedged query embedding failed: {last_exc}")
+
+    # ---------- single-flight ----------
+    def _flight_key(self) -> str:
+        """Requests are interchangeable only for the same backends, models and dim."""
+        c = self.cfg
+        return f"{c.primary}>{c.fallback}|{c.ollama_host}|{c.ollama_model}|{c.cf_model}|{c.dim}"
+
+    # ---------- hedging ----------
+    def _hedge_compatible(self) -> bool:
+        """Fallback vectors are interchangeable only if it is the same model (same dim is checked per vector)."""
+        if not self.fallback or self.fallback == self.primary:
+            return False
+        return _model_identity(self._model_name(self.primary)) == _model_identity(self._model_name(self.fallback))
+
+    def _hedge_target(self) -> str:
+        if self._hedge_compatible() and self._breaker(self.fallback).available():  # type: ignore[arg-type]
+            return self.fallback  # type: ignore[return-value]
+        return self.primary
+
+    def _hedge_delay_s(self, backend: str) -> float:
+        p = self._breaker(backend).latency_percentile(self.cfg.hedge_percentile)
+        ms = self.cfg.hedge_default_delay_ms if p is None else p
+        return max(self.cfg.hedge_min_delay_ms, ms) / 1000.0
+
+    async def _embed_one_on(self, backend: str, text: str) -> np.ndarray:
+        """One text on one backend, no pacing (interactive path), validated."""
+        if backend == "hashing":
+            return self._validate_one(_sanitize_vec((await self._embed_hashing([text], 1))[0]), backend)
+        if backend == "ollama":
+            if not self._ollama_url:
+                raise EmbeddingError("Ollama not configured (missing host).")
+            ok, v_or_exc = await self._call_guarded("ollama", self._ollama_one_once, text)
+        else:
+            if not (self._cf_url and self._cf_headers and self.cfg.cf_model):
+                raise EmbeddingError("Cloudflare not configured (account_id/api_token/model).")
+            client = await self._client_get()
+            ok, v_or_exc = await self._call_guarded("cloudflare", self._cf_one_once, text, client)
+        if not ok:
+            raise EmbeddingError(f"{backend} failed after retries: {v_or_exc}")
+        return self._validate_one(_sanitize_vec(v_or_exc), backend)
 
     # ---------- backend order ----------
     def _backend_order(self) -> List[str]:
@@ -321,6 +736,37 @@ class Embedder:
             return [self.primary, self.fallback]
         return [self.primary]
 
+    # ---------- health ----------
+    def _model_name(self, backend: str) -> str:
+        if backend == "hashing":
+            return f"hashing-ngram{self.cfg.hashing_ngram_min}-{self.cfg.hashing_ngram_max}"
+        return (self.cfg.cf_model if backend == "cloudflare" else self.cfg.ollama_model) or ""
+
+    def _breaker(self, backend: str) -> CircuitBreaker:
+        if backend == "hashing":
+            return get_breaker(f"hashing:{self.cfg.dim}")
+        if backend == "ollama":
+            return get_breaker(f"ollama:{self.cfg.ollama_host}:{self.cfg.ollama_model}")
+        return get_breaker(f"cloudflare:{self.cfg.cf_model}")
+
+    async def _call_guarded(self, backend: str, fn, *args) -> Tuple[bool, Any]:
+        """
+        _retry() behind the backend's breaker. Transport errors, timeouts, 408/429
+        and 5xx count against the backend; other failures (e.g. 400 for one bad
+        input) mean the backend is up and count as healthy.
+        """
+        br = self._breaker(backend)
+        if not br.allow():
+            return False, EmbeddingError(f"{backend} circuit open")
+        t0 = time.monotonic()
+        ok, v_or_exc = await self._retry(fn, *args)
+        latency_ms = (time.monotonic() - t0) * 1000.0
+        if ok or not _is_health_error(v_or_exc):
+            br.record_success(latency_ms)
+        else:
+            br.record_failure(v_or_exc, latency_ms)
+        return ok, v_or_exc
+
     # ---------- concurrency ----------
     def _embed_concurrency(self) -> int:
         """
@@ -333,23 +779,34 @@ class Embedder:
             return 4
 
     # ---------- OLLAMA (concurrent per-text) ----------
-    async def _embed_ollama(self, texts: List[str], concurrency: int) -> List[List[float]]:
+    async def _embed_ollama(
+        self,
+        texts: List[str],
+        concurrency: int,
+        on_item: Optional[Callable[[int], None]] = None,
+    ) -> List[List[float]]:
         sem = asyncio.Semaphore(concurrency)
         results: List[Optional[List[float]]] = [None] * len(texts)
+        errors: Dict[int, Exception] = {}
 
         async def run_one(idx: int, t: str):
             async with sem:
                 if EMBED_PACING_MS:
                     await asyncio.sleep(EMBED_PACING_MS / 1000.0)
                 log.info("ollama.req start idx=%s/%s", idx + 1, len(texts))
-                ok, v_or_exc = await self._retry(self._ollama_one_once, t)
+                ok, v_or_exc = await self._call_guarded("ollama", self._ollama_one_once, t)
                 if not ok:
                     log.error("ollama.req fail  idx=%s/%s err=%s", idx + 1, len(texts), v_or_exc)
-                    raise EmbeddingError(f"Ollama(single) failed after retries: {v_or_exc}")
+                    errors[idx] = EmbeddingError(f"Ollama(single) failed after retries: {v_or_exc}")
+                    return
                 results[idx] = v_or_exc
+                if on_item is not None:
+                    on_item(1)
                 log.info("ollama.req done  idx=%s/%s", idx + 1, len(texts))
 
         await asyncio.gather(*(run_one(i, t) for i, t in enumerate(texts)))
+        if errors:
+            raise PartialEmbeddingError(results, errors)
         return [v for v in results]  # type: ignore[return-value]
 
     async def _ollama_one_once(self, text: str) -> List[float]:
@@ -364,35 +821,61 @@ class Embedder:
         data = r.json()
 
         if "embedding" in data and isinstance(data["embedding"], list):
-            return data["embedding"]
+            return _json_vector(data["embedding"])
         if "embeddings" in data and isinstance(data["embeddings"], list) and len(data["embeddings"]) == 1:
             inner = data["embeddings"][0]
             if isinstance(inner, list):
-                return inner
+                return _json_vector(inner)
         raise EmbeddingError("Ollama(single): response missing 'embedding' or single 'embeddings' element.")
 
+    # ---------- HASHING (local, vectorized) ----------
+    async def _embed_hashing(
+        self,
+        texts: List[str],
+        concurrency: int,
+        on_item: Optional[Callable[[int], None]] = None,
+    ) -> np.ndarray:
+        """CPU-bound, so it runs off the event loop; no pacing, retries or breaker needed."""
+        mat = await asyncio.to_thread(
+            hashed_ngram_embed, texts, self.cfg.dim, self.cfg.hashing_ngram_min, self.cfg.hashing_ngram_max
+        )
+        if on_item is not None:
+            on_item(len(texts))
+        return mat
+
     # ---------- CLOUDFLARE (concurrent per-text) ----------
-    async def _embed_cloudflare(self, texts: List[str], concurrency: int) -> List[List[float]]:
+    async def _embed_cloudflare(
+        self,
+        texts: List[str],
+        concurrency: int,
+        on_item: Optional[Callable[[int], None]] = None,
+    ) -> List[List[float]]:
         if not (self._cf_url and self._cf_headers):
             raise EmbeddingError("Cloudflare config missing (account_id/api_token/model).")
 
         client = await self._client_get()
         sem = asyncio.Semaphore(concurrency)
         out: List[Optional[List[float]]] = [None] * len(texts)
+        errors: Dict[int, Exception] = {}
 
         async def run_one(idx: int, t: str):
             async with sem:
                 if EMBED_PACING_MS:
                     await asyncio.sleep(EMBED_PACING_MS / 1000.0)
                 log.info("cf.req     start idx=%s/%s", idx + 1, len(texts))
-                ok, vec_or_exc = await self._retry(self._cf_one_once, t, client)
+                ok, vec_or_exc = await self._call_guarded("cloudflare", self._cf_one_once, t, client)
                 if not ok:
                     log.error("cf.req     fail  idx=%s/%s err=%s", idx + 1, len(texts), vec_or_exc)
-                    raise EmbeddingError(f"Cloudflare(single) failed after retries: {vec_or_exc}")
+                    errors[idx] = EmbeddingError(f"Cloudflare(single) failed after retries: {vec_or_exc}")
+                    return
                 out[idx] = vec_or_exc
+                if on_item is not None:
+                    on_item(1)
                 log.info("cf.req     done  idx=%s/%s", idx + 1, len(texts))
 
         await asyncio.gather(*(run_one(i, t) for i, t in enumerate(texts)))
+        if errors:
+            raise PartialEmbeddingError(out, errors)
         return [v for v in out]  # type: ignore[return-value]
 
     async def _cf_one_once(self, text: str, client: httpx.AsyncClient) -> List[float]:
@@ -430,7 +913,7 @@ class Embedder:
             from json import dumps
             raise EmbeddingError(f"Cloudflare: unexpected embedding shape: {dumps(root)[:300]}")
 
-        return vec
+        return _json_vector(vec)
 
 
     # ---------- utils ----------
@@ -471,21 +954,18 @@ class Embedder:
         return False, last_exc
 
 
-    def _validate(self, vecs: List[List[float]], backend: str) -> None:
-        if not vecs:
-            return
-        d = len(vecs[0])
-        if d != self.cfg.dim:
-            log.error("embed.dim_mismatch observed=%s expected=%s backend=%s", d, self.cfg.dim, backend)
+    def _validate_one(self, vec: np.ndarray, backend: str) -> np.ndarray:
+        if len(vec) != self.cfg.dim:
             raise EmbeddingError(
-                f"Vector dim mismatch: backend={backend} dim={d}, expected={self.cfg.dim}. "
+                f"Vector dim mismatch: backend={backend} dim={len(vec)}, expected={self.cfg.dim}. "
                 "Adjust profile.embedding.dim or model."
             )
+        return vec
 
     @staticmethod
     def _build_cf(cfg: EmbeddingConfig) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
         if cfg.cf_account_id and cfg.cf_api_token and cfg.cf_model:
-            url = f"https://api.cloudflare.com/client/v4/accounts/{cfg.cf_account_id}/ai/run/{cfg.cf_model}"
+            url = f"{cfg.cf_base_url.rstrip('/')}/accounts/{cfg.cf_account_id}/ai/run/{cfg.cf_model}"
             headers = {"Authorization": f"Bearer {cfg.cf_api_token}"}
             return url, headers
         return None, None
@@ -0,0 +1,85 @@
+# src/learning_mcp/hashing_embeddings.py
+"""
+Offline, deterministic embeddings: feature-hashed character n-grams.
+
+Purpose:
+- A third embedding backend ("hashing") that needs no network, GPU or model
+  download, for benchmarks, CI and air-gapped runs. Throughput numbers then
+  measure our own pipeline (load/chunk/upsert/search), not a remote service.
+- Same text -> same vector in every process and on every machine (no Python
+  hash() randomization): n-grams of the UTF-8 bytes are hashed with a 64-bit
+  FNV-1a + murmur finalizer, all vectorized in NumPy.
+- Signed hashing into `dim` buckets, then L2-normalized, so cosine similarity
+  tracks character n-gram overlap. Good enough to exercise retrieval, not a
+  substitute for a semantic model.
+
+Usage:
+    embedding:
+      dim: 384
+      backend: { primary: hashing }
+      hashing: { ngram_min: 3, ngram_max: 5 }   # optional
+
+    mat = hashed_ngram_embed(["hello world"], dim=384)   # (1, 384) float32
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xFF51AFD7ED558CCD)
+_MIX_2 = np.uint64(0xC4CEB9FE1A85EC53)
+_S33 = np.uint64(33)
+_S63 = np.uint64(63)
+
+
+def _ngram_hashes(data: np.ndarray, n: int) -> np.ndarray:
+    """64-bit hash of every n-byte window of `data` (uint8), one vector op per byte offset."""
+    m = data.size - n + 1
+    h = np.full(m, _FNV_OFFSET ^ np.uint64(n), dtype=np.uint64)
+    for k in range(n):
+        h ^= data[k:k + m]
+        h *= _FNV_PRIME
+    # murmur3 fmix64: spread low-entropy FNV bits before bucketing
+    h ^= h >> _S33
+    h *= _MIX_1
+    h ^= h >> _S33
+    h *= _MIX_2
+    h ^= h >> _S33
+    return h
+
+
+def hashed_ngram_vector(text: str, dim: int, ngram_min: int = 3, ngram_max: int = 5) -> np.ndarray:
+    """One text -> L2-normalized float32 vector of length `dim`."""
+    # pad so word starts/ends form their own n-grams
+    data = np.frombuffer(f" {(text or '').lower()} ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    vec = np.zeros(dim, dtype=np.float32)
+    with np.errstate(over="ignore"):  # uint64 wraparound is the point
+        for n in range(ngram_min, ngram_max + 1):
+            if data.size < n:
+                break
+            h = _ngram_hashes(data, n)
+            buckets = (h % np.uint64(dim)).astype(np.intp)
+            signs = np.where((h >> _S63) == 1, -1.0, 1.0).astype(np.float32)
+            vec += np.bincount(buckets, weights=signs, minlength=dim).astype(np.float32)
+    norm = float(np.linalg.norm(vec))
+    if norm > 0.0:
+        vec /= norm
+    else:
+        vec[0] = 1.0  # empty input: any fixed unit vector (zero vectors break cosine)
+    return vec
+
+
+def hashed_ngram_embed(texts: List[str], dim: int, ngram_min: int = 3, ngram_max: int = 5) -> np.ndarray:
+    """Texts -> C-contiguous float32 matrix of shape (len(texts), dim)."""
+    if dim <= 0:
+        raise ValueError("dim must be positive")
+    if not 1 <= ngram_min <= ngram_max:
+        raise ValueError("need 1 <= ngram_min <= ngram_max")
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        out[i] = hashed_ngram_vector(text, dim, ngram_min, ngram_max)
+    return out
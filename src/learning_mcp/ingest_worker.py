@@ -0,0 +1,405 @@
+# src/learning_mcp/ingest_worker.py
+"""
+Ingest pipeline for one job: load → chunk → embed → upsert, with checkpoints.
+
+Purpose:
+- The body of a scheduled ingest job, independent of the FastAPI app so it can
+  run either in-process or inside an ingest worker process (see job_scheduler).
+- Tracks progress through an AsyncJobStore; in a worker process that store
+  relays its events back to the server's JobEventBus.
+
+Checkpoints (jobs.checkpoint, JSON):
+- After extraction and after every upserted batch of INGEST_CHECKPOINT_CHUNKS
+  chunks (default 256) the job records:
+      {"chunk_size": 1200, "chunk_overlap": 200, "chunk_unit": "chars",
+       "files": [{"path": "...", "chunks": 412, "pages": 57}, ...],
+       "upserted": 768,
+       "last": {"file": "...", "page": 31, "chunk_idx": 767}}
+- A resumed job (same job_id, requeued) reuses the recorded chunking params,
+  skips files whose chunks were all upserted (no re-extraction), re-extracts
+  only the partially done file and embeds from chunk `upserted` on. Point ids
+  use the global chunk index, so resumed points match a straight run exactly.
+- Streamed files (ChunkStream, large JSON/JSONL) are counted while they are
+  embedded: their "chunks" is null until the file has been read to the end.
+
+Dead letters (jobs.dead_letters, JSON list):
+- Chunks that fail on every embedding backend are skipped (not upserted) and
+  recorded as {"chunk_idx", "doc_path", "page", "error", "backends", "text"}.
+  Past INGEST_MAX_DEAD_LETTERS (default 50) the job fails instead (resumable).
+
+Usage:
+    await run_ingest(job_id, prof, truncate=False)              # server store
+    await run_ingest(job_id, prof, truncate=False, store=store)  # explicit store
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .chunker import chunking_params
+from .document_loaders import ChunkStream
+from .embeddings import EmbeddingConfig, Embedder
+from .job_store import AsyncJobStore, get_job_store
+from .jobs_db import JobPhase, JobStatus, JobsDB
+from .load_stage import BatchReader, load_documents
+from .progress import IngestProgress
+from .vdb import VDB
+
+log = logging.getLogger("learning_mcp.ingest_worker")
+
+CHECKPOINT_CHUNKS = int(os.getenv("INGEST_CHECKPOINT_CHUNKS", "256"))
+# A job quarantines at most this many chunks before failing (more means an outage, not poison)
+MAX_DEAD_LETTERS = int(os.getenv("INGEST_MAX_DEAD_LETTERS", "50"))
+
+
+async def run_ingest(
+    job_id: str,
+    prof: dict,
+    truncate: bool,
+    store: Optional[AsyncJobStore] = None,
+) -> None:
+    """
+    Load, chunk, embed and upsert a profile's documents for job_id.
+    Never raises except CancelledError; failures are recorded on the job.
+    """
+    db = store or get_job_store()
+    profile_name = prof.get("name")
+    progress: Optional[IngestProgress] = None
+    embedder: Optional[Embedder] = None
+
+    async def _finish(status: JobStatus, error: Optional[str] = None) -> None:
+        # Stop the phase timer first: no progress event may follow the terminal status
+        if progress is not None:
+            progress.finish()
+        await db.finish_job(job_id, status=status, error=error)
+
+    try:
+        job = await db.get_job(job_id) or {}
+        cp = JobsDB.checkpoint_of(job)
+        progress = IngestProgress(
+            files_total=job.get("files_total") or 0,
+            pages_total=job.get("pages_total") or 0,
+            sink=lambda fields: db.update_progress(job_id, **fields),
+        )
+        phase: List[Optional[JobPhase]] = [None]
+
+        async def _enter(p: JobPhase) -> None:
+            if phase[0] is p:
+                return
+            phase[0] = p
+            await db.set_phase(job_id, p)
+            progress.enter_phase(p)
+
+        await db.mark_running(job_id)
+
+        # Setup
+        ecfg = EmbeddingConfig.from_profile(prof)
+        vcfg = prof.get("vectordb", {}) or {}
+        collection = vcfg.get("collection", profile_name)
+        # A resumed job keeps its original chunking so chunk indices (and point ids) line up
+        if cp:
+            chunk_size, chunk_overlap = int(cp["chunk_size"]), int(cp["chunk_overlap"])
+            chunk_unit = str(cp.get("chunk_unit") or "chars")
+        else:
+            chunk_size, chunk_overlap, chunk_unit = chunking_params(prof.get("chunking"))
+        upserted = int(cp.get("upserted") or 0) if cp else 0
+        done_files = _completed_files(cp)
+
+        embedder = Embedder(ecfg)
+        vdb = VDB(
+            url=vcfg.get("url"),
+            collection=collection,
+            dim=ecfg.dim,
+            distance=vcfg.get("distance", "cosine")
+        )
+
+        # Phase: LOAD
+        await _enter(JobPhase.EXTRACT)
+        log.info(f"Job {job_id}: Loading documents for profile '{profile_name}'")
+
+        # Optionally truncate (never on resume: that would drop the upserted work)
+        if truncate and cp is None:
+            log.info(f"Job {job_id}: Truncating collection '{collection}'")
+            vdb.truncate()
+        else:
+            vdb.ensure_collection()
+
+        if cp:
+            log.info(
+                f"Job {job_id}: Resuming at chunk {upserted} "
+                f"({len(done_files)} file(s) already upserted, "
+                f"chunk_size={chunk_size} {chunk_unit}, overlap={chunk_overlap})"
+            )
+            progress.restore(
+                files_done=len(done_files),
+                pages_done=sum(int(f.get("pages") or 0) for f in done_files.values()),
+            )
+
+        # Load chunks (files fully upserted by a previous run are not re-extracted).
+        # Sources are lists or ChunkStreams (large JSON/JSONL): both are read
+        # batch by batch below, so streamed files are never held whole.
+        files: List[Dict[str, Any]] = []
+        sources: List[_Counted] = []
+        skipped_chunks = 0
+        # Loaders run in worker threads/processes (load_stage): this loop stays free
+        async for doc in load_documents(
+            prof,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            chunk_unit=chunk_unit,
+            progress=progress,
+            skip=lambda d: _doc_path(d) in done_files,
+        ):
+            path = _doc_path(doc.spec)
+            if doc.chunks is None:
+                files.append(done_files[path])
+                skipped_chunks += int(done_files[path]["chunks"])
+                continue
+            counted = None if isinstance(doc.chunks, ChunkStream) else len(doc.chunks)
+            files.append({"path": path, "chunks": counted, "pages": doc.pages})
+            sources.append(_Counted(files[-1], doc.chunks))
+
+        if cp:
+            await _count_partial_stream(cp, sources)
+            _check_resumable(cp, files)
+        streaming = any(f["chunks"] is None for f in files)
+        chunks_total = skipped_chunks + sum(s.total for s in sources)
+
+        if not chunks_total and not streaming:
+            await _finish(JobStatus.COMPLETED, error="No chunks loaded")
+            log.warning(f"Job {job_id}: No chunks to ingest")
+            return
+
+        checkpoint: Dict[str, Any] = {
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "chunk_unit": chunk_unit,
+            "files": files,
+            "upserted": upserted,
+            "last": (cp or {}).get("last"),
+        }
+        await db.save_checkpoint(job_id, checkpoint)
+        progress.set_chunks_total(chunks_total)
+        if upserted:
+            progress.restore(chunks_done=upserted)
+
+        dead_total = len(JobsDB.dead_letters_of(job))
+        # Pulled in a thread: iterating a ChunkStream is what parses its file
+        reader = BatchReader(islice(chain.from_iterable(sources), upserted - skipped_chunks, None))
+        if streaming:
+            log.info(f"Job {job_id}: Embedding from chunk {upserted} of {len(files)} files (streamed files counted as read)...")
+        else:
+            log.info(f"Job {job_id}: Embedding {chunks_total - upserted} of {chunks_total} chunks from {len(files)} files...")
+
+        while True:
+            batch = await reader.next(CHECKPOINT_CHUNKS)
+            if not batch:
+                break
+            if streaming:
+                chunks_total = skipped_chunks + sum(s.total for s in sources)
+                progress.set_chunks_total(chunks_total)
+
+            # Phase: EMBED
+            await _enter(JobPhase.EMBED)
+            dead: List[Dict[str, Any]] = []
+            try:
+                vectors = await embedder.embed_array(
+                    [c["text"] for c in batch], on_progress=progress.chunks_embedded_add, dead_letters=dead
+                )
+                if dead and dead_total + len(dead) > MAX_DEAD_LETTERS:
+                    raise RuntimeError(
+                        f"{dead_total + len(dead)} chunks failed on every backend "
+                        f"(limit INGEST_MAX_DEAD_LETTERS={MAX_DEAD_LETTERS}); last error: {dead[-1]['error']}"
+                    )
+            except Exception as e:
+                log.error(f"Job {job_id}: Embedding failed at chunk {upserted}: {e}")
+                if streaming:
+                    await db.save_checkpoint(job_id, checkpoint)  # keep the counts of files read so far
+                await _finish(JobStatus.FAILED, error=f"{e} (resumable from chunk {upserted}/{chunks_total})")
+                return
+
+            if dead:
+                dead_total = await db.add_dead_letters(job_id, _dead_letter_entries(batch, dead, first_idx=upserted))
+                log.warning(f"Job {job_id}: Quarantined {len(dead)} chunk(s) (total {dead_total})")
+
+            # Phase: UPSERT
+            await _enter(JobPhase.UPSERT)
+            ids, payloads = _points(batch, first_idx=upserted, profile_name=profile_name)
+            if dead:
+                skip = {d["index"] for d in dead}
+                keep = [k for k in range(len(batch)) if k not in skip]
+                vectors = vectors[keep]
+                ids = [ids[k] for k in keep]
+                payloads = [payloads[k] for k in keep]
+            vdb.upsert(vectors, payloads, ids, on_batch=progress.chunks_upserted_add)
+
+            upserted += len(batch)
+            last = batch[-1]["metadata"]
+            checkpoint["upserted"] = upserted
+            checkpoint["last"] = {
+                "file": last.get("doc_path"),
+                "page": last.get("page_end") or last.get("page_start"),
+                "chunk_idx": upserted - 1,
+            }
+            await db.save_checkpoint(job_id, checkpoint)
+
+        if streaming:
+            # every streamed file has now been read to the end: record its count
+            chunks_total = skipped_chunks + sum(s.total for s in sources)
+            if not chunks_total:
+                await _finish(JobStatus.COMPLETED, error="No chunks loaded")
+                log.warning(f"Job {job_id}: No chunks to ingest")
+                return
+            progress.set_chunks_total(chunks_total)
+            await db.save_checkpoint(job_id, checkpoint)
+
+        # Complete
+        await _finish(JobStatus.COMPLETED)
+        log.info(f"Job {job_id}: Completed successfully ({chunks_total} chunks)")
+
+    except asyncio.CancelledError:
+        log.warning(f"Job {job_id}: Cancelled by user")
+        await _finish(JobStatus.CANCELED, error="Cancelled by user")
+        raise
+    except Exception as e:
+        log.error(f"Job {job_id}: Failed with error: {e}")
+        await _finish(JobStatus.FAILED, error=str(e))
+    finally:
+        if embedder is not None:
+            await embedder.close()
+
+
+def _doc_path(doc: Dict[str, Any]) -> str:
+    return (doc.get("path") or "").strip()
+
+
+class _Counted:
+    """One file's chunks, counted as they are iterated; sets entry["chunks"] at the end."""
+
+    def __init__(self, entry: Dict[str, Any], chunks: Iterable[Dict[str, Any]]):
+        self.entry = entry
+        self.chunks = chunks
+        self.seen = 0
+
+    @property
+    def total(self) -> int:
+        """The file's chunk count, or the chunks read so far while it is still streaming."""
+        return self.seen if self.entry["chunks"] is None else int(self.entry["chunks"])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.seen = 0
+        for chunk in self.chunks:
+            self.seen += 1
+            yield chunk
+        self.entry["chunks"] = self.seen
+
+
+async def _count_partial_stream(cp: Dict[str, Any], sources: List[_Counted]) -> None:
+    """
+    _check_resumable needs the chunk count of the partially upserted file up
+    front; count it (one extra pass, in a thread) when that file is streamed.
+    """
+    upserted = int(cp.get("upserted") or 0)
+    offset = 0
+    for f in cp.get("files") or []:
+        if f.get("chunks") is None:
+            return  # never counted: nothing to compare against
+        end = offset + int(f["chunks"])
+        if offset < upserted < end:
+            for s in sources:
+                if s.entry["path"] == f["path"] and s.entry["chunks"] is None:
+                    s.entry["chunks"] = await asyncio.to_thread(len, s.chunks)
+            return
+        offset = end
+
+
+def _completed_files(cp: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Leading files of a checkpoint whose chunks were all upserted (path -> entry)."""
+    if not cp:
+        return {}
+    upserted = int(cp.get("upserted") or 0)
+    done: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for f in cp.get("files") or []:
+        if f.get("chunks") is None:
+            break  # a streamed file that was not read to the end
+        offset += int(f["chunks"])
+        if offset > upserted:
+            break
+        done[f["path"]] = f
+    return done
+
+
+def _check_resumable(cp: Dict[str, Any], files: List[Dict[str, Any]]) -> None:
+    """Refuse to resume if documents changed in a way that shifts upserted chunks."""
+    old = cp.get("files") or []
+    if [f["path"] for f in old] != [f["path"] for f in files]:
+        raise ValueError("Profile documents changed since the checkpoint; start a new ingest job")
+    upserted = int(cp.get("upserted") or 0)
+    offset = 0
+    for before, now in zip(old, files):
+        if before.get("chunks") is None:
+            break  # streamed and never read to the end: upserting stopped inside it
+        end = offset + int(before["chunks"])
+        if offset < upserted < end and int(now["chunks"]) != int(before["chunks"]):
+            raise ValueError(
+                f"'{now['path']}' now yields {now['chunks']} chunks (was {before['chunks']}); "
+                "start a new ingest job"
+            )
+        offset = end
+
+
+def _dead_letter_entries(
+    batch: List[Dict[str, Any]],
+    dead: List[Dict[str, Any]],
+    *,
+    first_idx: int,
+) -> List[Dict[str, Any]]:
+    out = []
+    for d in dead:
+        chunk = batch[d["index"]]
+        meta = chunk.get("metadata") or {}
+        out.append({
+            "chunk_idx": first_idx + d["index"],
+            "doc_path": meta.get("doc_path"),
+            "page": meta.get("page_start"),
+            "error": d.get("error"),
+            "backends": d.get("backends"),
+            "text": (chunk.get("text") or "")[:200],
+        })
+    return out
+
+
+def _points(
+    batch: List[Dict[str, Any]],
+    *,
+    first_idx: int,
+    profile_name: Optional[str],
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Deterministic point ids (doc_id|doc_path|global chunk index) and payloads."""
+    ids = []
+    payloads = []
+    for i, chunk in enumerate(batch, start=first_idx):
+        point_id = str(uuid.uuid5(
+            uuid.NAMESPACE_DNS,
+            f"{chunk['metadata'].get('doc_id')}|{chunk['metadata'].get('doc_path')}|{i}"
+        ))
+        ids.append(point_id)
+        payloads.append({
+            "text": chunk["text"],
+            "doc_id": chunk["metadata"].get("doc_id"),
+            "doc_path": chunk["metadata"].get("doc_path"),
+            "chunk_idx": i,
+            "section": chunk["metadata"].get("section"),
+            "title": chunk["metadata"].get("title"),
+            "sections": chunk["metadata"].get("sections") or [],
+            "profile": profile_name,
+            "ingested_at": datetime.utcnow().isoformat()
+        })
+    return ids, payloads
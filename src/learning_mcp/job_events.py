@@ -0,0 +1,157 @@
+# src/learning_mcp/job_events.py
+"""
+In-memory pub/sub for live job events (feeds GET /jobs/{job_id}/events).
+
+Purpose:
+- The job store publishes every lifecycle write (status / phase) and every
+  progress update here; SSE handlers subscribe per job_id.
+- No DB involvement: a stream opens with one DB snapshot, then only reads
+  from its queue, so dashboards add no polling load.
+
+Event shape (one dict per event):
+    {"event": "status" | "phase" | "progress", "job_id": "...", "data": {...}}
+
+Thread safety:
+- publish() may be called from any thread (e.g. loader callbacks running in an
+  executor); delivery hops onto each subscriber's event loop.
+- Each subscriber queue is bounded; when full, the oldest event is dropped so a
+  slow client can never stall the publisher (progress is latest-wins anyway).
+
+Worker processes:
+- Ingest workers run in child processes (job_scheduler) with their own store;
+  they publish into a QueuePublisher (a multiprocessing queue) and an
+  EventRelay thread in the server re-publishes onto this process's bus.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+EVENT_QUEUE_SIZE = int(os.getenv("JOB_EVENTS_QUEUE_SIZE", "256"))
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "canceled"})
+
+Event = Dict[str, Any]
+
+
+class JobEventBus:
+    """Fan-out of job events to per-job asyncio.Queue subscribers."""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = max(1, queue_size)
+        self._subs: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Register a queue on the running loop for job_id's events."""
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subs.setdefault(job_id, []).append((loop, q))
+        return q
+
+    def unsubscribe(self, job_id: str, q: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subs.get(job_id) or []
+            subs[:] = [(lp, sq) for lp, sq in subs if sq is not q]
+            if not subs:
+                self._subs.pop(job_id, None)
+
+    def subscriber_count(self, job_id: Optional[str] = None) -> int:
+        with self._lock:
+            if job_id is not None:
+                return len(self._subs.get(job_id) or [])
+            return sum(len(v) for v in self._subs.values())
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Deliver an event to every subscriber of job_id (no-op if none)."""
+        with self._lock:
+            subs = list(self._subs.get(job_id) or [])
+        if not subs:
+            return
+        evt: Event = {"event": event, "job_id": job_id, "data": dict(data)}
+        for loop, q in subs:
+            try:
+                loop.call_soon_threadsafe(_put_latest, q, evt)
+            except RuntimeError:
+                # subscriber's loop is closed; it will be unsubscribed by its handler
+                continue
+
+
+class QueuePublisher:
+    """Bus stand-in for worker processes: forwards events to a multiprocessing queue."""
+
+    def __init__(self, mp_queue: Any):
+        self._q = mp_queue
+
+    def publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        try:
+            self._q.put_nowait((job_id, event, dict(data)))
+        except Exception:
+            # advisory only; progress is also persisted in the jobs table
+            pass
+
+
+class EventRelay:
+    """Thread that drains a multiprocessing queue of events into a JobEventBus."""
+
+    def __init__(self, mp_queue: Any, bus: "JobEventBus"):
+        self._q = mp_queue
+        self._bus = bus
+        self._thread = threading.Thread(target=self._run, name="job-events-relay", daemon=True)
+
+    def start(self) -> "EventRelay":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            job_id, event, data = item
+            self._bus.publish(job_id, event, data)
+
+
+def _put_latest(q: asyncio.Queue, evt: Event) -> None:
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(evt)
+
+
+def is_terminal(evt: Event) -> bool:
+    return evt.get("event") == "status" and evt.get("data", {}).get("status") in TERMINAL_STATUSES
+
+
+def coalesce(events: List[Event]) -> List[Event]:
+    """
+    Merge consecutive progress events (latest value per field wins) while keeping
+    phase/status events in order. Used by SSE handlers to drain bursts.
+    """
+    out: List[Event] = []
+    for evt in events:
+        if out and evt.get("event") == "progress" and out[-1].get("event") == "progress":
+            merged = dict(out[-1])
+            merged["data"] = {**out[-1].get("data", {}), **evt.get("data", {})}
+            out[-1] = merged
+        else:
+            out.append(evt)
+    return out
+
+
+_BUS = JobEventBus()
+
+
+def get_event_bus() -> JobEventBus:
+    """Process-wide bus shared by the job store and the SSE endpoint."""
+    return _BUS
@@ -0,0 +1,339 @@
+# src/learning_mcp/job_scheduler.py
+"""
+Bounded ingest scheduler: persistent queue in JobsDB + a pool of worker slots.
+
+Purpose:
+- POST /ingest/jobs only enqueues (status QUEUED). The scheduler claims queued
+  jobs from SQLite (priority DESC, then FIFO) while a worker slot is free, with at
+  most one RUNNING job per profile.
+- By default every job runs in its own spawned worker process, so PDF parsing
+  and chunking never compete with /search for the server's event loop or GIL.
+  Workers write progress to the same SQLite file (WAL) and relay live events to
+  the server's JobEventBus over a multiprocessing queue.
+- Workers are not daemonic (their PDF load pool needs child processes) and each
+  leads its own process group: cancel/shutdown signal the whole group, so the
+  load pool's children never outlive their job.
+- Jobs survive restarts as rows: QUEUED jobs are picked up again on startup.
+  RUNNING rows left behind by a dead server (and jobs interrupted by shutdown)
+  are marked FAILED, or, with INGEST_RESUME_ORPHANS=1, requeued so they resume
+  from their checkpoint (see ingest_worker).
+- One scheduler (one job server) per jobs DB: at startup it treats EVERY RUNNING
+  row as orphaned. A second server sharing JOBS_DB_PATH would fail or requeue
+  the first one's live jobs; run a single job server per DB file.
+
+Config (env):
+    INGEST_WORKERS=1                # concurrent ingest jobs
+    INGEST_WORKER_MODE=process      # process | inline (same event loop; dev/tests)
+    INGEST_SCHEDULER_POLL_S=2       # queue re-check interval (enqueue also wakes it)
+    INGEST_CANCEL_GRACE_S=5         # SIGTERM → SIGKILL grace for worker processes
+    INGEST_RESUME_ORPHANS=0         # 1 = requeue interrupted jobs instead of failing them
+
+Usage (job_server):
+    scheduler = get_scheduler()
+    await scheduler.start()            # on startup
+    scheduler.wake()                   # after enqueuing a job
+    await scheduler.cancel(job_id)
+    await scheduler.stop()             # on shutdown
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+from .ingest_worker import run_ingest
+from .job_events import EventRelay, QueuePublisher, get_event_bus
+from .job_store import AsyncJobStore, get_job_store
+from .jobs_db import JobStatus
+
+log = logging.getLogger("learning_mcp.job_scheduler")
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_WORKER_MODE = os.getenv("INGEST_WORKER_MODE", "process").strip().lower()
+POLL_S = float(os.getenv("INGEST_SCHEDULER_POLL_S", "2"))
+CANCEL_GRACE_S = float(os.getenv("INGEST_CANCEL_GRACE_S", "5"))
+RESUME_ORPHANS = os.getenv("INGEST_RESUME_ORPHANS", "0").strip().lower() in ("1", "true", "yes")
+
+MODES = ("process", "inline")
+
+# async (job_id, prof, truncate, store) -> None; must be module-level in process mode
+Runner = Callable[[str, dict, bool, AsyncJobStore], Awaitable[None]]
+
+
+def _load_profile(name: str) -> Optional[dict]:
+    profiles = settings.load_profiles()
+    return next((p for p in profiles.get("profiles", []) if p.get("name") == name), None)
+
+
+@dataclass
+class _Slot:
+    job_id: str
+    profile: str
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    task: Optional[asyncio.Task] = None
+    watcher: Optional[asyncio.Task] = None
+    cancel_reason: Optional[str] = None
+    cancel_status: JobStatus = JobStatus.CANCELED
+    requeue: bool = False
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class IngestScheduler:
+    """Claims queued ingest jobs and runs up to max_workers of them at once."""
+
+    def __init__(
+        self,
+        store: Optional[AsyncJobStore] = None,
+        *,
+        max_workers: int = INGEST_WORKERS,
+        mode: str = INGEST_WORKER_MODE,
+        runner: Runner = run_ingest,
+        profile_loader: Callable[[str], Optional[dict]] = _load_profile,
+        poll_s: float = POLL_S,
+        resume_orphans: bool = RESUME_ORPHANS,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"INGEST_WORKER_MODE must be one of {MODES}, got '{mode}'")
+        self.store = store or get_job_store()
+        self.max_workers = max(1, int(max_workers))
+        self.mode = mode
+        self.runner = runner
+        self.profile_loader = profile_loader
+        self.poll_s = max(0.05, poll_s)
+        self.resume_orphans = resume_orphans
+
+        self._slots: Dict[str, _Slot] = {}
+        self._wake = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # spawn (not fork): the server has live threads (DB writer, relay)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events_q: Any = None
+        self._relay: Optional[EventRelay] = None
+
+    # ---------- Lifecycle ----------
+    async def start(self) -> None:
+        if self._loop_task is not None:
+            return
+        self._stopping = False
+        orphans = await self._recover_orphans()
+        if orphans:
+            action = "requeued" if self.resume_orphans else "marked failed"
+            log.warning(f"Scheduler: {action} {len(orphans)} orphaned running job(s): {orphans}")
+        if self.mode == "process":
+            self._events_q = self._ctx.Queue()
+            self._relay = EventRelay(self._events_q, self.store.events or get_event_bus()).start()
+        self._loop_task = asyncio.create_task(self._dispatch_loop(), name="ingest-scheduler")
+        log.info(f"Scheduler: started (workers={self.max_workers}, mode={self.mode})")
+
+    async def stop(self) -> None:
+        """Stop claiming; interrupt running jobs (requeued or FAILED, see resume_orphans)."""
+        self._stopping = True
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        for job_id in list(self._slots):
+            await self._interrupt(
+                job_id, JobStatus.FAILED, "Interrupted by server shutdown", requeue=self.resume_orphans
+            )
+        if self._relay is not None:
+            await asyncio.to_thread(self._relay.stop)
+            self._relay = None
+            self._events_q = None
+
+    def wake(self) -> None:
+        """Re-check the queue now (call after enqueuing)."""
+        self._wake.set()
+
+    # ---------- Introspection ----------
+    def running_ids(self) -> List[str]:
+        return list(self._slots)
+
+    def running_profiles(self) -> List[str]:
+        return [s.profile for s in self._slots.values()]
+
+    # ---------- Cancellation ----------
+    async def cancel(self, job_id: str, reason: str = "Cancelled by user") -> bool:
+        """Cancel a running or queued job; returns False if it was neither."""
+        if job_id in self._slots:
+            await self._interrupt(job_id, JobStatus.CANCELED, reason)
+            return True
+        job = await self.store.get_job(job_id)
+        if job and job.get("status") == JobStatus.QUEUED.value:
+            await self.store.finish_job(job_id, status=JobStatus.CANCELED, error=reason)
+            return True
+        return False
+
+    async def cancel_profile(self, profile: str, reason: str = "Superseded by a new ingest job") -> int:
+        """Cancel every running and queued job of a profile."""
+        n = 0
+        for job_id in [s.job_id for s in self._slots.values() if s.profile == profile]:
+            await self._interrupt(job_id, JobStatus.CANCELED, reason)
+            n += 1
+        return n + await self.store.cancel_queued_or_running_for_profile(profile)
+
+    # ---------- Dispatch ----------
+    async def _dispatch_loop(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                await self._fill_slots()
+            except Exception as e:
+                log.error(f"Scheduler: dispatch failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fill_slots(self) -> None:
+        while not self._stopping and len(self._slots) < self.max_workers:
+            job = await self.store.claim_next_job()
+            if job is None:
+                return
+            await self._launch(job)
+
+    async def _launch(self, job: Dict[str, Any]) -> None:
+        job_id, profile = job["job_id"], job["profile"]
+        prof = self.profile_loader(profile)
+        if not prof:
+            await self.store.finish_job(job_id, status=JobStatus.FAILED, error=f"Profile '{profile}' not found")
+            return
+
+        truncate = bool(job.get("truncate"))
+        slot = _Slot(job_id=job_id, profile=profile)
+        if self.mode == "process":
+            proc = self._ctx.Process(
+                target=_process_main,
+                args=(job_id, prof, truncate, self.store.db.db_path, self._events_q, self.runner),
+                name=f"ingest:{job_id}",
+            )
+            proc.start()
+            slot.process = proc
+            await self.store.set_worker_pid(job_id, proc.pid)
+        else:
+            slot.task = asyncio.create_task(
+                self.runner(job_id, prof, truncate, self.store), name=f"ingest:{job_id}"
+            )
+            await self.store.set_worker_pid(job_id, os.getpid())
+
+        self._slots[job_id] = slot
+        slot.watcher = asyncio.create_task(self._watch(slot), name=f"ingest-watch:{job_id}")
+        log.info(f"Job {job_id}: Started (profile={profile}, mode={self.mode}, running={len(self._slots)})")
+
+    async def _watch(self, slot: _Slot) -> None:
+        try:
+            if slot.process is not None:
+                await asyncio.to_thread(slot.process.join)
+            elif slot.task is not None:
+                await asyncio.gather(slot.task, return_exceptions=True)
+            await self._settle(slot)
+        except Exception as e:
+            log.error(f"Job {slot.job_id}: Watcher failed: {e}")
+        finally:
+            self._slots.pop(slot.job_id, None)
+            slot.done.set()
+            self._wake.set()
+
+    async def _settle(self, slot: _Slot) -> None:
+        """Record the outcome of jobs that could not record it themselves."""
+        if slot.requeue:
+            await self.store.requeue_job(slot.job_id)
+            return
+        if slot.cancel_reason is not None:
+            await self.store.finish_job(slot.job_id, status=slot.cancel_status, error=slot.cancel_reason)
+            return
+        if slot.process is None or slot.process.exitcode == 0:
+            return
+        job = await self.store.get_job(slot.job_id)
+        if job and job.get("status") in (JobStatus.RUNNING.value, JobStatus.QUEUED.value):
+            await self.store.finish_job(
+                slot.job_id,
+                status=JobStatus.FAILED,
+                error=f"Ingest worker exited with code {slot.process.exitcode}",
+            )
+
+    async def _interrupt(self, job_id: str, status: JobStatus, reason: str, requeue: bool = False) -> None:
+        slot = self._slots.get(job_id)
+        if slot is None:
+            return
+        slot.cancel_status, slot.cancel_reason, slot.requeue = status, reason, requeue
+        if slot.process is not None:
+            await asyncio.to_thread(_terminate, slot.process, CANCEL_GRACE_S)
+        elif slot.task is not None:
+            slot.task.cancel()
+        await slot.done.wait()
+
+    async def _recover_orphans(self) -> List[str]:
+        """
+        At startup no job runs here yet, so every RUNNING row belongs to a dead
+        server (single scheduler per DB). All of them move in one transaction.
+        """
+        return await self.store.recover_running(
+            requeue=self.resume_orphans,
+            error="Interrupted by server restart (resume with POST /ingest/jobs/{id}/resume)",
+        )
+
+
+def _terminate(proc: multiprocessing.process.BaseProcess, grace_s: float) -> None:
+    """SIGTERM the worker and its children, SIGKILL after grace_s; leftover children are killed too."""
+    if proc.is_alive():
+        _signal_group(proc, signal.SIGTERM)
+        proc.join(grace_s)
+        if proc.is_alive():
+            _signal_group(proc, signal.SIGKILL)
+            proc.join()
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)  # load pool processes that outlived the worker
+        except OSError:
+            pass
+
+
+def _signal_group(proc: multiprocessing.process.BaseProcess, sig: int) -> None:
+    """Signal the worker's process group; just the worker if it has none (yet, or no killpg)."""
+    try:
+        os.killpg(proc.pid, sig)
+    except (AttributeError, OSError):
+        if sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+
+
+def _process_main(job_id: str, prof: dict, truncate: bool, db_path: str, events_q: Any, runner: Runner) -> None:
+    """Entry point of an ingest worker process."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # lead a process group that includes the load pool (see _terminate)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(name)s] %(levelname)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    asyncio.run(_process_run(job_id, prof, truncate, db_path, events_q, runner))
+
+
+async def _process_run(job_id: str, prof: dict, truncate: bool, db_path: str, events_q: Any, runner: Runner) -> None:
+    store = AsyncJobStore(db_path, events=QueuePublisher(events_q) if events_q is not None else None)
+    try:
+        await runner(job_id, prof, truncate, store)
+    finally:
+        await store.close()
+
+
+# ---------- Process-wide scheduler ----------
+_SCHEDULER: Optional[IngestScheduler] = None
+
+
+def get_scheduler() -> IngestScheduler:
+    """The job server's scheduler (created on first use, started by the app)."""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = IngestScheduler()
+    return _SCHEDULER
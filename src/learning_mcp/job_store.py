@@ -0,0 +1,242 @@
+# src/learning_mcp/job_store.py
+"""
+Async job-store facade over JobsDB.
+
+Purpose:
+- Keep SQLite I/O off the event loop. Every write runs on ONE dedicated writer
+  thread (with its own pooled WAL connection); reads run in the default executor
+  on per-thread reader connections, which WAL never blocks.
+- Coalesce progress. update_progress() only records the latest value per field
+  per job; the writer flushes everything pending every JOBS_PROGRESS_FLUSH_MS
+  (default 250 ms) in a single transaction, so per-chunk progress costs one
+  fsync per interval instead of one per chunk.
+- Lifecycle transitions (start / running / phase / finish / cancel) are persisted
+  immediately, after first flushing pending progress so ordering is preserved.
+- Every write is also published to the in-memory JobEventBus (job_events) so
+  SSE streams see progress without touching SQLite.
+
+Usage (in worker):
+    store = get_job_store()
+    await store.mark_running(job_id)
+    store.update_progress(job_id, chunks_done=n)    # non-blocking, coalesced
+    await store.finish_job(job_id, JobStatus.COMPLETED)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .jobs_db import DB_PATH, JobsDB, JobPhase, JobStatus, close_thread_connections
+from .job_events import JobEventBus, get_event_bus
+
+log = logging.getLogger("learning_mcp.job_store")
+
+PROGRESS_FLUSH_MS = int(os.getenv("JOBS_PROGRESS_FLUSH_MS", "250"))
+
+_STOP = object()
+
+
+class AsyncJobStore:
+    """Async, write-coalescing front for a JobsDB file."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        flush_interval_ms: int = PROGRESS_FLUSH_MS,
+        events: Optional[JobEventBus] = None,
+    ):
+        self.db = JobsDB(db_path)
+        self.events = events
+        self.flush_interval = max(0.0, flush_interval_ms / 1000.0)
+        self._ops: "queue.Queue[Any]" = queue.Queue()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name="jobs-db-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- Lifecycle writes (immediate) ----------
+    async def start_job(self, **fields: Any) -> str:
+        return await self._submit(self.db.start_job, **fields)
+
+    async def mark_running(self, job_id: str) -> None:
+        await self._submit(self.db.mark_running, job_id)
+        self._publish(job_id, "status", {"status": JobStatus.RUNNING.value})
+
+    async def set_phase(self, job_id: str, phase: JobPhase) -> None:
+        await self._submit(self.db.set_phase, job_id, phase)
+        self._publish(job_id, "phase", {"phase": phase.value})
+
+    async def finish_job(self, job_id: str, status: JobStatus, error: Optional[str] = None) -> None:
+        await self._submit(self.db.finish_job, job_id, status, error)
+        self._publish(
+            job_id, "status",
+            {"status": status.value, "phase": JobPhase.FINISHED.value, "error": error},
+        )
+
+    async def cancel_queued_or_running_for_profile(self, profile: str) -> int:
+        return await self._submit(self.db.cancel_queued_or_running_for_profile, profile)
+
+    async def claim_next_job(self, worker_pid: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        job = await self._submit(self.db.claim_next_job, worker_pid)
+        if job:
+            self._publish(job["job_id"], "status", {"status": JobStatus.RUNNING.value})
+        return job
+
+    async def requeue_job(self, job_id: str) -> None:
+        await self._submit(self.db.requeue_job, job_id)
+        self._publish(job_id, "status", {"status": JobStatus.QUEUED.value, "phase": JobPhase.PREFLIGHT.value})
+
+    async def recover_running(self, requeue: bool, error: Optional[str] = None) -> List[str]:
+        ids = await self._submit(self.db.recover_running, requeue, error)
+        if requeue:
+            data = {"status": JobStatus.QUEUED.value, "phase": JobPhase.PREFLIGHT.value}
+        else:
+            data = {"status": JobStatus.FAILED.value, "phase": JobPhase.FINISHED.value, "error": error}
+        for job_id in ids:
+            self._publish(job_id, "status", data)
+        return ids
+
+    async def save_checkpoint(self, job_id: str, checkpoint: Dict[str, Any]) -> None:
+        """Persist a checkpoint now (not coalesced): it must survive a crash."""
+        await self._submit(self.db.save_checkpoint, job_id, checkpoint)
+
+    async def add_dead_letters(self, job_id: str, entries: List[Dict[str, Any]]) -> int:
+        total = await self._submit(self.db.add_dead_letters, job_id, entries)
+        self._publish(job_id, "progress", {"dead_letter_count": total})
+        return total
+
+    async def set_worker_pid(self, job_id: str, pid: Optional[int]) -> None:
+        await self._submit(self.db.update_progress, job_id, worker_pid=pid)
+
+    # ---------- Progress writes (coalesced) ----------
+    def update_progress(self, job_id: str, **fields: Any) -> None:
+        """
+        Record progress fields for a job; latest value wins until the next flush.
+        Safe to call from any thread (e.g. loader callbacks) and never blocks on I/O.
+        """
+        if not fields:
+            return
+        with self._pending_lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+        self._publish(job_id, "progress", fields)
+
+    async def flush(self) -> None:
+        """Persist all pending progress now (the writer flushes before every op)."""
+        await self._submit(lambda: None)
+
+    # ---------- Reads ----------
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.db.get_job, job_id)
+        return self._overlay_pending(job) if job else None
+
+    async def list_jobs(
+        self,
+        profile: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        jobs = await asyncio.to_thread(self.db.list_jobs, profile=profile, status=status, limit=limit)
+        return [self._overlay_pending(j) for j in jobs]
+
+    async def count_by_status(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self.db.count_by_status)
+
+    # ---------- Shutdown ----------
+    async def close(self) -> None:
+        """Flush pending progress and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._ops.put(_STOP)
+        await asyncio.to_thread(self._thread.join)
+
+    # ---------- Internal ----------
+    def _publish(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        if self.events is not None:
+            self.events.publish(job_id, event, data)
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._closed:
+            raise RuntimeError("job store is closed")
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        self._ops.put((fn, args, kwargs, fut))
+        return await asyncio.wrap_future(fut)
+
+    def _overlay_pending(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Reads see progress that is still waiting for the next flush."""
+        with self._pending_lock:
+            pending = self._pending.get(job.get("job_id"))
+            return dict(job, **pending) if pending else job
+
+    def _flush_pending(self) -> None:
+        with self._pending_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+        try:
+            self.db.update_many(batch)
+        except Exception as e:
+            # Progress is advisory; never let a flush failure kill the writer.
+            log.warning("jobs.flush_failed jobs=%s err=%s", len(batch), e)
+
+    def _writer_loop(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._ops.get(timeout=max(0.0, next_flush - time.monotonic()))
+                except queue.Empty:
+                    item = None
+
+                if item is None or time.monotonic() >= next_flush:
+                    self._flush_pending()
+                    next_flush = time.monotonic() + self.flush_interval
+                if item is None:
+                    continue
+                if item is _STOP:
+                    self._flush_pending()
+                    return
+
+                fn, args, kwargs, fut = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                # Progress first, so a terminal transition never gets overwritten by stale progress
+                self._flush_pending()
+                try:
+                    fut.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    fut.set_exception(e)
+        finally:
+            close_thread_connections()
+
+
+# ---------- Process-wide store ----------
+_STORES: Dict[str, AsyncJobStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_job_store(db_path: Optional[str] = None) -> AsyncJobStore:
+    """Return the shared store for db_path (one writer thread per DB file)."""
+    key = db_path or DB_PATH
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None or store._closed:
+            store = _STORES[key] = AsyncJobStore(key, events=get_event_bus())
+        return store
+
+
+async def close_job_stores() -> None:
+    """Flush and stop every shared store (call on server shutdown)."""
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+        _STORES.clear()
+    for store in stores:
+        await store.close()
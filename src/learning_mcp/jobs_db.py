@@ -6,6 +6,14 @@ Purpose:
 - Track enqueue/running/completed ingest jobs.
 - Store provider/model info, progress counters (files/pages/chunks), errors, timestamps.
 - Exposed via /ingest/jobs endpoints.
+- Doubles as the persistent ingest queue: QUEUED rows are claimed by the
+  scheduler in (priority DESC, created_at) order, one RUNNING job per profile.
+
+Concurrency:
+- One long-lived connection per thread (small thread-local pool), opened in WAL
+  mode with synchronous=NORMAL, so dashboards polling /jobs never block on an
+  ingest writing progress (WAL readers don't wait for the writer).
+- Schema is versioned with PRAGMA user_version; see _MIGRATIONS.
 
 User question (example):
 Q: "Where is the jobs DB stored?"
@@ -14,15 +22,168 @@ A:
     Example: JOBS_DB_PATH=/app/state/jobs.sqlite
 """
 
+import json
 import os
 import uuid
 import sqlite3
+import threading
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 # ---------- Config ----------
 DB_PATH = os.getenv("JOBS_DB_PATH", "/app/state/jobs.sqlite")
+BUSY_TIMEOUT_MS = int(os.getenv("JOBS_DB_BUSY_TIMEOUT_MS", "5000"))
+
+
+# ---------- Schema migrations ----------
+# Append-only list of (version, [statements]). PRAGMA user_version records the
+# last applied version; never edit an entry once released, add a new one.
+_MIGRATIONS: List[Tuple[int, List[str]]] = [
+    (
+        1,
+        [
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                profile TEXT,
+                provider TEXT,
+                model_name TEXT,
+                model_dim INTEGER,
+                vector_db TEXT,
+                collection TEXT,
+                truncate INTEGER,
+                status TEXT,
+                phase TEXT,
+                error TEXT,
+                files_total INTEGER,
+                files_done INTEGER,
+                pages_total INTEGER,
+                pages_done INTEGER,
+                chunks_done INTEGER,
+                current_file TEXT,
+                current_page INTEGER,
+                current_file_pages INTEGER,
+                chunks_per_min REAL,
+                created_at TEXT,
+                updated_at TEXT
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        [
+            # list_jobs: ORDER BY created_at DESC, optionally filtered by profile/status
+            "CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_profile_created_at ON jobs (profile, created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at)",
+            # cancel_queued_or_running_for_profile
+            "CREATE INDEX IF NOT EXISTS idx_jobs_profile_status ON jobs (profile, status)",
+        ],
+    ),
+    (
+        3,
+        [
+            # live progress (see learning_mcp.progress.IngestProgress)
+            "ALTER TABLE jobs ADD COLUMN chunks_total INTEGER",
+            "ALTER TABLE jobs ADD COLUMN chunks_embedded INTEGER",
+            "ALTER TABLE jobs ADD COLUMN eta_seconds REAL",
+            "ALTER TABLE jobs ADD COLUMN phase_durations TEXT",
+        ],
+    ),
+    (
+        4,
+        [
+            # persistent ingest queue (see learning_mcp.job_scheduler)
+            "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE jobs ADD COLUMN started_at TEXT",
+            "ALTER TABLE jobs ADD COLUMN worker_pid INTEGER",
+            # claim_next_job: highest priority first, FIFO within a priority
+            "CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at)",
+        ],
+    ),
+    (
+        5,
+        [
+            # resumable ingest: JSON checkpoint (see learning_mcp.ingest_worker)
+            "ALTER TABLE jobs ADD COLUMN checkpoint TEXT",
+        ],
+    ),
+    (
+        6,
+        [
+            # chunks that failed on every embedding backend (JSON list)
+            "ALTER TABLE jobs ADD COLUMN dead_letters TEXT",
+        ],
+    ),
+]
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+# db_path -> thread-local connection holder; schema is migrated once per path
+_LOCAL = threading.local()
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY: set = set()
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _thread_connection(db_path: str) -> sqlite3.Connection:
+    """Return this thread's long-lived connection for db_path (opened lazily)."""
+    conns: Optional[Dict[str, sqlite3.Connection]] = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = conns[db_path] = _open_connection(db_path)
+    return conn
+
+
+def close_thread_connections() -> None:
+    """Close the calling thread's pooled connections (e.g. on worker shutdown)."""
+    conns: Optional[Dict[str, sqlite3.Connection]] = getattr(_LOCAL, "conns", None)
+    if not conns:
+        return
+    for conn in conns.values():
+        try:
+            conn.close()
+        except Exception:
+            pass
+    conns.clear()
+
+
+def _migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations in order; returns the resulting schema version.
+
+    Each step runs with its user_version bump in one explicit transaction:
+    sqlite3 opens no implicit transaction before DDL, so without BEGIN a failure
+    midway would keep the step's first ALTERs while the version stays behind
+    (and the next start would fail on "duplicate column").
+    """
+    for version, statements in _MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # re-read under the write lock: another process may have just migrated
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.rollback()
+                continue
+            for stmt in statements:
+                conn.execute(stmt)
+            # PRAGMA doesn't accept bound parameters; version is an int from _MIGRATIONS
+            conn.execute(f"PRAGMA user_version={int(version)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
 class JobStatus(str, Enum):
@@ -44,42 +205,27 @@ class JobPhase(str, Enum):
 class JobsDB:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or DB_PATH
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
         self._init_schema()
 
-    def _connect(self):
-        return sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Pooled connection for the calling thread. Use as `with self._connect() as conn:`;
+        the context manager commits/rolls back but does NOT close the connection.
+        """
+        return _thread_connection(self.db_path)
 
     def _init_schema(self):
-        with self._connect() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS jobs (
-                    job_id TEXT PRIMARY KEY,
-                    profile TEXT,
-                    provider TEXT,
-                    model_name TEXT,
-                    model_dim INTEGER,
-                    vector_db TEXT,
-                    collection TEXT,
-                    truncate INTEGER,
-                    status TEXT,
-                    phase TEXT,
-                    error TEXT,
-                    files_total INTEGER,
-                    files_done INTEGER,
-                    pages_total INTEGER,
-                    pages_done INTEGER,
-                    chunks_done INTEGER,
-                    current_file TEXT,
-                    current_page INTEGER,
-                    current_file_pages INTEGER,
-                    chunks_per_min REAL,
-                    created_at TEXT,
-                    updated_at TEXT
-                )
-                """
-            )
+        if self.db_path in _SCHEMA_READY:
+            return
+        with _SCHEMA_LOCK:
+            if self.db_path in _SCHEMA_READY:
+                return
+            _migrate(self._connect())
+            _SCHEMA_READY.add(self.db_path)
+
+    def schema_version(self) -> int:
+        return self._connect().execute("PRAGMA user_version").fetchone()[0]
 
     # ---------- Job lifecycle ----------
     def start_job(
@@ -94,6 +240,7 @@ class JobsDB:
         files_total: int,
         pages_total: int,
         chunks_per_min: Optional[float] = None,   # NEW
+        priority: int = 0,
     ) -> str:
         job_id = datetime.utcnow().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
         now = datetime.utcnow().isoformat()
@@ -104,9 +251,9 @@ class JobsDB:
                     job_id, profile, provider, model_name, model_dim,
                     vector_db, collection, truncate, status, phase,
                     files_total, files_done, pages_total, pages_done, chunks_done,
-                    chunks_per_min, created_at, updated_at
+                    chunks_per_min, priority, created_at, updated_at
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     job_id,
@@ -125,6 +272,7 @@ class JobsDB:
                     0,
                     0,
                     chunks_per_min,   # NEW
+                    int(priority),
                     now,
                     now,
                 ),
@@ -144,6 +292,31 @@ class JobsDB:
     def finish_job(self, job_id: str, status: JobStatus, error: Optional[str] = None):
         self._update(job_id, status=status.value, phase=JobPhase.FINISHED.value, error=error)
 
+    def requeue_job(self, job_id: str) -> None:
+        """Put a job back in the queue (resume); its checkpoint is kept."""
+        self._update(
+            job_id,
+            status=JobStatus.QUEUED.value,
+            phase=JobPhase.PREFLIGHT.value,
+            error=None,
+            worker_pid=None,
+        )
+
+    def save_checkpoint(self, job_id: str, checkpoint: Dict[str, Any]) -> None:
+        self._update(job_id, checkpoint=json.dumps(checkpoint))
+
+    def add_dead_letters(self, job_id: str, entries: List[Dict[str, Any]]) -> int:
+        """Append quarantined chunks to the job's dead-letter list; returns the new total."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT dead_letters FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+            current = self.dead_letters_of({"dead_letters": row[0] if row else None})
+            current.extend(entries)
+            self._execute_update(conn, job_id, {
+                "dead_letters": json.dumps(current),
+                "updated_at": datetime.utcnow().isoformat(),
+            })
+            return len(current)
+
     def cancel_queued_or_running_for_profile(self, profile: str) -> int:
         with self._connect() as conn:
             cur = conn.execute(
@@ -158,6 +331,80 @@ class JobsDB:
             )
             return cur.rowcount
 
+    # ---------- Queue ----------
+    def claim_next_job(self, worker_pid: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the next runnable QUEUED job to RUNNING and return it.
+
+        Runnable = no other job of the same profile is RUNNING (per-profile mutual
+        exclusion). Order: priority DESC, then oldest first. BEGIN IMMEDIATE takes
+        the write lock up front so two claimers can never pick the same row.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                """
+                SELECT job_id FROM jobs
+                WHERE status=?
+                  AND profile NOT IN (SELECT profile FROM jobs WHERE status=?)
+                ORDER BY priority DESC, created_at ASC
+                LIMIT 1
+                """,
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            now = datetime.utcnow().isoformat()
+            self._execute_update(conn, row[0], {
+                "status": JobStatus.RUNNING.value,
+                "started_at": now,
+                "worker_pid": worker_pid,
+                "updated_at": now,
+            })
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return self.get_job(row[0])
+
+    def recover_running(self, requeue: bool, error: Optional[str] = None) -> List[str]:
+        """
+        Move every RUNNING job to QUEUED (requeue=True, checkpoint kept) or to
+        FAILED with `error`, in one BEGIN IMMEDIATE transaction; returns their ids.
+
+        Only valid while no worker is running against this DB file, i.e. at the
+        start of its single scheduler (see job_scheduler).
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [r[0] for r in conn.execute(
+                "SELECT job_id FROM jobs WHERE status=?", (JobStatus.RUNNING.value,)
+            ).fetchall()]
+            now = datetime.utcnow().isoformat()
+            if requeue:
+                conn.execute(
+                    "UPDATE jobs SET status=?, phase=?, error=NULL, worker_pid=NULL, updated_at=? WHERE status=?",
+                    (JobStatus.QUEUED.value, JobPhase.PREFLIGHT.value, now, JobStatus.RUNNING.value),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status=?, phase=?, error=?, updated_at=? WHERE status=?",
+                    (JobStatus.FAILED.value, JobPhase.FINISHED.value, error, now, JobStatus.RUNNING.value),
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return ids
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
     # ---------- Queries ----------
     def list_jobs(self, profile: Optional[str] = None, status: Optional[str] = None, limit: int = 20):
         query = "SELECT * FROM jobs WHERE 1=1"
@@ -188,12 +435,51 @@ class JobsDB:
             return dict(zip(cols, row))
 
 
+    @staticmethod
+    def checkpoint_of(job: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Parsed checkpoint column of a job row (None if absent or unreadable)."""
+        raw = (job or {}).get("checkpoint")
+        if not raw:
+            return None
+        try:
+            cp = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        return cp if isinstance(cp, dict) else None
+
+    @staticmethod
+    def dead_letters_of(job: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raw = (job or {}).get("dead_letters")
+        if not raw:
+            return []
+        try:
+            entries = json.loads(raw)
+        except (TypeError, ValueError):
+            return []
+        return entries if isinstance(entries, list) else []
+
+    # ---------- Batched writes ----------
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Apply {job_id: fields} updates in a single transaction (one fsync)."""
+        if not updates:
+            return
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            for job_id, fields in updates.items():
+                if not fields:
+                    continue
+                self._execute_update(conn, job_id, dict(fields, updated_at=now))
+
     # ---------- Internal ----------
     def _update(self, job_id: str, **fields):
         if not fields:
             return
         fields["updated_at"] = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            self._execute_update(conn, job_id, fields)
+
+    @staticmethod
+    def _execute_update(conn: sqlite3.Connection, job_id: str, fields: Dict[str, Any]) -> None:
         keys = ", ".join(f"{k}=?" for k in fields)
         values = list(fields.values()) + [job_id]
-        with self._connect() as conn:
-            conn.execute(f"UPDATE jobs SET {keys} WHERE job_id=?", values)
+        conn.execute(f"UPDATE jobs SET {keys} WHERE job_id=?", values)
@@ -9,9 +9,9 @@ Load ANY JSON file and emit chunk dicts consumable by the ingest worker:
 
 Behavior
 --------
-- Recursively walks the JSON.
+- Walks the JSON depth-first (iteratively: any nesting depth).
 - For leaf values:
-  - strings -> chunk by size/overlap
+  - strings -> chunk by size/overlap (chunker.split_text; chunk_unit chars|tokens|words)
   - numbers/bools -> stringify as one small chunk
   - nulls -> skipped
 - Arrays:
@@ -19,17 +19,37 @@ Behavior
   - of objects    -> recurse into each element (/arr/0/key)
 - No assumptions about domain or keys.
 
+Streaming
+---------
+- iter_json_chunks(): same chunks, yielded while parsing (ijson, a core dependency;
+  without it the whole file is json.load-ed and a warning is logged once).
+- iter_jsonl_chunks() / load_jsonl(): JSON Lines, one record per line, paths
+  as for a top-level array (/0/..., /1/...).
+
 Deterministic IDs
 -----------------
 Upstream, derive point IDs from (profile | metadata.path | chunk_idx).
 """
 
 from __future__ import annotations
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from decimal import Decimal
 from pathlib import Path
 import json
+import logging
 import re
 
+from .chunker import split_chunks
+
+# incremental parser for iter_json_chunks (falls back to json.load)
+try:
+    import ijson  # type: ignore
+except Exception:  # pragma: no cover - depends on environment
+    ijson = None
+
+log = logging.getLogger("learning_mcp.json_loader")
+_warned_no_ijson = False
+
 # ------------- text utils -------------
 _MULTI_WS = re.compile(r"\s+")
 
@@ -39,52 +59,25 @@ def _normalize_text(s: str) -> str:
     s = _MULTI_WS.sub(" ", s)
     return s
 
-_SENTENCE_END = re.compile(r"([\.!?])(\s+)")
-
-def _sentence_aware_chunks(text: str, target: int, overlap: int) -> List[str]:
-    if not text:
-        return []
-    if target <= 0:
-        return [text]
-
-    chunks: List[str] = []
-    buf: List[str] = []
-    length = 0
-
-    def flush():
-        nonlocal buf, length
-        if buf:
-            chunk = "".join(buf).strip()
-            if chunk:
-                chunks.append(chunk)
-            buf, length = [], 0
-
-    tokens = _SENTENCE_END.split(text)
-    i = 0
-    while i < len(tokens):
-        seg = tokens[i]; i += 1
-        if i + 1 < len(tokens) and tokens[i] in (".", "!", "?"):
-            seg += tokens[i] + tokens[i + 1]; i += 2
-        if length + len(seg) > target and length >= max(1, target // 2):
-            flush()
-            if overlap and chunks:
-                tail = chunks[-1][-overlap:]
-                if tail:
-                    buf.append(tail)
-                    length = len(tail)
-        buf.append(seg)
-        length += len(seg)
-    flush()
-
-    if not chunks:
-        step = max(1, target - max(0, overlap))
-        chunks = [text[i:i + target] for i in range(0, len(text), step)]
-    return [c for c in chunks if c]
-
 # ------------- JSON walkers -------------
 
-def _is_primitive(x: Any) -> bool:
-    return isinstance(x, (str, int, float, bool)) or x is None
+def _join_primitives(arr: List[Any]) -> Optional[str]:
+    """", "-joined array if every element is a primitive, else None (one pass, stops early)."""
+    parts: List[str] = []
+    for v in arr:
+        if v is None:
+            parts.append("")
+        elif isinstance(v, (str, int, float, bool)):
+            parts.append(str(v))
+        else:
+            return None
+    return ", ".join(parts)
+
+
+def _prefixed(prefix: str, pairs: Iterable[Tuple[Any, Any]]) -> Iterator[Tuple[str, Any]]:
+    for key, value in pairs:
+        yield f"{prefix}/{key}", value
+
 
 def _flatten(root: Any, base: str = "") -> Iterable[Tuple[str, Any]]:
     """
@@ -93,36 +86,253 @@ def _flatten(root: Any, base: str = "") -> Iterable[Tuple[str, Any]]:
     - dict  -> recurse by key
     - list  -> if primitives: join into a single value; if objects: recurse into elements
     - other -> yield as leaf
+
+    Iterative (explicit stack of child iterators), so nesting depth is not
+    bounded by the recursion limit and each leaf is yielded once rather than
+    through one generator per level. A container's path is built once and
+    shared as the prefix of all its children.
     """
-    if isinstance(root, dict):
-        for k, v in root.items():
-            yield from _flatten(v, f"{base}/{k}")
-        return
+    stack: List[Iterator[Tuple[str, Any]]] = [iter(((base, root),))]
+    while stack:
+        for path, value in stack[-1]:
+            if isinstance(value, dict):
+                if value:
+                    stack.append(_prefixed(path, value.items()))
+                    break
+            elif isinstance(value, list):
+                if not value:
+                    continue
+                joined = _join_primitives(value)
+                if joined is not None:
+                    yield path or "/", joined
+                else:
+                    stack.append(_prefixed(path, enumerate(value)))
+                    break
+            else:
+                # primitives or others -> leaf
+                yield path or "/", value
+        else:
+            stack.pop()
+
+# ------------- streaming walker -------------
+
+def _obj_events(root: Any) -> Iterator[Tuple[str, Any]]:
+    """(event, value) pairs for an in-memory value, same shape as ijson.basic_parse."""
+    stack: List[Any] = [("value", root)]
+    while stack:
+        kind, v = stack.pop()
+        if kind != "value":
+            yield kind, v
+        elif isinstance(v, dict):
+            yield "start_map", None
+            stack.append(("end_map", None))
+            for k, child in reversed(list(v.items())):
+                stack.append(("value", child))
+                stack.append(("map_key", k))
+        elif isinstance(v, list):
+            yield "start_array", None
+            stack.append(("end_array", None))
+            stack.extend(("value", child) for child in reversed(v))
+        else:
+            yield "scalar", v
 
-    if isinstance(root, list):
-        if not root:
+
+def _walk_events(events: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+    """
+    Incremental _flatten over parser events: same (path, value) pairs, same order.
+
+    Arrays are buffered only while every element so far is a primitive (the
+    joined leaf needs all of them); the first container element flushes the
+    buffer as indexed leaves and the array streams from there on.
+    """
+    # frame: [is_array, base, key_or_index, primitive_buffer (None once mixed)]
+    stack: List[List[Any]] = []
+
+    def child_path() -> str:
+        if not stack:
+            return ""
+        frame = stack[-1]
+        if frame[0]:
+            frame[2] += 1
+            return f"{frame[1]}/{frame[2] - 1}"
+        return f"{frame[1]}/{frame[2]}"
+
+    def unbuffer() -> Iterator[Tuple[str, Any]]:
+        frame = stack[-1] if stack else None
+        if frame is not None and frame[0] and frame[3] is not None:
+            for i, v in enumerate(frame[3]):
+                yield f"{frame[1]}/{i}", v
+            frame[3] = None
+
+    for event, value in events:
+        if event == "map_key":
+            stack[-1][2] = value
+        elif event in ("start_map", "start_array"):
+            yield from unbuffer()
+            base = child_path()
+            stack.append([event == "start_array", base, 0 if event == "start_array" else None, []])
+        elif event == "end_map":
+            stack.pop()
+        elif event == "end_array":
+            frame = stack.pop()
+            if frame[3]:
+                yield frame[1] or "/", ", ".join("" if v is None else str(v) for v in frame[3])
+        else:  # scalar / string / number / boolean / null
+            frame = stack[-1] if stack else None
+            if frame is not None and frame[0] and frame[3] is not None:
+                frame[3].append(value)
+                frame[2] += 1
+            else:
+                yield child_path() or "/", value
+
+
+def _stream_leaves(fh: IO[bytes], file_path: str) -> Iterator[Tuple[str, Any]]:
+    """(path, value) leaves of one JSON document, parsed incrementally when ijson is installed."""
+    global _warned_no_ijson
+    try:
+        if ijson is not None:
+            # Decimal -> float so leaves stringify exactly like json.load's
+            events = ijson.basic_parse(fh)
+            yield from _walk_events(
+                (e, float(v)) if e == "number" and isinstance(v, Decimal) else (e, v) for e, v in events
+            )
+        else:
+            if not _warned_no_ijson:
+                _warned_no_ijson = True
+                log.warning("ijson is not installed: streamed JSON is loaded whole (memory grows with file size)")
+            yield from _walk_events(_obj_events(json.load(fh)))
+    except (ValueError, getattr(ijson, "JSONError", ValueError)) as e:
+        raise ValueError(f"Failed to parse JSON {file_path}: {e}") from e
+
+
+# ------------- chunk building -------------
+
+def _leaf_chunks(
+    path: str,
+    val: Any,
+    *,
+    source: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+) -> Iterator[Dict[str, Any]]:
+    """Chunks for one (path, value) leaf, with key-context prefix and metadata."""
+    title = (path.split("/")[-1] or "/")
+    metadata = {
+        "section": "json",
+        "title": title,
+        "source": source,
+        "source_id": path,
+        "path": path,
+    }
+
+    # Build readable key context from path (e.g., "/education" -> "Education")
+    # For nested paths like "/experience/0/company" -> "Experience > Company"
+    key_parts = [p for p in path.split("/") if p and not p.isdigit()]
+    if key_parts:
+        key_context = " > ".join(p.replace("_", " ").title() for p in key_parts)
+        key_prefix = f"{key_context}: "
+    else:
+        key_prefix = ""
+
+    if isinstance(val, str):
+        text = _normalize_text(val)
+        if not text:
+            return
+        # Prepend key context to make chunks searchable by key names
+        for s in split_chunks(f"{key_prefix}{text}", chunk_size, chunk_overlap, unit=chunk_unit):
+            yield {"text": s, "metadata": dict(metadata)}
+    elif isinstance(val, (int, float, bool)):
+        # Include key context for primitive values too
+        yield {"text": f"{key_prefix}{val}", "metadata": metadata}
+    else:
+        # null or unexpected leaf -> skip nulls, stringify others defensively
+        if val is None:
             return
-        # if all primitives, join into a single leaf
-        if all(_is_primitive(v) for v in root):
-            # Join with ", " (preserves order)
-            joined = ", ".join("" if v is None else str(v) for v in root)
-            yield base or "/", joined
+        s = _normalize_text(json.dumps(val, ensure_ascii=False))
+        if not s:
             return
-        # otherwise recurse element-by-element
-        for i, v in enumerate(root):
-            yield from _flatten(v, f"{base}/{i}")
-        return
+        for c in split_chunks(f"{key_prefix}{s}", chunk_size, chunk_overlap, unit=chunk_unit):
+            yield {"text": c, "metadata": dict(metadata)}
 
-    # primitives or others -> leaf
-    yield base or "/", root
 
 # ------------- public API -------------
 
+def iter_json_chunks(
+    file_path: str,
+    *,
+    chunk_size: int = 800,
+    chunk_overlap: int = 100,
+    chunk_unit: str = "chars",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming load_json: yield the same chunks in the same order while parsing.
+
+    With ijson installed, memory is bounded by the largest leaf (or all-primitive
+    array), not the file. Without it the document is json.load-ed first, but
+    chunks are still produced lazily.
+    """
+    p = Path(file_path)
+    if not p.exists():
+        raise FileNotFoundError(f"JSON not found: {file_path}")
+    with p.open("rb") as fh:
+        for path, val in _stream_leaves(fh, file_path):
+            yield from _leaf_chunks(
+                path, val, source=p.name, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit,
+            )
+
+
+def iter_jsonl_chunks(
+    file_path: str,
+    *,
+    chunk_size: int = 800,
+    chunk_overlap: int = 100,
+    chunk_unit: str = "chars",
+) -> Iterator[Dict[str, Any]]:
+    """
+    JSON Lines: one record per non-blank line, read line by line.
+
+    Paths are those of the equivalent top-level array (/0/title, /1/title, ...),
+    so a JSONL export and its JSON-array form index the same way.
+    """
+    p = Path(file_path)
+    if not p.exists():
+        raise FileNotFoundError(f"JSONL not found: {file_path}")
+    with p.open("r", encoding="utf-8") as fh:
+        idx = 0
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except Exception as e:
+                raise ValueError(f"Failed to parse JSONL {file_path} line {lineno}: {e}") from e
+            for path, val in _flatten(record, f"/{idx}"):
+                yield from _leaf_chunks(
+                    path, val, source=p.name, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit,
+                )
+            idx += 1
+
+
+def load_jsonl(
+    file_path: str,
+    *,
+    chunk_size: int = 800,
+    chunk_overlap: int = 100,
+    chunk_unit: str = "chars",
+) -> List[Dict[str, Any]]:
+    """List form of iter_jsonl_chunks (same chunk shape as load_json)."""
+    return list(iter_jsonl_chunks(
+        file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit,
+    ))
+
+
 def load_json(
     file_path: str,
     *,
     chunk_size: int = 800,
     chunk_overlap: int = 100,
+    chunk_unit: str = "chars",
 ) -> List[Dict[str, Any]]:
     """
     Load JSON and return flat chunks with generic metadata.
@@ -146,76 +356,19 @@ def load_json(
     with p.open("r", encoding="utf-8") as f:
         try:
             data = json.load(f)
+        except RecursionError:
+            # nested deeper than json's C scanner allows: ijson + the iterative walker are not
+            if ijson is None:
+                raise ValueError(f"Failed to parse JSON {file_path}: nested too deeply (install ijson)")
+            return list(iter_json_chunks(
+                file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit,
+            ))
         except Exception as e:
             raise ValueError(f"Failed to parse JSON {file_path}: {e}") from e
 
-    source = p.name
     out: List[Dict[str, Any]] = []
-
     for path, val in _flatten(data):
-        title = (path.split("/")[-1] or "/")
-        section = "json"
-        source_id = path
-        
-        # Build readable key context from path (e.g., "/education" -> "Education")
-        # For nested paths like "/experience/0/company" -> "Experience > Company"
-        key_parts = [p for p in path.split("/") if p and not p.isdigit()]
-        if key_parts:
-            key_context = " > ".join(p.replace("_", " ").title() for p in key_parts)
-            key_prefix = f"{key_context}: "
-        else:
-            key_prefix = ""
-
-        if isinstance(val, str):
-            text = _normalize_text(val)
-            if not text:
-                continue
-            # Prepend key context to make chunks searchable by key names
-            text_with_context = f"{key_prefix}{text}"
-            slices = _sentence_aware_chunks(text_with_context, chunk_size, chunk_overlap)
-            for s in slices:
-                out.append({
-                    "text": s,
-                    "metadata": {
-                        "section": section,
-                        "title": title,
-                        "source": source,
-                        "source_id": source_id,
-                        "path": path,
-                    },
-                })
-        elif isinstance(val, (int, float, bool)):
-            # Include key context for primitive values too
-            text_with_context = f"{key_prefix}{val}"
-            out.append({
-                "text": text_with_context,
-                "metadata": {
-                    "section": section,
-                    "title": title,
-                    "source": source,
-                    "source_id": source_id,
-                    "path": path,
-                },
-            })
-        else:
-            # null or unexpected leaf -> skip nulls, stringify others defensively
-            if val is None:
-                continue
-            s = _normalize_text(json.dumps(val, ensure_ascii=False))
-            if not s:
-                continue
-            text_with_context = f"{key_prefix}{s}"
-            slices = _sentence_aware_chunks(text_with_context, chunk_size, chunk_overlap)
-            for c in slices:
-                out.append({
-                    "text": c,
-                    "metadata": {
-                        "section": section,
-                        "title": title,
-                        "source": source,
-                        "source_id": source_id,
-                        "path": path,
-                    },
-                })
-
+        out.extend(_leaf_chunks(
+            path, val, source=p.name, chunk_size=chunk_size, chunk_overlap=chunk_overlap, chunk_unit=chunk_unit,
+        ))
     return out
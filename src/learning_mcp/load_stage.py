@@ -0,0 +1,303 @@
+# src/learning_mcp/load_stage.py
+"""
+Executor-backed loader stage for ingest jobs.
+
+Purpose:
+- Document loading (PDF parsing, cleanup regexes, chunking, JSON flattening) is
+  synchronous CPU work. On the event loop it freezes everything else on that
+  loop until extraction ends: /health, /jobs and /search/api_context when a job
+  runs inline (INGEST_WORKER_MODE=inline), and cancellation and progress relay
+  inside a worker process.
+- load_documents() runs each document's loader off the loop and yields the
+  results in profile order (point ids depend on it), with up to
+  INGEST_LOAD_WORKERS documents in flight:
+    pdf        : process pool (spawned; parsing never holds the server's GIL);
+                 a thread inside a daemonic process, which may not have children
+    json/jsonl : thread (json's C parser; a process would only add pickling,
+                 and streamed ChunkStreams cannot cross a process boundary)
+- A streamed ChunkStream (large JSON/JSONL) is only parsed while it is
+  iterated, so the consumer pulls its chunks through a BatchReader: each batch
+  is read in a thread, never on the loop.
+- Loader progress (current file, pages) still reaches IngestProgress: pool
+  processes relay it over a multiprocessing queue, threads call it directly.
+- Cancelling the consuming task terminates the pool's processes and makes thread
+  loaders raise LoadCanceled at their next progress callback (a PDF page), so
+  /ingest/cancel_all lands within a page instead of after the whole extraction.
+  Cancelling a BatchReader pull stops its thread at the next chunk.
+
+Config (env):
+    INGEST_LOAD_PDF=process       # process | thread | inline
+    INGEST_LOAD_JSON=thread       # thread | inline (json and jsonl)
+    INGEST_LOAD_WORKERS=2         # documents loaded concurrently per job
+
+Usage (ingest_worker):
+    async for doc in load_documents(prof, chunk_size=1200, chunk_overlap=200,
+                                    progress=progress, skip=lambda d: ...):
+        doc.spec, doc.chunks, doc.pages     # chunks is None for skipped docs
+    reader = BatchReader(chain.from_iterable(sources))
+    while batch := await reader.next(256): ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .document_loaders import Chunk, document_type, load_document
+from .progress import IngestProgress
+
+log = logging.getLogger("learning_mcp.load_stage")
+
+MODES = ("process", "thread", "inline")
+LOAD_PDF = os.getenv("INGEST_LOAD_PDF", "process").strip().lower()
+LOAD_JSON = os.getenv("INGEST_LOAD_JSON", "thread").strip().lower()
+LOAD_WORKERS = max(1, int(os.getenv("INGEST_LOAD_WORKERS", "2")))
+
+
+class LoadCanceled(Exception):
+    """Raised inside a loader thread once its job has been canceled."""
+
+
+class LoadedDocument(NamedTuple):
+    spec: Dict[str, Any]
+    chunks: Optional[Iterable[Chunk]]  # None: skipped (see load_documents)
+    pages: int                         # pages this document reported done
+
+
+def _mode_for(doc_spec: Dict[str, Any]) -> str:
+    if document_type(doc_spec) == "pdf":
+        mode = LOAD_PDF
+    else:
+        mode = LOAD_JSON if LOAD_JSON != "process" else "thread"
+    if mode not in MODES:
+        log.warning(f"Unknown loader mode '{mode}'; using thread")
+        return "thread"
+    if mode == "process" and multiprocessing.current_process().daemon:
+        return "thread"  # a daemonic process may not start the pool's children
+    return mode
+
+
+class _DocProgress:
+    """
+    The part of IngestProgress loaders call (start_file, page_done), for one document:
+    counts its pages, forwards each call, and raises LoadCanceled once `cancel` is set.
+    """
+
+    def __init__(self, forward: Callable[..., None], cancel: Optional[threading.Event] = None):
+        self._forward = forward
+        self._cancel = cancel
+        self.pages = 0
+
+    def check(self) -> None:
+        if self._cancel is not None and self._cancel.is_set():
+            raise LoadCanceled()
+
+    def start_file(self, path: str, pages: Optional[int] = None) -> None:
+        self.check()
+        self._forward("start_file", path, pages)
+
+    def page_done(self, page_num: int, selected_pages: Optional[int] = None) -> None:
+        self.pages += 1
+        self._forward("page_done", page_num, selected_pages)
+        self.check()
+
+
+# ---------- process pool side ----------
+
+_RELAY_Q: Any = None
+
+
+def _init_process(relay_q: Any) -> None:
+    global _RELAY_Q
+    _RELAY_Q = relay_q
+
+
+def _relay(method: str, *args: Any) -> None:
+    try:
+        _RELAY_Q.put_nowait((method, args))
+    except Exception:
+        # advisory only; the page count also comes back with the result
+        pass
+
+
+def _load_in_process(doc_spec: Dict[str, Any], kwargs: Dict[str, Any]) -> Tuple[List[Chunk], int]:
+    prog = _DocProgress(_relay)
+    chunks = load_document(doc_spec, progress=prog, **kwargs)
+    return list(chunks), prog.pages
+
+
+# ---------- server side ----------
+
+class _Executors:
+    """One job's loader executors, created on first use; close() stops them."""
+
+    def __init__(self, progress: Optional[IngestProgress]):
+        self.progress = progress
+        self.cancel = threading.Event()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._relay_q: Any = None
+        self._relay: Optional[threading.Thread] = None
+
+    def _forward(self, method: str, *args: Any) -> None:
+        if self.progress is not None:
+            getattr(self.progress, method)(*args)
+
+    def _drain(self) -> None:
+        while True:
+            msg = self._relay_q.get()
+            if msg is None:
+                return
+            method, args = msg
+            self._forward(method, *args)
+
+    def _processes(self) -> ProcessPoolExecutor:
+        if self._procs is None:
+            # spawn (not fork): the server has live threads (DB writer, relay)
+            ctx = multiprocessing.get_context("spawn")
+            self._relay_q = ctx.Queue()
+            self._procs = ProcessPoolExecutor(
+                max_workers=LOAD_WORKERS, mp_context=ctx, initializer=_init_process, initargs=(self._relay_q,),
+            )
+            self._relay = threading.Thread(target=self._drain, name="ingest-load-relay", daemon=True)
+            self._relay.start()
+        return self._procs
+
+    def _load_in_thread(self, doc_spec: Dict[str, Any], kwargs: Dict[str, Any]) -> Tuple[Iterable[Chunk], int]:
+        prog = _DocProgress(self._forward, self.cancel)
+        prog.check()
+        chunks = load_document(doc_spec, progress=prog, **kwargs)
+        return chunks, prog.pages
+
+    def submit(self, doc_spec: Dict[str, Any], kwargs: Dict[str, Any]) -> Awaitable[Tuple[Iterable[Chunk], int]]:
+        loop = asyncio.get_running_loop()
+        mode = _mode_for(doc_spec)
+        if mode == "process":
+            return loop.run_in_executor(self._processes(), _load_in_process, doc_spec, kwargs)
+        if mode == "thread":
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="ingest-load")
+            return loop.run_in_executor(self._threads, self._load_in_thread, doc_spec, kwargs)
+        fut = loop.create_future()
+        try:
+            fut.set_result(self._load_in_thread(doc_spec, kwargs))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def close(self, kill: bool) -> None:
+        """Shut the executors down; kill=True stops loads still running."""
+        if kill:
+            self.cancel.set()
+        if self._procs is not None:
+            if kill:
+                _kill_workers(self._procs)
+            self._procs.shutdown(wait=True, cancel_futures=True)
+            self._relay_q.put(None)  # after the workers exit, so their relayed ticks come first
+            if self._relay is not None:
+                self._relay.join(timeout=5)
+        if self._threads is not None:
+            # a canceled thread stops at its next page; don't wait for it
+            self._threads.shutdown(wait=not kill, cancel_futures=True)
+
+
+def _kill_workers(pool: ProcessPoolExecutor) -> None:
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        if proc.is_alive():
+            proc.terminate()
+
+
+async def load_documents(
+    prof: Dict[str, Any],
+    *,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    progress: Optional[IngestProgress] = None,
+    skip: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> AsyncIterator[LoadedDocument]:
+    """
+    Async counterpart of document_loaders.iter_document_chunks: same documents,
+    same order, same chunks, loaded in worker threads/processes.
+
+    Documents for which skip(doc_spec) is true are not loaded; they are yielded
+    with chunks=None. Loader errors propagate to the consumer as they would
+    inline; cancelling the consumer stops the loads still in flight.
+    """
+    kwargs = {
+        "profile_name": str(prof.get("name") or "profile").strip(),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunk_unit": chunk_unit,
+    }
+    docs = iter([d for d in prof.get("documents") or [] if document_type(d)])
+    executors = _Executors(progress)
+    in_flight: Deque[Tuple[Dict[str, Any], Optional[Awaitable[Tuple[Iterable[Chunk], int]]]]] = deque()
+
+    def fill() -> None:
+        while sum(1 for _, f in in_flight if f is not None) < LOAD_WORKERS:
+            d = next(docs, None)
+            if d is None:
+                return
+            in_flight.append((d, None if skip is not None and skip(d) else executors.submit(d, kwargs)))
+
+    finished = False
+    try:
+        fill()
+        while in_flight:
+            d, fut = in_flight.popleft()
+            if fut is None:
+                fill()
+                yield LoadedDocument(d, None, 0)
+                continue
+            chunks, pages = await fut
+            fill()  # keep the executors busy while the consumer handles this one
+            if progress is not None:
+                progress.file_done()
+            yield LoadedDocument(d, chunks, pages)
+        finished = True
+    finally:
+        kill = not finished
+        if kill:
+            log.info("Loader stage stopped early; canceling loads in flight")
+        await asyncio.shield(asyncio.to_thread(executors.close, kill))
+
+
+class BatchReader:
+    """
+    Batches of chunks pulled off the event loop: iterating a ChunkStream is what
+    parses its file. INGEST_LOAD_JSON=inline reads on the loop instead.
+    """
+
+    def __init__(self, chunks: Iterable[Chunk]):
+        self._chunks = iter(chunks)
+        self.cancel = threading.Event()
+
+    def _take(self, n: int) -> List[Chunk]:
+        batch = []
+        for chunk in islice(self._chunks, n):
+            if self.cancel.is_set():
+                raise LoadCanceled()
+            batch.append(chunk)
+        return batch
+
+    async def next(self, n: int) -> List[Chunk]:
+        """Up to n chunks; [] once exhausted. A canceled pull stops its thread at the next chunk."""
+        if LOAD_JSON == "inline":
+            return self._take(n)
+        try:
+            return await asyncio.to_thread(self._take, n)
+        except asyncio.CancelledError:
+            self.cancel.set()
+            raise
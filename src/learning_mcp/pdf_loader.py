@@ -10,6 +10,14 @@ Purpose:
     2) load_pdf(...)     -> list[str]           : simple chunks (backward compatible)
     3) load_pdf_structured(...) -> list[dict]   : rich chunks with metadata for RAG/summarization
 
+Sections:
+- load_pdf_structured fills heading_path / section_id from the PDF outline
+  (bookmarks) by default: OutlineIndex parses it once into a page -> heading
+  interval index. Section ids number the outline tree ("s2.1" = 1st child of the
+  2nd top-level entry); section_ancestors("s2.1") == ["s2", "s2.1"] so a search
+  can be scoped to a chapter including its subsections. PDFs without an outline
+  keep heading_path=[] and section_id="p{page}".
+
 Notes:
 - This file is backward-compatible: existing callers of load_pdf(...) are unaffected.
 - For new retrieval/summarization, prefer load_pdf_structured(...).
@@ -18,9 +26,11 @@ Notes:
 from __future__ import annotations
 from typing import List, Optional, Dict, Any, Iterable, Tuple
 from dataclasses import dataclass, asdict
+import logging
 import re
 import unicodedata
 import hashlib
+from bisect import bisect_right
 
 try:
     # Prefer the maintained fork if already installed
@@ -28,30 +38,99 @@ try:
 except Exception:  # fall back if project still uses PyPDF2
     from PyPDF2 import PdfReader  # type: ignore
 
+from .chunker import split_chunks, split_text
 from .page_ranges import compute_pages
 
+log = logging.getLogger("learning_mcp.pdf_loader")
+
 
 # -------------------------------
 # Internal heuristics & utilities
 # -------------------------------
 
-_CODE_HINTS = re.compile(
-    r"\b(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\b\s+\/|"
-    r"\b(limit|offset|cursor|page(Token)?|per_page|maxResults)\b|"
-    r"`{1,3}|^\s{2,}\S|^\t+\S|"
-    r"\{[\s\S]*?\}|\[[\s\S]*?\]|"       # JSON-ish brackets (coarse)
-    r"HTTP\/1\.[01]|Authorization:|Bearer\s+[A-Za-z0-9\-_\.]+|"
-    r"^#+\s|\bExample(s)?\b|\bParameters?\b",
-    re.IGNORECASE | re.MULTILINE,
-)
-
-_TABLE_HINTS = re.compile(
-    r"\|.+\||"         # markdown-like tables
-    r"(?:\S+\s+\S+\s+\S+){3,}",  # multiple columns by spacing (very rough)
-    re.MULTILINE,
-)
-
-_SENTENCE_END = re.compile(r"([\.!?])(\s+)")
+# Code/table detection: one pass over the lines, only str methods and linear regexes
+# (no nested quantifiers), so cost is O(len(text)) whatever the page contains.
+_HTTP_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+_API_WORDS = frozenset({
+    "limit", "offset", "cursor", "page", "pagetoken", "per_page", "maxresults",
+    "example", "examples", "parameter", "parameters",
+})
+_CODE_SYMBOLS = "{}[]();=<>"
+_DROP_CODE_SYMBOLS = str.maketrans("", "", _CODE_SYMBOLS)
+_WORD_PUNCT = ".,:;()[]{}\"'`"
+_CELL_GAP = re.compile(r"\t| {2,}")
+_NUMERIC_PUNCT = str.maketrans("", "", "%,.$-+:/")
+
+
+def _line_scores(line: str) -> Tuple[float, bool, bool]:
+    """
+    (code_score, strong_code, is_table_row) for one line.
+
+    Strong code: an HTTP request line, HTTP/1.x, Authorization:, ``` fences, JSON
+    structure lines. Weak (0.5 each, capped at 1): indentation, markdown headings,
+    symbol-dense text, key: value, API vocabulary (limit, cursor, ...); key=value
+    counts 1.
+    Table row: 2+ pipes, 3+ cells split by tabs/2+ spaces, or 3+ mostly numeric cells.
+    """
+    s = line.strip()
+    upper = s.upper()
+    first, _, rest = s.partition(" ")
+    strong = (
+        (first.upper() in _HTTP_METHODS and rest.startswith("/"))
+        or "HTTP/1." in upper
+        or "AUTHORIZATION:" in upper
+        or s.startswith("```")
+        or s[0] in "{[" or s in ("}", "]", "},", "],", "};")
+    )
+
+    weak = 0.0
+    if len(line) - len(line.lstrip()) >= 2:
+        weak += 0.5
+    if s.startswith("#") and s[1:2] in ("#", " "):
+        weak += 0.5
+    symbols = len(s) - len(s.translate(_DROP_CODE_SYMBOLS))
+    if symbols >= 2 and symbols >= 0.08 * len(s):
+        weak += 0.5
+    if "=" in first and not first.startswith("="):
+        weak += 1.0  # key=value / query strings: rare in prose
+    elif first.endswith(":") and rest and " " not in rest.strip():
+        weak += 0.5
+    if "BEARER " in upper or any(w.strip(_WORD_PUNCT).lower() in _API_WORDS for w in s.split()):
+        weak += 0.5
+    code = 1.0 if strong else min(1.0, weak)
+
+    cells = s.split()
+    table = (
+        s.count("|") >= 2
+        or len(_CELL_GAP.split(s)) >= 3
+        or (len(cells) >= 3 and sum(c.translate(_NUMERIC_PUNCT).isdigit() for c in cells) >= 0.6 * len(cells))
+    )
+    return code, strong, table
+
+
+def _classify_text(text: str) -> Tuple[bool, bool]:
+    """
+    (has_code, has_table) for a page, scoring every non-blank line once.
+
+    has_code: any strong code line, or code score >= max(2, 20% of lines).
+    has_table: table rows >= max(2, 20% of lines).
+    """
+    lines = code = tables = 0
+    strong_seen = False
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        lines += 1
+        score, strong, table = _line_scores(line)
+        code += score
+        strong_seen = strong_seen or strong
+        tables += table
+    if not lines:
+        return False, False
+    floor = max(2.0, 0.2 * lines)
+    return strong_seen or code >= floor, tables >= floor
+
+
 _MULTI_SPACE = re.compile(r"\s+")
 _DIGIT_ONLY_LINE = re.compile(r"^\s*\d+\s*$", re.MULTILINE)
 
@@ -74,11 +153,11 @@ class Chunk:
 
 
 def _looks_like_code(text: str) -> bool:
-    return bool(_CODE_HINTS.search(text))
+    return _classify_text(text)[0]
 
 
 def _looks_like_table(text: str) -> bool:
-    return bool(_TABLE_HINTS.search(text))
+    return _classify_text(text)[1]
 
 
 def _strip_page_numbers_top_bottom(text: str, max_lines: int = 3) -> str:
@@ -124,71 +203,17 @@ def _clean_text(raw: str, preserve_whitespace: bool = False) -> str:
     return text
 
 
-def _iter_selected_pages(reader: PdfReader, include_pages: Optional[str], exclude_pages: Optional[str]):
-    total_pages = len(reader.pages)
-    pages_to_process = compute_pages(
+def _selected_pages(reader: PdfReader, include_pages: Optional[str], exclude_pages: Optional[str]) -> List[int]:
+    return compute_pages(
         include_spec=include_pages,
         exclude_spec=exclude_pages,
-        total_pages=total_pages,
+        total_pages=len(reader.pages),
     )
-    for page_num in pages_to_process:
-        yield page_num, reader.pages[page_num - 1]  # library is 0-based; specs are 1-based
 
 
-def _sentence_aware_chunks(text: str, target: int, overlap: int, preserve_whitespace: bool) -> List[str]:
-    """
-    Split text near sentence boundaries; fallback to sliding window.
-    Character-based, but tries to end chunks after punctuation.
-    """
-    if not text:
-        return []
-
-    # Fast path: if preserve_whitespace (code/table), avoid smart splitting to not break blocks
-    if preserve_whitespace:
-        step = max(1, target - max(0, overlap))
-        return [text[i:i + target] for i in range(0, len(text), step)]
-
-    chunks: List[str] = []
-    buf: List[str] = []
-    length = 0
-
-    def flush():
-        nonlocal buf, length
-        if buf:
-            chunks.append("".join(buf).strip())
-            buf = []
-            length = 0
-
-    # Reinsert sentence boundaries as tokens to help chunking
-    tokens = _SENTENCE_END.split(text)
-    # tokens like [segment, '.', space, segment, '!', space, ...]
-
-    i = 0
-    while i < len(tokens):
-        seg = tokens[i]
-        i += 1
-        if i + 1 < len(tokens) and tokens[i] in (".", "!", "?"):
-            seg += tokens[i] + tokens[i + 1]  # include punctuation + following space
-            i += 2
-        if length + len(seg) > target and length >= max(1, target // 2):
-            flush()
-            # start new with overlap from previous
-            if overlap and chunks:
-                # take tail from last chunk as overlap (best-effort)
-                tail = chunks[-1][-overlap:]
-                if tail:
-                    buf.append(tail)
-                    length = len(tail)
-        buf.append(seg)
-        length += len(seg)
-
-    flush()
-
-    # Fallback if something odd happened
-    if not chunks:
-        step = max(1, target - max(0, overlap))
-        chunks = [text[i:i + target] for i in range(0, len(text), step)]
-    return [c for c in chunks if c]
+def _iter_selected_pages(reader: PdfReader, include_pages: Optional[str], exclude_pages: Optional[str]):
+    for page_num in _selected_pages(reader, include_pages, exclude_pages):
+        yield page_num, reader.pages[page_num - 1]  # library is 0-based; specs are 1-based
 
 
 def _make_chunk_hash(doc_id: str, page_span: Tuple[int, int], slice_text: str) -> str:
@@ -233,27 +258,209 @@ def load_pdf(
     """
     Return chunked text from the selected PDF pages, suitable for embedding.
 
-    NOTE: Simple character-based chunking without metadata (legacy behavior).
+    NOTE: Simple character windows (cut at word boundaries) without metadata (legacy behavior).
     Prefer load_pdf_structured(...) for retrieval/summarization pipelines.
     """
     reader = PdfReader(file_path)
     chunks: List[str] = []
-    step = max(1, chunk_size - max(0, chunk_overlap))
     for _, page in _iter_selected_pages(reader, include_pages, exclude_pages):
         text = _clean_text(page.extract_text() or "")
-        if not text:
-            continue
-        for i in range(0, len(text), step):
-            chunk = text[i:i + chunk_size]
-            if chunk:
-                chunks.append(chunk)
+        if text:
+            chunks.extend(split_chunks(text, chunk_size, chunk_overlap, breaks="lines"))
     return chunks
 
 
+# -----------------------------------
+# Outline (bookmarks) -> headings
+# -----------------------------------
+
+_SECTION_ID = re.compile(r"s\d+(?:\.\d+)*")
+
+
+def section_ancestors(section_id: str) -> List[str]:
+    """Outline section ids from the top level down ("s2.1.3" -> ["s2", "s2.1", "s2.1.3"]); else [section_id]."""
+    if not section_id:
+        return []
+    if not _SECTION_ID.fullmatch(section_id):
+        return [section_id]
+    parts = section_id[1:].split(".")
+    return ["s" + ".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+class OutlineIndex:
+    """
+    Page -> heading path, built once from the PDF outline.
+
+    Entries are (first_page, heading_path, section_id) sorted by page; a page
+    belongs to the last entry starting on or before it, so lookup is a bisect.
+    heading_path / section_id match the resolver signature of load_pdf_structured.
+    """
+
+    def __init__(self, entries: List[Tuple[int, List[str], str]]):
+        self._entries = sorted(entries, key=lambda e: e[0])  # stable: outline order within a page
+        self._starts = [e[0] for e in self._entries]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_reader(cls, reader) -> "OutlineIndex":
+        """Walk the (nested-list) outline iteratively; unreadable outlines give an empty index."""
+        try:
+            outline = reader.outline if hasattr(reader, "outline") else reader.outlines
+            page_of = getattr(reader, "get_destination_page_number", None) or reader.getDestinationPageNumber
+        except Exception as e:
+            log.warning(f"pdf outline unreadable ({e}); headings disabled")
+            return cls([])
+
+        entries: List[Tuple[int, List[str], str]] = []
+        # frame: [items, parent titles, parent numbers, siblings seen, last (titles, numbers)]
+        stack: List[list] = [[iter(outline or []), (), (), 0, None]]
+        while stack:
+            frame = stack[-1]
+            item = next(frame[0], None)
+            if item is None:
+                stack.pop()
+                continue
+            if isinstance(item, list):  # children of the previous entry
+                titles, numbers = frame[4] or (frame[1], frame[2])
+                stack.append([iter(item), titles, numbers, 0, None])
+                continue
+            frame[3] += 1
+            titles = frame[1] + (_MULTI_SPACE.sub(" ", str(getattr(item, "title", "") or "")).strip(),)
+            numbers = frame[2] + (frame[3],)
+            frame[4] = (titles, numbers)
+            try:
+                page_idx = page_of(item)
+            except Exception:
+                page_idx = None
+            if page_idx is not None and page_idx >= 0 and titles[-1]:
+                entries.append((page_idx + 1, [t for t in titles if t], "s" + ".".join(map(str, numbers))))
+        return cls(entries)
+
+    def _entry(self, page_num: int) -> Optional[Tuple[int, List[str], str]]:
+        i = bisect_right(self._starts, page_num) - 1
+        return self._entries[i] if i >= 0 else None
+
+    def heading_path(self, page_text: str, page_num: int) -> List[str]:
+        e = self._entry(page_num)
+        return list(e[1]) if e else []
+
+    def section_id(self, page_text: str, page_num: int) -> str:
+        e = self._entry(page_num)
+        return e[2] if e else ""
+
+
 # -----------------------------------
 # New structured API (preferred path)
 # -----------------------------------
 
+@dataclass
+class _PageText:
+    """One selected page after cleanup, with its page-level metadata."""
+    page_num: int
+    text: str
+    preserve_ws: bool
+    has_code: bool
+    has_table: bool
+    needs_layout: bool
+    heading_path: List[str]
+    section_id: str
+
+
+def _chunk_record(
+    doc_id: str,
+    idx: int,
+    text: str,
+    span: Tuple[int, int],
+    chars: Tuple[int, int],
+    *,
+    heading_path: List[str],
+    section_id: str,
+    has_code: bool,
+    has_table: bool,
+    needs_layout: bool,
+) -> Dict[str, Any]:
+    c_hash = _make_chunk_hash(doc_id, span, text)
+    return asdict(Chunk(
+        doc_id=doc_id,
+        chunk_id=f"{doc_id}:{span[0]}:{idx}:{c_hash[:8]}",
+        text=text,
+        page_start=span[0],
+        page_end=span[1],
+        char_start=chars[0],
+        char_end=chars[1],
+        heading_path=heading_path,
+        section_id=section_id or f"p{span[0]}",
+        has_code=has_code,
+        has_table=has_table,
+        needs_layout=needs_layout,
+        hash=c_hash,
+    ))
+
+
+def _chunk_page(pg: _PageText, doc_id: str, chunk_size: int, chunk_overlap: int, chunk_unit: str) -> List[Dict[str, Any]]:
+    """Per-page mode: every page boundary ends a chunk; offsets are within the page."""
+    # Sentence-aware chunking for prose; line-aware windows for code/tables
+    slices = split_text(
+        pg.text,
+        chunk_size,
+        chunk_overlap,
+        unit=chunk_unit,
+        breaks="lines" if pg.preserve_ws else "sentence",
+    )
+    return [
+        _chunk_record(
+            doc_id, idx, piece.text, (pg.page_num, pg.page_num), (piece.start, piece.end),
+            heading_path=pg.heading_path, section_id=pg.section_id,
+            has_code=pg.has_code, has_table=pg.has_table, needs_layout=pg.needs_layout,
+        )
+        for idx, piece in enumerate(slices)
+    ]
+
+
+def _chunk_run(
+    run: List[_PageText],
+    base: int,
+    doc_id: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str,
+    next_idx: Dict[int, int],
+) -> List[Dict[str, Any]]:
+    """
+    Cross-page mode: chunk consecutive pages of one kind (prose, or code/tables) as
+    one text. Page offsets map each chunk back to page_start/page_end; char offsets
+    are `base` + position in the joined run.
+    """
+    preserve = run[0].preserve_ws
+    sep = "\n" if preserve else " "
+    starts: List[int] = []
+    pos = 0
+    for pg in run:
+        starts.append(pos)
+        pos += len(pg.text) + len(sep)
+    text = sep.join(pg.text for pg in run)
+
+    out: List[Dict[str, Any]] = []
+    for piece in split_text(text, chunk_size, chunk_overlap, unit=chunk_unit,
+                            breaks="lines" if preserve else "sentence"):
+        first = bisect_right(starts, piece.start) - 1
+        last = bisect_right(starts, piece.end - 1) - 1
+        pages = run[first:last + 1]
+        page_start, page_end = pages[0].page_num, pages[-1].page_num
+        idx = next_idx.get(page_start, 0)
+        next_idx[page_start] = idx + 1
+        out.append(_chunk_record(
+            doc_id, idx, piece.text, (page_start, page_end), (base + piece.start, base + piece.end),
+            heading_path=pages[0].heading_path, section_id=pages[0].section_id,
+            has_code=any(p.has_code for p in pages),
+            has_table=any(p.has_table for p in pages),
+            needs_layout=all(p.needs_layout for p in pages),
+        ))
+    return out
+
+
 def load_pdf_structured(
     file_path: str,
     *,
@@ -262,9 +469,13 @@ def load_pdf_structured(
     exclude_pages: Optional[str] = None,
     chunk_size: int = 1200,
     chunk_overlap: int = 150,
+    chunk_unit: str = "chars",
+    cross_pages: bool = False,
     heading_resolver=None,
     section_resolver=None,
+    use_outline: bool = True,
     layout_threshold_chars: int = 60,
+    on_page=None,
 ) -> List[Dict[str, Any]]:
     """
     Return chunked text with metadata, suitable for RAG and topic-focused summarization.
@@ -274,33 +485,61 @@ def load_pdf_structured(
         doc_id: stable identifier for the document (used in chunk ids & hashing).
         include_pages: e.g., "1-5,10,20-25" (takes precedence if provided).
         exclude_pages: e.g., "2,15-18" (applied after include or over full range).
-        chunk_size: target characters per chunk (sentence-aware for prose).
-        chunk_overlap: characters to overlap between chunks.
+        chunk_size: max units per chunk (sentence-aware for prose, line-aware for code/tables).
+        chunk_overlap: units to overlap between chunks.
+        chunk_unit: "chars" (default), "tokens" or "words" (see chunker.split_text).
+        cross_pages: chunk across page boundaries. Consecutive pages of the same kind
+            (prose vs code/table) are chunked as one text, so short pages merge and
+            sentences spanning a page break stay whole; page_start/page_end give the
+            span, heading/section come from page_start, and char offsets are into the
+            selected pages' cleaned text (runs counted back to back, 2 chars apart).
+            Default False: one page never shares a chunk with another.
         heading_resolver: optional callable (page_text, page_idx) -> List[str] heading_path
         section_resolver: optional callable (page_text, page_idx) -> str section_id
+        use_outline: default either resolver that is None from the PDF outline
+            (OutlineIndex); no effect when the PDF has no outline.
         layout_threshold_chars: if a page extracts fewer chars than this, mark needs_layout=True.
+        on_page: optional callable (page_num, selected_pages) invoked after each selected
+            page is processed (including empty pages); used for live ingest progress.
 
     Returns:
         List[dict] where each dict has keys of Chunk dataclass.
     """
     reader = PdfReader(file_path)
     results: List[Dict[str, Any]] = []
-
-    for page_num, page in _iter_selected_pages(reader, include_pages, exclude_pages):
+    selected = _selected_pages(reader, include_pages, exclude_pages)
+    if use_outline and (heading_resolver is None or section_resolver is None):
+        outline = OutlineIndex.from_reader(reader)
+        if len(outline):
+            heading_resolver = heading_resolver or outline.heading_path
+            section_resolver = section_resolver or outline.section_id
+
+    # cross-page mode state: the current run of same-kind pages
+    run: List[_PageText] = []
+    run_base = 0
+    next_idx: Dict[int, int] = {}
+
+    def flush_run() -> None:
+        nonlocal run, run_base
+        if run:
+            results.extend(_chunk_run(run, run_base, doc_id, chunk_size, chunk_overlap, chunk_unit, next_idx))
+            run_base += sum(len(pg.text) + 1 for pg in run) + 1
+            run = []
+
+    for page_num in selected:
+        page = reader.pages[page_num - 1]  # library is 0-based; specs are 1-based
         raw = page.extract_text() or ""
         # Heuristics: detect code/table BEFORE cleanup to decide whitespace policy
-        pre_has_code = _looks_like_code(raw)
-        pre_has_table = _looks_like_table(raw)
+        pre_has_code, pre_has_table = _classify_text(raw)
         preserve_ws = bool(pre_has_code or pre_has_table)
 
         cleaned = _clean_text(raw, preserve_whitespace=preserve_ws)
         if not cleaned:
+            if callable(on_page):
+                on_page(page_num, len(selected))
             continue
 
-        # Decide needs_layout: extremely short pages often indicate extraction issues
-        needs_layout = len(cleaned) < layout_threshold_chars
-
-        # Resolve headings/sections if caller provided resolvers; fallback to simple guesses
+        # Resolve headings/sections (caller's resolvers or the outline); fallback to simple guesses
         heading_path = []
         if callable(heading_resolver):
             try:
@@ -314,42 +553,26 @@ def load_pdf_structured(
             except Exception:
                 section_id = ""
 
-        # Sentence-aware chunking for prose; sliding window for code/tables
-        slices = _sentence_aware_chunks(
-            cleaned,
-            target=chunk_size,
-            overlap=chunk_overlap,
-            preserve_whitespace=preserve_ws,
+        pg = _PageText(
+            page_num=page_num,
+            text=cleaned,
+            preserve_ws=preserve_ws,
+            has_code=pre_has_code,
+            has_table=pre_has_table,
+            # Decide needs_layout: extremely short pages often indicate extraction issues
+            needs_layout=len(cleaned) < layout_threshold_chars,
+            heading_path=heading_path,
+            section_id=section_id,
         )
+        if not cross_pages:
+            results.extend(_chunk_page(pg, doc_id, chunk_size, chunk_overlap, chunk_unit))
+        else:
+            if run and run[0].preserve_ws != preserve_ws:
+                flush_run()
+            run.append(pg)
 
-        page_has_code = pre_has_code or any(_looks_like_code(s) for s in slices[:2])
-        page_has_table = pre_has_table or any(_looks_like_table(s) for s in slices[:2])
-
-        # Build chunk objects
-        char_cursor = 0
-        for idx, slice_text in enumerate(slices):
-            char_start = char_cursor
-            char_end = char_cursor + len(slice_text)
-            char_cursor = char_end  # local counter within this page's cleaned text
-
-            c_hash = _make_chunk_hash(doc_id, (page_num, page_num), slice_text)
-            chunk_id = f"{doc_id}:{page_num}:{idx}:{c_hash[:8]}"
-
-            ch = Chunk(
-                doc_id=doc_id,
-                chunk_id=chunk_id,
-                text=slice_text,
-                page_start=page_num,
-                page_end=page_num,
-                char_start=char_start,
-                char_end=char_end,
-                heading_path=heading_path,
-                section_id=section_id or f"p{page_num}",
-                has_code=page_has_code,
-                has_table=page_has_table,
-                needs_layout=needs_layout,
-                hash=c_hash,
-            )
-            results.append(asdict(ch))
+        if callable(on_page):
+            on_page(page_num, len(selected))
 
+    flush_run()
     return results
@@ -0,0 +1,205 @@
+# src/learning_mcp/plan_cache.py
+"""
+Persistent cache of accepted API plans (plan_api_call / plan_with_autogen).
+
+Purpose:
+- An accepted plan costs up to MAX_LOOPS x (planner + repair + critic) LLM calls,
+  and the same goals come back ("enable audio on camera"). A cached plan is
+  returned in milliseconds instead.
+- Entries are keyed by
+    goal          : normalized (case, whitespace and surrounding punctuation folded)
+    profile
+    hints version : hash of the profile's autogen_hints (templates, allow_pattern, ...)
+    generation    : the profile's ingest history (collection_generation), so every
+                    re-ingest of the collection retires the plans built on it
+  A lookup with a newer hints version or generation is a miss, and the profile's
+  stale rows are dropped when the fresh plan is stored. While an ingest of the
+  profile is running, or when there is no jobs DB to read it from, the
+  generation is unknown (None) and the cache is bypassed.
+- Lookups, hits and the LLM calls each hit saved are counted per profile and
+  persisted with the plans (stats()).
+
+Config (env):
+    PLAN_CACHE=1                                   # 0 disables lookups and stores
+    PLAN_CACHE_PATH=/app/state/plan_cache.sqlite
+
+Usage (planner):
+    cache = get_plan_cache()
+    gen = await retriever.generation(profile)
+    hit = cache.get(goal, profile, hints_version(hints), gen)      # result dict or None
+    cache.put(goal, profile, hints_version(hints), gen, result, llm_calls=4)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, Optional
+
+ENABLED = os.getenv("PLAN_CACHE", "1") not in ("0", "false", "False")
+DB_PATH = os.getenv("PLAN_CACHE_PATH", "/app/state/plan_cache.sqlite")
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS plans (
+        profile TEXT NOT NULL,
+        goal TEXT NOT NULL,
+        hints_version TEXT NOT NULL,
+        generation TEXT NOT NULL,
+        result TEXT NOT NULL,
+        llm_calls INTEGER NOT NULL DEFAULT 0,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at REAL,
+        last_hit_at REAL,
+        PRIMARY KEY (profile, goal, hints_version)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS plan_cache_stats (
+        profile TEXT PRIMARY KEY,
+        lookups INTEGER NOT NULL DEFAULT 0,
+        hits INTEGER NOT NULL DEFAULT 0,
+        saved_llm_calls INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+_EDGE_PUNCT = re.compile(r"^[\W_]+|[\W_]+$")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_goal(goal: str) -> str:
+    """'  Enable AUDIO on camera! ' -> 'enable audio on camera'."""
+    text = unicodedata.normalize("NFKC", goal or "").casefold()
+    return _EDGE_PUNCT.sub("", _SPACE.sub(" ", text).strip())
+
+
+def hints_version(hints: Optional[Dict[str, Any]]) -> str:
+    """Short, order-independent hash of a profile's autogen_hints."""
+    blob = json.dumps(hints or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def collection_generation(jobs: Iterable[Dict[str, Any]]) -> Optional[str]:
+    """
+    Generation of a profile's collection from its recent ingest jobs (newest first,
+    as /jobs and JobsDB.list_jobs return them): a hash of the jobs that have
+    started, so any new ingest changes it. None while one is still running.
+    """
+    started = []
+    for job in jobs:
+        status = str(job.get("status") or "")
+        if status == "running":
+            return None
+        if status and status != "queued":
+            started.append(str(job.get("job_id")))
+    if not started:
+        return "0"
+    return hashlib.sha1("|".join(sorted(started)).encode("utf-8")).hexdigest()[:16]
+
+
+class PlanCache:
+    """SQLite-backed plan cache; safe to share between threads."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DB_PATH
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+
+    def get(self, goal: str, profile: str, hints_ver: str, generation: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The cached result for this goal, or None (counts a lookup; a hit also counts saved LLM calls)."""
+        if generation is None:
+            return None
+        key = (profile, normalize_goal(goal), hints_ver)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT generation, result, llm_calls FROM plans WHERE profile=? AND goal=? AND hints_version=?", key,
+            ).fetchone()
+            hit = row is not None and row[0] == generation
+            saved = int(row[2]) if hit else 0
+            self._conn.execute(
+                "INSERT INTO plan_cache_stats (profile, lookups, hits, saved_llm_calls) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(profile) DO UPDATE SET lookups=lookups+1, hits=hits+excluded.hits, "
+                "saved_llm_calls=saved_llm_calls+excluded.saved_llm_calls",
+                (profile, int(hit), saved),
+            )
+            if not hit:
+                return None
+            self._conn.execute(
+                "UPDATE plans SET hits=hits+1, last_hit_at=? WHERE profile=? AND goal=? AND hints_version=?",
+                (time.time(), *key),
+            )
+        return json.loads(row[1])
+
+    def put(
+        self,
+        goal: str,
+        profile: str,
+        hints_ver: str,
+        generation: Optional[str],
+        result: Dict[str, Any],
+        llm_calls: int,
+    ) -> None:
+        """Store an accepted result; drops the profile's rows from older generations/hints."""
+        if generation is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM plans WHERE profile=? AND (generation!=? OR hints_version!=?)",
+                (profile, generation, hints_ver),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (profile, goal, hints_version, generation, result, llm_calls, hits, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (profile, normalize_goal(goal), hints_ver, generation,
+                 json.dumps(result, ensure_ascii=False, default=str), int(llm_calls), time.time()),
+            )
+
+    def stats(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        """{lookups, hits, hit_rate, saved_llm_calls, entries}, for one profile or all."""
+        where, args = ("WHERE profile=?", (profile,)) if profile else ("", ())
+        with self._lock:
+            lookups, hits, saved = self._conn.execute(
+                f"SELECT COALESCE(SUM(lookups),0), COALESCE(SUM(hits),0), COALESCE(SUM(saved_llm_calls),0) "
+                f"FROM plan_cache_stats {where}", args,
+            ).fetchone()
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM plans {where}", args).fetchone()[0]
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_llm_calls": saved,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_CACHES: Dict[str, PlanCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_plan_cache(db_path: Optional[str] = None) -> Optional[PlanCache]:
+    """The shared cache for db_path; None when PLAN_CACHE=0."""
+    if not ENABLED:
+        return None
+    key = db_path or DB_PATH
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = PlanCache(key)
+        return cache
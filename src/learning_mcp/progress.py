@@ -0,0 +1,265 @@
+# src/learning_mcp/progress.py
+"""
+Live ingest progress (files / pages / chunks, throughput, ETA, phase timings).
+
+Purpose:
+- One IngestProgress per job; loaders, the embedder and the upserter report
+  into it through small callbacks, and it pushes flat column updates to a sink
+  (normally AsyncJobStore.update_progress, which coalesces the writes).
+- Thread-safe: loader callbacks may fire from worker threads.
+
+Reported fields (jobs table columns):
+    files_done, pages_done, current_file, current_page, current_file_pages,
+    chunks_total, chunks_embedded, chunks_done (= upserted),
+    chunks_per_min (rolling window over embedded chunks), eta_seconds,
+    phase_durations (JSON: {"extract": s, "embed": s, ...})
+
+Example:
+    progress = IngestProgress(files_total=2, pages_total=40,
+                              sink=lambda f: store.update_progress(job_id, **f))
+    progress.enter_phase("extract")
+    chunks, _ = collect_chunks(prof, chunk_size=600, chunk_overlap=200, progress=progress)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+RATE_WINDOW_S = float(os.getenv("INGEST_RATE_WINDOW_S", "60"))
+
+# Share of overall completion attributed to each phase (used for pct)
+_PHASE_WEIGHTS = {"extract": 20, "embed": 70, "upsert": 10}
+
+Sink = Callable[[Dict[str, Any]], None]
+
+
+class IngestProgress:
+    """Counters + rolling throughput for a single ingest job."""
+
+    def __init__(
+        self,
+        *,
+        files_total: int = 0,
+        pages_total: int = 0,
+        sink: Optional[Sink] = None,
+        window_s: float = RATE_WINDOW_S,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.files_total = int(files_total or 0)
+        self.pages_total = int(pages_total or 0)
+        self._sink = sink
+        self._window_s = max(1.0, window_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.files_done = 0
+        self.pages_done = 0
+        self.current_file: Optional[str] = None
+        self.current_page: Optional[int] = None
+        self.current_file_pages: Optional[int] = None
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.chunks_done = 0
+
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._window_sum = 0
+        self._phase: Optional[str] = None
+        self._phase_started: Optional[float] = None
+        self._durations: Dict[str, float] = {}
+
+    # ---------- phases ----------
+    def enter_phase(self, phase: Any) -> None:
+        """Close the running phase timer (if any) and start timing `phase`."""
+        name = getattr(phase, "value", phase)
+        with self._lock:
+            self._close_phase_locked()
+            self._phase = str(name)
+            self._phase_started = self._clock()
+        self._emit("phase_durations")
+
+    def finish(self) -> None:
+        """Stop the phase timer; ETA drops to 0."""
+        with self._lock:
+            self._close_phase_locked()
+            self._phase = None
+        self._emit("phase_durations", "eta_seconds")
+
+    # ---------- loaders ----------
+    def start_file(self, path: str, pages: Optional[int] = None) -> None:
+        with self._lock:
+            self.current_file = path
+            self.current_file_pages = pages
+            self.current_page = None
+        self._emit("current_file", "current_file_pages", "current_page")
+
+    def page_done(self, page_num: int, selected_pages: Optional[int] = None) -> None:
+        with self._lock:
+            self.pages_done += 1
+            self.current_page = page_num
+            if selected_pages is not None:
+                self.current_file_pages = selected_pages
+        self._emit("pages_done", "current_page", "current_file_pages")
+
+    def file_done(self) -> None:
+        with self._lock:
+            self.files_done += 1
+        self._emit("files_done")
+
+    # ---------- embed / upsert ----------
+    def set_chunks_total(self, n: int) -> None:
+        with self._lock:
+            self.chunks_total = int(n)
+        self._emit("chunks_total", "eta_seconds")
+
+    def chunks_embedded_add(self, n: int = 1) -> None:
+        if n <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            self.chunks_embedded = min(self.chunks_embedded + n, self.chunks_total or self.chunks_embedded + n)
+            self._events.append((now, n))
+            self._window_sum += n
+            self._trim_locked(now)
+        self._emit("chunks_embedded", "chunks_per_min", "eta_seconds")
+
+    def chunks_upserted_add(self, n: int) -> None:
+        if n <= 0:
+            return
+        with self._lock:
+            self.chunks_done = min(self.chunks_done + n, self.chunks_total or self.chunks_done + n)
+        self._emit("chunks_done", "eta_seconds")
+
+    def restore(
+        self,
+        *,
+        files_done: Optional[int] = None,
+        pages_done: Optional[int] = None,
+        chunks_done: Optional[int] = None,
+    ) -> None:
+        """Seed counters with work a resumed job already completed (no rate events)."""
+        with self._lock:
+            if files_done is not None:
+                self.files_done = int(files_done)
+            if pages_done is not None:
+                self.pages_done = int(pages_done)
+            if chunks_done is not None:
+                self.chunks_embedded = self.chunks_done = int(chunks_done)
+        self._emit("files_done", "pages_done", "chunks_embedded", "chunks_done", "eta_seconds")
+
+    # ---------- derived ----------
+    def chunks_per_min(self) -> Optional[float]:
+        with self._lock:
+            return self._rate_locked(self._clock())
+
+    def eta_seconds(self) -> Optional[float]:
+        """Seconds left for embedding (the dominant phase) at the rolling rate."""
+        with self._lock:
+            return self._eta_locked(self._clock())
+
+    def phase_durations(self) -> Dict[str, float]:
+        with self._lock:
+            return self._durations_locked(self._clock())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All progress columns as they would be written to the jobs table."""
+        return self._fields(None)
+
+    # ---------- internal ----------
+    def _emit(self, *names: str) -> None:
+        if self._sink is None:
+            return
+        self._sink(self._fields(names))
+
+    def _fields(self, names: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            values: Dict[str, Callable[[], Any]] = {
+                "files_done": lambda: self.files_done,
+                "pages_done": lambda: self.pages_done,
+                "current_file": lambda: self.current_file,
+                "current_page": lambda: self.current_page,
+                "current_file_pages": lambda: self.current_file_pages,
+                "chunks_total": lambda: self.chunks_total,
+                "chunks_embedded": lambda: self.chunks_embedded,
+                "chunks_done": lambda: self.chunks_done,
+                "chunks_per_min": lambda: self._rate_locked(now),
+                "eta_seconds": lambda: self._eta_locked(now),
+                "phase_durations": lambda: json.dumps(self._durations_locked(now)),
+            }
+            keys = names if names is not None else tuple(values)
+            return {k: values[k]() for k in keys}
+
+    def _trim_locked(self, now: float) -> None:
+        cutoff = now - self._window_s
+        while self._events and self._events[0][0] < cutoff:
+            self._window_sum -= self._events.popleft()[1]
+
+    def _rate_locked(self, now: float) -> Optional[float]:
+        self._trim_locked(now)
+        if not self._events:
+            return None
+        # Span from the oldest event in the window; at least 1s to avoid spikes
+        span = max(1.0, now - self._events[0][0])
+        return round(self._window_sum * 60.0 / span, 2)
+
+    def _eta_locked(self, now: float) -> Optional[float]:
+        if self._phase is None and self.chunks_total and self.chunks_done >= self.chunks_total:
+            return 0.0
+        if not self.chunks_total:
+            return None
+        rate = self._rate_locked(now)
+        if not rate:
+            return None
+        remaining = max(0, self.chunks_total - self.chunks_embedded)
+        return round(remaining * 60.0 / rate, 1)
+
+    def _durations_locked(self, now: float) -> Dict[str, float]:
+        out = dict(self._durations)
+        if self._phase is not None and self._phase_started is not None:
+            out[self._phase] = round(out.get(self._phase, 0.0) + (now - self._phase_started), 3)
+        return out
+
+    def _close_phase_locked(self) -> None:
+        if self._phase is not None and self._phase_started is not None:
+            elapsed = self._clock() - self._phase_started
+            self._durations[self._phase] = round(self._durations.get(self._phase, 0.0) + elapsed, 3)
+        self._phase_started = None
+
+
+def job_pct(job: Dict[str, Any]) -> int:
+    """
+    Overall completion 0..100 from a jobs row, weighting phases by typical cost
+    (extract 20%, embed 70%, upsert 10%). Completed jobs are always 100.
+    """
+    if job.get("status") == "completed":
+        return 100
+
+    def frac(done: Any, total: Any) -> float:
+        try:
+            done, total = float(done or 0), float(total or 0)
+        except (TypeError, ValueError):
+            return 0.0
+        return min(1.0, done / total) if total > 0 else 0.0
+
+    phase = job.get("phase")
+    chunks_total = job.get("chunks_total") or 0
+    if job.get("pages_total"):
+        extract = frac(job.get("pages_done"), job.get("pages_total"))
+    else:
+        extract = frac(job.get("files_done"), job.get("files_total"))
+    if phase in ("embed", "upsert", "finished"):
+        extract = 1.0
+    embed = frac(job.get("chunks_embedded"), chunks_total)
+    upsert = frac(job.get("chunks_done"), chunks_total)
+
+    pct = (
+        _PHASE_WEIGHTS["extract"] * extract
+        + _PHASE_WEIGHTS["embed"] * embed
+        + _PHASE_WEIGHTS["upsert"] * upsert
+    )
+    return max(0, min(99, int(pct)))
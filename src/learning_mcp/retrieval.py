@@ -0,0 +1,259 @@
+# src/learning_mcp/retrieval.py
+"""
+Retrieval for the API planner: profile hints + api_context search, in-process.
+
+Purpose:
+- The autogen planner used to reach its own server over HTTP for every step:
+  GET /config/profile/{name} for hints and POST /search/api_context per query,
+  each through a fresh httpx.AsyncClient (connect, JSON encode/decode, routing).
+- LocalRetriever does the same work in-process:
+    config   : learning.yaml via config.load_profiles_cached (re-read on change)
+    embedder : one Embedder + VDB per profile, shared process-wide (registry
+               below) and rebuilt when the profile's embedding/vectordb config
+               changes, so the planner's searches reuse one HTTP client
+    results  : search_routes.query_hits + format_hits, i.e. exactly the dicts
+               /search/api_context returns
+- HttpRetriever keeps the HTTP path for deployments where the planner runs away
+  from the index; it holds one client for its lifetime.
+- search_many() runs a loop's queries together under one time budget:
+    local : one embed batch (concurrent embed_query calls when hedging is on)
+            and one Qdrant query_batch_points round trip
+    http  : concurrent POSTs; queries still running at the deadline are dropped
+  merge_hits() folds the results into the planner's evidence, one entry per
+  chunk with its best score.
+- generation() identifies the profile's current ingest (plan_cache): the local
+  jobs DB, or GET /jobs on the remote server. None when it cannot be told.
+
+Usage:
+    retriever = LocalRetriever()                      # or HttpRetriever(base_url)
+    hints = await retriever.hints("dahua-camera")
+    hits = await retriever.search("enable audio", "dahua-camera", top_k=8)
+    per_query = await retriever.search_many(["audio", "AudioEnable"], "dahua-camera", timeout_s=15)
+    evidence = merge_hits(evidence, *per_query)       # {chunk key: hit}
+    await retriever.close()                           # shared embedders stay open
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .config import load_profiles_cached
+from .embeddings import Embedder, EmbeddingConfig
+from .jobs_db import DB_PATH as JOBS_DB_PATH, JobsDB
+from .plan_cache import collection_generation
+from .search_routes import format_hits, query_hits, query_hits_batch
+from .vdb import VDB
+
+log = logging.getLogger("learning_mcp.retrieval")
+
+
+# ---------- shared per-profile resources ----------
+
+@dataclass
+class _Resources:
+    fingerprint: str
+    embedder: Embedder
+    vdb: VDB
+    loop: asyncio.AbstractEventLoop
+
+
+_REGISTRY: Dict[str, _Resources] = {}
+
+
+def _profile(name: str) -> Dict[str, Any]:
+    profiles = load_profiles_cached()
+    return next((p for p in profiles.get("profiles", []) if p.get("name") == name), {}) or {}
+
+
+def _fingerprint(prof: Dict[str, Any]) -> str:
+    return json.dumps(
+        {"embedding": prof.get("embedding"), "vectordb": prof.get("vectordb")}, sort_keys=True, default=str,
+    )
+
+
+def profile_resources(name: str) -> Tuple[Embedder, VDB]:
+    """
+    The shared (Embedder, VDB) for a profile on the running event loop.
+    Built on first use; rebuilt when the profile's embedding/vectordb config
+    changes or the caller runs on another loop (an Embedder's client is loop-bound).
+    """
+    prof = _profile(name)
+    fp = _fingerprint(prof)
+    loop = asyncio.get_running_loop()
+    res = _REGISTRY.get(name)
+    if res is not None and res.fingerprint == fp and res.loop is loop:
+        return res.embedder, res.vdb
+    if res is not None and res.loop is loop:
+        loop.create_task(res.embedder.close())  # config changed: retire the old client
+
+    ecfg = EmbeddingConfig.from_profile(prof)
+    vcfg = prof.get("vectordb", {}) or {}
+    vdb = VDB(
+        url=vcfg.get("url"),
+        collection=vcfg.get("collection"),
+        dim=ecfg.dim,
+        distance=(vcfg.get("distance") or "cosine"),
+    )
+    _REGISTRY[name] = _Resources(fp, Embedder(ecfg), vdb, loop)
+    return _REGISTRY[name].embedder, vdb
+
+
+async def close_profile_resources() -> None:
+    """Close the shared embedders owned by the running loop (shutdown, tests)."""
+    loop = asyncio.get_running_loop()
+    for name, res in list(_REGISTRY.items()):
+        if res.loop is loop:
+            del _REGISTRY[name]
+            await res.embedder.close()
+
+
+# ---------- results ----------
+
+def hit_key(hit: Dict[str, Any]) -> str:
+    """Identity of a result across queries and loops (chunk id, else point id)."""
+    return str(hit.get("chunk_id") or hit.get("id") or hit.get("snippet"))
+
+
+def merge_hits(merged: Optional[Dict[str, Dict[str, Any]]], *hit_lists: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Fold result lists into `merged` ({hit_key: hit}), keeping each chunk's highest-scoring hit."""
+    merged = {} if merged is None else merged
+    for hits in hit_lists:
+        for h in hits or []:
+            key = hit_key(h)
+            prev = merged.get(key)
+            if prev is None or float(h.get("score") or 0.0) > float(prev.get("score") or 0.0):
+                merged[key] = h
+    return merged
+
+
+def ranked(merged: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merged hits, best score first."""
+    return sorted(merged.values(), key=lambda h: float(h.get("score") or 0.0), reverse=True)
+
+
+# ---------- retrievers ----------
+
+class LocalRetriever:
+    """Hints and search without leaving the process."""
+
+    async def hints(self, profile: str) -> Dict[str, Any]:
+        return _profile(profile).get("autogen_hints") or {}
+
+    async def search(self, q: str, profile: str, top_k: int = 8, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        emb, vdb = profile_resources(profile)
+        qvec = await emb.embed_query(q)
+        # qdrant_client is synchronous: keep the loop free while it waits
+        hits = await asyncio.to_thread(query_hits, vdb, qvec, profile, top_k, section)
+        return format_hits(hits)
+
+    async def search_many(
+        self,
+        queries: List[str],
+        profile: str,
+        top_k: int = 8,
+        section: Optional[str] = None,
+        timeout_s: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        One result list per query, from a single embed batch and a single batched
+        KNN. Past `timeout_s` the whole batch is given up (empty lists).
+        """
+        if not queries:
+            return []
+        emb, vdb = profile_resources(profile)
+
+        async def run() -> List[List[Dict[str, Any]]]:
+            if emb.cfg.hedge:
+                # hedging is per request: keep each query's own race
+                qvecs = list(await asyncio.gather(*(emb.embed_query(q) for q in queries)))
+            else:
+                qvecs = await emb.embed_array(list(queries))
+            batches = await asyncio.to_thread(query_hits_batch, vdb, qvecs, profile, top_k, section)
+            return [format_hits(hits) for hits in batches]
+
+        try:
+            return await asyncio.wait_for(run(), timeout_s)
+        except asyncio.TimeoutError:
+            log.warning("retrieval.search_many timed out after %.1fs (%d queries)", timeout_s or 0.0, len(queries))
+            return [[] for _ in queries]
+
+    async def generation(self, profile: str) -> Optional[str]:
+        """Ingest generation of the profile's collection from the jobs DB (None without one: bypass the cache)."""
+        if not os.path.exists(JOBS_DB_PATH):
+            return None  # the collection may still be re-ingested by something that creates no DB
+
+        def read() -> Optional[str]:
+            return collection_generation(JobsDB(JOBS_DB_PATH).list_jobs(profile=profile, limit=20))
+
+        return await asyncio.to_thread(read)
+
+    async def close(self) -> None:
+        """Nothing to release: the embedders belong to the shared registry."""
+
+
+class HttpRetriever:
+    """The same interface over a (remote) job server's /config and /search routes."""
+
+    def __init__(self, base_url: str, timeout_s: float = 90.0):
+        self._client = httpx.AsyncClient(base_url=base_url.rstrip("/"), timeout=httpx.Timeout(timeout_s))
+
+    async def hints(self, profile: str) -> Dict[str, Any]:
+        r = await self._client.get(f"/config/profile/{profile}")
+        r.raise_for_status()
+        prof = (r.json() or {}).get("profile") or {}
+        return prof.get("autogen_hints") or {}
+
+    async def search(self, q: str, profile: str, top_k: int = 8, section: Optional[str] = None) -> List[Dict[str, Any]]:
+        payload: Dict[str, Any] = {"q": q, "profile": profile, "top_k": top_k, "read_only": True}
+        if section:
+            payload["section"] = section
+        r = await self._client.post("/search/api_context", json=payload)
+        r.raise_for_status()
+        return (r.json() or {}).get("results") or []
+
+    async def search_many(
+        self,
+        queries: List[str],
+        profile: str,
+        top_k: int = 8,
+        section: Optional[str] = None,
+        timeout_s: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Concurrent searches, one result list per query. Queries that fail, or are
+        still running after `timeout_s`, contribute an empty list.
+        """
+        if not queries:
+            return []
+        tasks = [asyncio.ensure_future(self.search(q, profile, top_k=top_k, section=section)) for q in queries]
+        _, pending = await asyncio.wait(tasks, timeout=timeout_s)
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            log.warning("retrieval.search_many dropped %d/%d queries at the %.1fs budget", len(pending), len(tasks), timeout_s or 0.0)
+        out: List[List[Dict[str, Any]]] = []
+        for q, t in zip(queries, tasks):
+            if t in pending:
+                out.append([])
+            elif t.exception() is not None:
+                log.warning("retrieval.search failed for %r: %s", q[:60], t.exception())
+                out.append([])
+            else:
+                out.append(t.result())
+        return out
+
+    async def generation(self, profile: str) -> Optional[str]:
+        r = await self._client.get("/jobs", params={"profile": profile, "limit": 20})
+        r.raise_for_status()
+        return collection_generation(r.json() or [])
+
+    async def close(self) -> None:
+        await self._client.aclose()
@@ -22,6 +22,7 @@ class SearchRequest(BaseModel):
     q: str = Field(..., description="Query text")
     profile: str = Field(..., description="Profile name; also used as doc_id filter")
     top_k: int = Field(8, ge=1, le=100)
+    section: Optional[str] = Field(None, description="Scope to a PDF outline section (e.g. 's3' includes 's3.1')")
     read_only: bool = Field(True, description="No side effects; for logging/hints")
 
 
@@ -91,52 +92,80 @@ def _method_hint_from_text(text: str) -> Optional[str]:
     return "GET"
 
 
+def query_hits(vdb: VDB, qvec: Any, profile: str, top_k: int, section: Optional[str] = None) -> List[Any]:
+    """KNN hits for a profile (doc_id filter, legacy 'profile' fallback), optionally scoped to a section."""
+    scope = {"sections": section} if section else {}
+    # Primary: filter by canonical doc_id
+    hits = vdb.search(qvec, top_k=top_k, filter_by={"doc_id": profile, **scope})
+    if not hits:
+        # Legacy fallback for older ingests that only stored 'profile'
+        hits = vdb.search(qvec, top_k=top_k, filter_by={"profile": profile, **scope})
+        if hits:
+            log.warning("search.legacy_fallback profile=%s used=profile missing=doc_id", profile)
+    return hits
+
+
+def query_hits_batch(
+    vdb: VDB, qvecs: Any, profile: str, top_k: int, section: Optional[str] = None,
+) -> List[List[Any]]:
+    """query_hits for several vectors: one batched KNN, one more for the legacy fallback if needed."""
+    scope = {"sections": section} if section else {}
+    batches = vdb.search_batch(qvecs, top_k=top_k, filter_by={"doc_id": profile, **scope})
+    empty = [i for i, hits in enumerate(batches) if not hits]
+    if empty:
+        legacy = vdb.search_batch([qvecs[i] for i in empty], top_k=top_k, filter_by={"profile": profile, **scope})
+        for i, hits in zip(empty, legacy):
+            batches[i] = hits
+        if any(legacy):
+            log.warning("search.legacy_fallback profile=%s used=profile missing=doc_id", profile)
+    return batches
+
+
+def format_hits(hits: List[Any]) -> List[Dict[str, Any]]:
+    """ScoredPoints -> api_context result dicts (snippet + best-effort planner hints)."""
+    results: List[Dict[str, Any]] = []
+    for pt in hits:
+        payload = getattr(pt, "payload", {}) or {}
+        txt = payload.get("text") or ""
+        snippet = txt[:360] + ("…" if len(txt) > 360 else "")
+
+        # Optional best-effort hints for planners
+        url_candidates = _extract_url_candidates(snippet)
+        method_hint = _method_hint_from_text(snippet)
+        query_candidates = _extract_query_candidates(snippet)
+
+        results.append({
+            "id": getattr(pt, "id", None),
+            "score": float(getattr(pt, "score", 0.0) or 0.0),
+            "doc_id": payload.get("doc_id") or payload.get("profile"),
+            "chunk_id": payload.get("chunk_id") or payload.get("hash") or getattr(pt, "id", None),
+            "doc_path": payload.get("doc_path"),
+            "chunk_idx": payload.get("chunk_idx"),
+            "section": payload.get("section"),
+            "title": payload.get("title"),
+            "snippet": snippet,
+            "hints": {
+                "url_candidates": url_candidates or None,
+                "method_hint": method_hint,
+                "query_candidates": (query_candidates or None),
+            },
+        })
+    return results
+
+
 @router.post("/search/api_context", response_model=SearchResponse, tags=["search"])
 async def api_context(body: SearchRequest = Body(...)) -> SearchResponse:
     """
     Dense semantic search over the profile's collection.
-    Returns minimal fields + optional 'hints' used by AutoGen planners.
+    Returns minimal fields + optional 'hints' used by AutoGen planners
+    (in-process callers: learning_mcp.retrieval).
     """
     emb = _build_embedder(body.profile)
     vdb = _build_vdb(body.profile)
     
     try:
-        qvec = (await emb.embed([body.q]))[0]
-
-        # Primary: filter by canonical doc_id
-        hits = vdb.search(qvec, top_k=body.top_k, filter_by={"doc_id": body.profile})
-        if not hits:
-            # Legacy fallback for older ingests that only stored 'profile'
-            hits = vdb.search(qvec, top_k=body.top_k, filter_by={"profile": body.profile})
-            if hits:
-                log.warning("search.legacy_fallback profile=%s used=profile missing=doc_id", body.profile)
-
-        results: List[Dict[str, Any]] = []
-        for pt in hits:
-            payload = getattr(pt, "payload", {}) or {}
-            txt = payload.get("text") or ""
-            snippet = txt[:360] + ("…" if len(txt) > 360 else "")
-
-            # Optional best-effort hints for planners
-            url_candidates = _extract_url_candidates(snippet)
-            method_hint = _method_hint_from_text(snippet)
-            query_candidates = _extract_query_candidates(snippet)
-
-            results.append({
-                "id": getattr(pt, "id", None),
-                "score": float(getattr(pt, "score", 0.0) or 0.0),
-                "doc_id": payload.get("doc_id") or payload.get("profile"),
-                "chunk_id": payload.get("chunk_id") or payload.get("hash") or getattr(pt, "id", None),
-                "doc_path": payload.get("doc_path"),
-                "chunk_idx": payload.get("chunk_idx"),
-                "snippet": snippet,
-                "hints": {
-                    "url_candidates": url_candidates or None,
-                    "method_hint": method_hint,
-                    "query_candidates": (query_candidates or None),
-                },
-            })
-
-        return SearchResponse(ok=True, results=results)
+        qvec = await emb.embed_query(body.q)
+        hits = query_hits(vdb, qvec, body.profile, body.top_k, body.section)
+        return SearchResponse(ok=True, results=format_hits(hits))
     finally:
         await emb.close()
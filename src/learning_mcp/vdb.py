@@ -6,6 +6,11 @@ Purpose:
 - Manage a single Qdrant collection (ensure/create, validate shape).
 - Safe upsert with idempotent IDs (use supplied IDs or payload['hash']).
 - Batch upserts, strict vector validation, simple search & utilities.
+- Vectors may be a float32 (n, dim) ndarray (Embedder.embed_array) or lists;
+  validation is one vectorized NumPy check per upsert, not a per-float loop.
+  The write itself still boxes floats: qdrant-client's REST models (PointStruct,
+  Batch) take List[float] and serialize it to JSON, so each batch goes through
+  one ndarray.tolist() (C-level, but one Python float per element).
 
 Example (PowerShell):
   docker compose exec api python /app/src/tools/run_snippet.py `
@@ -15,13 +20,15 @@ Example (PowerShell):
 """
 
 from __future__ import annotations
-from typing import List, Dict, Any, Optional, Iterable, Tuple
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Callable
 from uuid import uuid4
 import os
-import math
 
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.http.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, QueryRequest,
+)
 
 from learning_mcp.config import settings
 
@@ -39,13 +46,30 @@ UPSERT_BATCH = int(os.getenv("VDB_UPSERT_BATCH", "256"))  # safe default for Qdr
 ALLOW_RECREATE = os.getenv("VDB_ALLOW_RECREATE", "1") not in ("0", "false", "False")
 
 
-def _sanitize_vec(vec: List[float]) -> None:
-    if not isinstance(vec, list) or not vec:
+def _equality_filter(filter_by: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """{"key": value, ...} -> Qdrant Filter (all must match), or None."""
+    if not filter_by:
+        return None
+    return Filter(must=[FieldCondition(key=k, match=MatchValue(value=v)) for k, v in filter_by.items()])
+
+
+def _as_matrix(vectors: Any) -> np.ndarray:
+    """Vectors (ndarray or list of lists) -> float32 matrix, NaN/Inf/None/bool rejected."""
+    try:
+        raw = np.asarray(vectors)  # no copy for arrays; None -> object dtype (NaN below)
+        mat = raw.astype(np.float32, copy=False)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Inconsistent vector dims or invalid numbers: {e}")
+    if raw.dtype == np.bool_:
+        # float32 would take True/False as 1.0/0.0 (bools inside JSON vectors: embeddings._json_vector)
+        raise ValueError("Invalid number in embedding vector (bool)")
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    if mat.ndim != 2 or not mat.shape[1]:
         raise ValueError("Vector must be a non-empty list")
-    # Cheap checks for NaN/Inf/bool/None
-    for v in vec:
-        if v is None or isinstance(v, bool) or math.isnan(float(v)) or math.isinf(float(v)):
-            raise ValueError("Invalid number in embedding vector (NaN/Inf/None/bool)")
+    if not np.isfinite(mat).all():
+        raise ValueError("Invalid number in embedding vector (NaN/Inf/None)")
+    return mat
 
 
 class VDB:
@@ -98,30 +122,28 @@ class VDB:
 
     def upsert(
         self,
-        vectors: List[List[float]],
+        vectors: Any,
         payloads: List[Dict[str, Any]],
         ids: Optional[List[str]] = None,
+        on_batch: Optional[Callable[[int], None]] = None,
     ) -> List[str]:
         """
-        Upsert vectors with payloads. Returns point IDs.
+        Upsert vectors (float32 (n, dim) ndarray or list of lists) with payloads. Returns point IDs.
         - If `ids` not provided, and payload contains 'hash', that hash is used as the ID (idempotent).
         - Otherwise, UUID v4 is used.
+        - Optional `on_batch(n)` is called after each batch of n points is written.
         """
         if len(vectors) != len(payloads):
             raise ValueError("vectors and payloads length mismatch")
         if ids is not None and len(ids) != len(vectors):
             raise ValueError("ids length must match vectors length when provided")
-        if not vectors:
+        if not len(vectors):
             return []
 
-        # simple dimension & hygiene guard
-        d0 = len(vectors[0])
-        if d0 != self.dim:
-            raise ValueError(f"Vector dim mismatch: got {d0}, expected {self.dim}. Check VECTOR_DIM & model.")
-        for v in vectors:
-            if len(v) != self.dim:
-                raise ValueError(f"Inconsistent vector dims: found {len(v)}, expected {self.dim}.")
-            _sanitize_vec(v)
+        # dimension & hygiene guard (vectorized)
+        mat = _as_matrix(vectors)
+        if mat.shape[1] != self.dim:
+            raise ValueError(f"Vector dim mismatch: got {mat.shape[1]}, expected {self.dim}. Check VECTOR_DIM & model.")
 
         self.ensure_collection()
 
@@ -141,18 +163,22 @@ class VDB:
         written: List[str] = []
         for start in range(0, len(vectors), UPSERT_BATCH):
             end = min(start + UPSERT_BATCH, len(vectors))
+            # REST models need Python floats: one C-level conversion per batch (see module doc)
+            rows = mat[start:end].tolist()
             batch_points = [
-                PointStruct(id=ids[i], vector=vectors[i], payload=payloads[i])
+                PointStruct(id=ids[i], vector=rows[i - start], payload=payloads[i])
                 for i in range(start, end)
             ]
             self.client.upsert(collection_name=self.collection, points=batch_points)
             written.extend(ids[start:end])
+            if on_batch is not None:
+                on_batch(end - start)
 
         return written
 
     def search(
         self,
-        query_vec: List[float],
+        query_vec: Any,
         top_k: int = 5,
         *,
         filter_by: Optional[Dict[str, Any]] = None,
@@ -166,19 +192,14 @@ class VDB:
         """
         if len(query_vec) != self.dim:
             raise ValueError(f"Query vector dim mismatch: got {len(query_vec)}, expected {self.dim}.")
-        _sanitize_vec(query_vec)
+        query = _as_matrix(query_vec)[0]
         self.ensure_collection()
 
-        qfilter: Optional[Filter] = None
-        if filter_by:
-            must = []
-            for k, v in filter_by.items():
-                must.append(FieldCondition(key=k, match=MatchValue(value=v)))
-            qfilter = Filter(must=must)
+        qfilter = _equality_filter(filter_by)
 
         response = self.client.query_points(
             collection_name=self.collection,
-            query=query_vec,
+            query=query,
             limit=top_k,
             with_payload=with_payload,
             query_filter=qfilter,
@@ -187,6 +208,33 @@ class VDB:
         # query_points returns QueryResponse, extract .points list
         return response.points if hasattr(response, 'points') else []
 
+    def search_batch(
+        self,
+        query_vecs: Any,
+        top_k: int = 5,
+        *,
+        filter_by: Optional[Dict[str, Any]] = None,
+        with_payload: bool = True,
+    ) -> List[List[Any]]:
+        """
+        KNN for several query vectors in one Qdrant round trip (query_batch_points).
+        Same filter semantics as search(); returns one ScoredPoint list per vector, in order.
+        """
+        if len(query_vecs) == 0:  # before _as_matrix, which would take [] for one empty vector
+            return []
+        mat = _as_matrix(query_vecs)
+        if mat.shape[1] != self.dim:
+            raise ValueError(f"Query vector dim mismatch: got {mat.shape[1]}, expected {self.dim}.")
+        self.ensure_collection()
+
+        qfilter = _equality_filter(filter_by)
+        requests = [
+            QueryRequest(query=row.tolist(), limit=top_k, with_payload=with_payload, filter=qfilter)
+            for row in mat
+        ]
+        responses = self.client.query_batch_points(collection_name=self.collection, requests=requests)
+        return [r.points if hasattr(r, "points") else [] for r in responses]
+
     def search_raw(self, **kwargs):
         """Direct passthrough to qdrant_client.search for advanced callers."""
         self.ensure_collection()
@@ -85,9 +85,8 @@ if "search_docs" in enabled_tools:
         embedder = _get_embedder(prof)
         vdb = _get_vdb(prof)
         
-        # Embed query
-        query_vecs = await embedder.embed([query])
-        query_vec = query_vecs[0]
+        # Embed query (hedged when profile.embedding.hedge is on)
+        query_vec = await embedder.embed_query(query)
         
         # Search Qdrant
         vcfg = prof.get("vectordb", {}) or {}
@@ -183,28 +182,9 @@ if "plan_api_call" in enabled_tools:
         if ctx:
             await ctx.info(f"Planning API call for goal: {goal}")
         
-        # Search for relevant docs (call helper directly, not the decorated tool)
-        prof = get_profile(profile)
-        embedder = _get_embedder(prof)
-        vdb = _get_vdb(prof)
-        
-        try:
-            # Embed query
-            query_vecs = await embedder.embed([goal])
-            query_vec = query_vecs[0]
-            
-            # Search Qdrant
-            results = vdb.search(query_vec=query_vec, top_k=10)
-            
-            # Format results for AutoGen
-            context_chunks = [r.payload.get("text", "") for r in results]
-            
-            if ctx:
-                await ctx.info(f"Found {len(results)} relevant docs")
-        finally:
-            await embedder.close()
+        get_profile(profile)  # unknown profile → KeyError before any LLM work
         
-        # Use AutoGen planner
+        # The planner retrieves its own evidence (in-process, shared embedder/VDB)
         plan = await plan_with_autogen(
             query=goal,
             profile=profile
@@ -0,0 +1,348 @@
+"""
+Ingest and search benchmark suite with a tracked baseline.
+
+Purpose:
+- Catch performance regressions before production. Each benchmark runs on
+  synthetic input of configurable size (tests/benchmarks/synth.py) and reports
+  one primary metric plus supporting numbers:
+    pdf_load    load_pdf_structured            pages/s
+    classify    pdf_loader._classify_text      MB/s (pathological pages included)
+    json_load   load_json                      nodes/s
+    flatten     json_loader._flatten           leaves/s (wide; deep reported too)
+    chunker     chunker.split_text (chars)     MB/s (tokens mode reported too)
+    embed       Embedder.embed vs mock Ollama  chunks/s
+    upsert      VDB.upsert vs mock Qdrant      points/s
+    search      /search/api_context end to end latency p50/p95/p99 (ms)
+- Embedding and Qdrant run against tests/mocks/backends.py (zero latency by
+  default), so the numbers are our own overhead, not the network.
+- Results are JSON. --compare checks the primary metrics against a stored
+  baseline and exits 1 if any is worse by more than --tolerance.
+
+Usage (from the repo root):
+    python -m tests.benchmarks.bench                          # run all, print JSON
+    python -m tests.benchmarks.bench --only pdf_load,chunker --scale 4
+    python -m tests.benchmarks.bench --out results.json --compare tests/benchmarks/baseline.json
+    python -m tests.benchmarks.bench --save-baseline tests/benchmarks/baseline.json
+
+Baselines are machine-specific: refresh the stored one (--save-baseline) when
+the reference machine changes, and compare on the same class of hardware.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+import numpy as np  # noqa: E402
+import yaml  # noqa: E402
+
+from learning_mcp import embeddings  # noqa: E402
+from learning_mcp.config import settings  # noqa: E402
+from learning_mcp.embeddings import Embedder, EmbeddingConfig  # noqa: E402
+from learning_mcp.hashing_embeddings import hashed_ngram_embed  # noqa: E402
+from learning_mcp.json_loader import _flatten, load_json  # noqa: E402
+from learning_mcp.chunker import split_text  # noqa: E402
+from learning_mcp.pdf_loader import _classify_text, load_pdf_structured  # noqa: E402
+from learning_mcp.vdb import VDB  # noqa: E402
+
+from tests.benchmarks import synth  # noqa: E402
+from tests.load.harness import run_search_load  # noqa: E402
+from tests.mocks.backends import MockServer, ollama_app, qdrant_app  # noqa: E402
+
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable[["Context"], Dict[str, Any]]
+    metric: str
+    higher_is_better: bool = True
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, metric: str, higher_is_better: bool = True):
+    def deco(fn):
+        BENCHMARKS[name] = Benchmark(name, fn, metric, higher_is_better)
+        return fn
+    return deco
+
+
+class Context:
+    """Sizes, a scratch dir and the lazily started mock servers shared by benchmarks."""
+
+    def __init__(self, tmp: Path, scale: float, repeat: int):
+        self.tmp = tmp
+        self.scale = scale
+        self.repeat = max(1, repeat)
+        self.dim = 384
+        self._servers: Dict[str, MockServer] = {}
+
+    def n(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    def server(self, kind: str) -> MockServer:
+        if kind not in self._servers:
+            app = ollama_app(dim=self.dim) if kind == "ollama" else qdrant_app()
+            self._servers[kind] = MockServer(app).start()
+        return self._servers[kind]
+
+    def close(self) -> None:
+        for srv in self._servers.values():
+            srv.stop()
+
+    def best_of(self, fn: Callable[[], Any]) -> float:
+        """Fastest wall time of `repeat` runs (least noisy for throughput)."""
+        best = float("inf")
+        for _ in range(self.repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+
+def _rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else float("inf")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 2)
+
+
+# ---------- benchmarks ----------
+
+@benchmark("pdf_load", "pages_per_s")
+def bench_pdf_load(ctx: Context) -> Dict[str, Any]:
+    pages = ctx.n(60)
+    path = synth.make_pdf(ctx.tmp / "bench.pdf", pages, kinds=["prose", "prose", "code", "table"])
+    out: Dict[str, Any] = {}
+    secs = ctx.best_of(lambda: out.__setitem__("chunks", len(load_pdf_structured(str(path), doc_id="bench"))))
+    cross = len(load_pdf_structured(str(path), doc_id="bench", cross_pages=True))
+    return {
+        "pages": pages, "chunks": out["chunks"], "cross_page_chunks": cross,
+        "seconds": round(secs, 4), "pages_per_s": _rate(pages, secs),
+    }
+
+
+@benchmark("classify", "mb_per_s")
+def bench_classify(ctx: Context) -> Dict[str, Any]:
+    pages = synth.pathological_pages(ctx.n(20000))
+    mb = sum(len(t) for t in pages.values()) / 1e6
+    secs = ctx.best_of(lambda: [_classify_text(t) for t in pages.values()])
+    worst = {name: round(ctx.best_of(lambda t=t: _classify_text(t)) * 1000, 3) for name, t in pages.items()}
+    return {
+        "pages": len(pages), "mb": round(mb, 3), "seconds": round(secs, 4),
+        "mb_per_s": _rate(mb, secs), "page_ms": worst,
+    }
+
+
+@benchmark("json_load", "nodes_per_s")
+def bench_json_load(ctx: Context) -> Dict[str, Any]:
+    records = ctx.n(2000)
+    path = synth.make_json(ctx.tmp / "bench.json", records)
+    nodes = synth.count_nodes(json.loads(path.read_text(encoding="utf-8")))
+    out: Dict[str, Any] = {}
+    secs = ctx.best_of(lambda: out.__setitem__("chunks", len(load_json(str(path), chunk_size=800, chunk_overlap=100))))
+    return {"nodes": nodes, "chunks": out["chunks"], "seconds": round(secs, 4), "nodes_per_s": _rate(nodes, secs)}
+
+
+@benchmark("flatten", "leaves_per_s")
+def bench_flatten(ctx: Context) -> Dict[str, Any]:
+    """JSON walk alone, on a wide document and on one nested ~2000 levels deep."""
+    wide, deep = synth.wide_value(ctx.n(50_000)), synth.deep_value(1000)
+    out: Dict[str, Any] = {}
+    wide_s = ctx.best_of(lambda: out.__setitem__("wide", sum(1 for _ in _flatten(wide))))
+    deep_s = ctx.best_of(lambda: out.__setitem__("deep", sum(1 for _ in _flatten(deep))))
+    return {
+        "leaves": out["wide"], "seconds": round(wide_s, 4), "leaves_per_s": _rate(out["wide"], wide_s),
+        "deep_levels": 2000, "deep_leaves": out["deep"], "deep_seconds": round(deep_s, 4),
+    }
+
+
+@benchmark("chunker", "mb_per_s")
+def bench_chunker(ctx: Context) -> Dict[str, Any]:
+    text = synth.make_prose(ctx.n(8_000_000))
+    mb = len(text.encode("utf-8")) / 1e6
+    out: Dict[str, Any] = {}
+    secs = ctx.best_of(lambda: out.__setitem__("chunks", len(split_text(text, 1200, 150))))
+    tok_s = ctx.best_of(lambda: out.__setitem__("token_chunks", len(split_text(text, 300, 40, unit="tokens"))))
+    return {
+        "mb": round(mb, 3), "chunks": out["chunks"], "seconds": round(secs, 4), "mb_per_s": _rate(mb, secs),
+        "token_chunks": out["token_chunks"], "tokens_mb_per_s": _rate(mb, tok_s),
+    }
+
+
+@benchmark("embed", "chunks_per_s")
+def bench_embed(ctx: Context) -> Dict[str, Any]:
+    n = ctx.n(400)
+    texts = [f"chunk {i}: " + synth.make_prose(600, seed=i) for i in range(n)]
+    srv = ctx.server("ollama")
+    cfg = EmbeddingConfig(dim=ctx.dim, primary="ollama", ollama_host=srv.url, ollama_model="bench")
+
+    async def run_once() -> None:
+        emb = Embedder(cfg)
+        try:
+            await emb.embed_array(texts)
+        finally:
+            await emb.close()
+
+    with patch.object(embeddings, "EMBED_PACING_MS", 0):
+        secs = ctx.best_of(lambda: asyncio.run(run_once()))
+    return {
+        "chunks": n, "concurrency": Embedder(cfg)._embed_concurrency(),
+        "seconds": round(secs, 4), "chunks_per_s": _rate(n, secs),
+    }
+
+
+@benchmark("upsert", "points_per_s")
+def bench_upsert(ctx: Context) -> Dict[str, Any]:
+    n = ctx.n(5000)
+    rng = np.random.default_rng(1)
+    vectors = rng.random((n, ctx.dim), dtype=np.float32)
+    payloads = [{"doc_id": "bench", "text": f"point {i}", "chunk_idx": i} for i in range(n)]
+    ids = [f"00000000-0000-4000-8000-{i:012d}" for i in range(n)]
+    vdb = VDB(url=ctx.server("qdrant").url, collection="bench-upsert", dim=ctx.dim)
+    vdb.truncate()
+    secs = ctx.best_of(lambda: vdb.upsert(vectors, payloads, ids))
+    return {"points": n, "dim": ctx.dim, "seconds": round(secs, 4), "points_per_s": _rate(n, secs)}
+
+
+@benchmark("search", "p95_ms", higher_is_better=False)
+def bench_search(ctx: Context) -> Dict[str, Any]:
+    """Embed query + Qdrant query + hint extraction through the FastAPI route."""
+    points = ctx.n(2000)
+    queries = [synth.make_prose(60, seed=10_000 + i) for i in range(ctx.n(100))]
+    embed_srv, qdrant_srv = ctx.server("ollama"), ctx.server("qdrant")
+    profile = {
+        "name": "bench-search",
+        "embedding": {"dim": ctx.dim, "backend": {"primary": "ollama"},
+                      "ollama": {"host": embed_srv.url, "model": "bench"}},
+        "vectordb": {"url": qdrant_srv.url, "collection": "bench-search"},
+    }
+    texts = [synth.make_prose(400, seed=i) for i in range(points)]
+    vdb = VDB(url=qdrant_srv.url, collection="bench-search", dim=ctx.dim)
+    vdb.truncate()
+    vdb.upsert(
+        hashed_ngram_embed(texts, ctx.dim),
+        [{"doc_id": "bench-search", "text": t, "chunk_idx": i} for i, t in enumerate(texts)],
+        [f"00000000-0000-4000-8000-{i:012d}" for i in range(points)],
+    )
+    profiles_file = ctx.tmp / "bench-learning.yaml"
+    profiles_file.write_text(yaml.safe_dump({"version": 1, "profiles": [profile]}), encoding="utf-8")
+
+    with patch.object(settings, "PROFILES_PATH", str(profiles_file)), \
+         patch.object(embeddings, "EMBED_PACING_MS", 0):
+        report = asyncio.run(run_search_load("bench-search", queries, concurrency=4))
+    return {
+        "points": points, "queries": len(queries), "errors": report["errors"],
+        "qps": report["qps"], "p50_ms": report["p50_ms"], "p95_ms": report["p95_ms"], "p99_ms": report["p99_ms"],
+    }
+
+
+# ---------- running / comparing ----------
+
+def run_benchmarks(names: List[str], *, scale: float = 1.0, repeat: int = 3) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = Context(Path(tmp), scale, repeat)
+        try:
+            for name in names:
+                b = BENCHMARKS[name]
+                try:
+                    results[name] = b.fn(ctx)
+                except Exception as e:  # one broken benchmark should not hide the others
+                    results[name] = {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            ctx.close()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "scale": scale,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Compare each benchmark's primary metric. A benchmark regresses when it is
+    worse than the baseline by more than `tolerance` (fraction), in its own direction.
+    """
+    rows: List[Dict[str, Any]] = []
+    for name, res in current.get("results", {}).items():
+        b = BENCHMARKS.get(name)
+        base = (baseline.get("results") or {}).get(name) or {}
+        if b is None or b.metric not in res or b.metric not in base:
+            continue
+        cur_v, base_v = float(res[b.metric]), float(base[b.metric])
+        if base_v <= 0:
+            continue
+        change = (cur_v - base_v) / base_v
+        worse = -change if b.higher_is_better else change
+        rows.append({
+            "benchmark": name,
+            "metric": b.metric,
+            "baseline": base_v,
+            "current": cur_v,
+            "change_pct": round(change * 100, 1),
+            "regression": worse > tolerance,
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", default="", help=f"comma list of: {','.join(BENCHMARKS)}")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiply all input sizes")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per benchmark (best is kept)")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown fraction")
+    ap.add_argument("--save-baseline", help="write results as the new baseline")
+    args = ap.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    report = run_benchmarks(names, scale=args.scale, repeat=args.repeat)
+    status = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        if any(r["regression"] for r in report["comparison"]):
+            status = 1
+    if any("error" in r for r in report["results"].values()):
+        status = 1
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Synthetic inputs for the benchmark suite (no fixtures to check in, any size).
+
+- make_pdf(): a real, text-extractable PDF (Helvetica text, one content stream
+  per page) written by hand, so pypdf does the same work as on a manual.
+- make_json(): nested records (objects, arrays of primitives, arrays of objects).
+- make_prose(): sentence-structured text for the chunkers.
+All generators are seeded and deterministic.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+WORDS = (
+    "camera stream snapshot config network user password channel record video audio "
+    "motion alarm event storage disk schedule ptz preset zoom focus firmware upgrade "
+    "reboot time zone ntp dns http https port token session api request response "
+    "the a of to and in is for with on by this that from when returns value"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+
+def make_prose(chars: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    parts: List[str] = []
+    n = 0
+    while n < chars:
+        s = _sentence(rng)
+        parts.append(s)
+        n += len(s) + 1
+    return " ".join(parts)[:chars]
+
+
+def _page_lines(rng: random.Random, kind: str, lines: int) -> List[str]:
+    if kind == "code":
+        out = ["GET /cgi-bin/configManager.cgi?action=getConfig&name=Network HTTP/1.1"]
+        out += [f"    table.Network.eth{i}.IPAddress={rng.randint(1, 254)}.0.0.{i};" for i in range(lines - 1)]
+        return out
+    if kind == "table":
+        return [" | ".join(rng.choice(WORDS).ljust(10) for _ in range(5)) for _ in range(lines)]
+    return [_sentence(rng) for _ in range(lines)]
+
+
+def _pdf_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path: Path, pages: int, *, lines_per_page: int = 40, kinds: List[str] = None, seed: int = 1) -> Path:
+    """
+    Write a `pages`-page PDF. `kinds` cycles page types ("prose", "code", "table");
+    default is all prose.
+    """
+    rng = random.Random(seed)
+    kinds = kinds or ["prose"]
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog = add(b"")   # filled in below
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids: List[int] = []
+    for p in range(pages):
+        lines = _page_lines(rng, kinds[p % len(kinds)], lines_per_page)
+        body = ["BT", "/F1 9 Tf", "11 TL", "40 760 Td"]
+        for line in lines:
+            body.append(f"({_pdf_escape(line)}) Tj T*")
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1", errors="replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    path = Path(path)
+    path.write_bytes(bytes(out))
+    return path
+
+
+def add_outline(path: Path, entries: List[tuple]) -> Path:
+    """
+    Add bookmarks to a PDF in place. entries: (title, page_num 1-based, level 0+),
+    in document order; a level-n entry nests under the previous level n-1 entry.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter(clone_from=PdfReader(str(path)))
+    parents: List[Any] = []
+    for title, page_num, level in entries:
+        parent = parents[level - 1] if level else None
+        item = writer.add_outline_item(title, page_num - 1, parent=parent)
+        parents[level:] = [item]
+    with open(path, "wb") as f:
+        writer.write(f)
+    return Path(path)
+
+
+def make_json(path: Path, records: int, *, seed: int = 1) -> Path:
+    rng = random.Random(seed)
+    items: List[Dict[str, Any]] = []
+    for r in range(records):
+        items.append({
+            "id": r,
+            "name": " ".join(rng.choices(WORDS, k=3)),
+            "enabled": rng.random() < 0.5,
+            "tags": rng.choices(WORDS, k=4),
+            "endpoint": {"method": rng.choice(["GET", "POST"]), "path": f"/api/{rng.choice(WORDS)}/{r}"},
+            "description": " ".join(_sentence(rng) for _ in range(rng.randint(1, 4))),
+            "params": [{"name": w, "type": rng.choice(["int", "string"]), "required": rng.random() < 0.3}
+                       for w in rng.sample(WORDS, 3)],
+        })
+    path = Path(path)
+    path.write_text(json.dumps({"version": 1, "items": items}), encoding="utf-8")
+    return path
+
+
+def deep_value(depth: int) -> Dict[str, Any]:
+    """A chain of `depth` nested objects, each also holding a list level (2*depth nesting)."""
+    root: Dict[str, Any] = {"v": 0, "next": []}
+    node = root
+    for i in range(1, depth):
+        child = {"v": i, "next": []}
+        node["next"].append(child)
+        node = child
+    return root
+
+
+def wide_value(records: int, *, seed: int = 1) -> Dict[str, Any]:
+    """Many shallow records: objects, primitive arrays and mixed arrays."""
+    rng = random.Random(seed)
+    return {"items": [
+        {"id": i, "name": rng.choice(WORDS), "tags": rng.choices(WORDS, k=3),
+         "req": {"method": "GET", "args": [1, 2, {"z": i}]}}
+        for i in range(records)
+    ]}
+
+
+def pathological_pages(chars: int = 20000, *, seed: int = 1) -> Dict[str, str]:
+    """Page texts that made the old regex classifiers backtrack (or misfire), by name."""
+    rng = random.Random(seed)
+    return {
+        "long_token": "a" * chars,
+        "unclosed_brace": "{ " + "x y z, " * (chars // 7),
+        "open_brackets": "[" * (chars // 4) + " end",
+        "two_word_lines": "\n".join("alpha beta" for _ in range(chars // 11)),
+        "prose": make_prose(chars, seed=seed),
+        "code": "\n".join(_page_lines(rng, "code", chars // 40)),
+        "table": "\n".join(_page_lines(rng, "table", chars // 60)),
+    }
+
+
+def count_nodes(value: Any) -> int:
+    """Every JSON value (objects, arrays and scalars) counts as one node."""
+    stack, n = [value], 0
+    while stack:
+        v = stack.pop()
+        n += 1
+        if isinstance(v, dict):
+            stack.extend(v.values())
+        elif isinstance(v, list):
+            stack.extend(v)
+    return n
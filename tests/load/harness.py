@@ -0,0 +1,263 @@
+"""
+Load harness: ingest + search against the local mock backends (tests/mocks/backends.py).
+
+Purpose:
+- Regression-test ingest throughput and search tail latency without the network.
+- Drives the real code paths: ingest_worker.run_ingest (the job worker, with its
+  AsyncJobStore, checkpoints and progress) and the /search/api_context route
+  (through ASGI, so Embedder + VDB run exactly as in the server).
+- Backends get configurable latency distributions, error rates and 429s, so the
+  Embedder's concurrency, retry, pacing and breaker behaviour show up in the numbers.
+
+Usage (from the repo root):
+    python -m tests.load.harness --docs 4 --records 200 --backend ollama \\
+        --latency-p50 30 --latency-p99 300 --error-rate 0.02 --rate-limit 0.01 \\
+        --searches 200 --search-concurrency 8 --pacing-ms 0
+
+Prints a JSON report: ingest (status, chunks, seconds, chunks/s), search
+(p50/p95/p99/max ms, errors) and per-backend request/fault counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from learning_mcp import embeddings  # noqa: E402
+from learning_mcp.config import settings  # noqa: E402
+from learning_mcp.ingest_worker import run_ingest  # noqa: E402
+from learning_mcp.job_store import AsyncJobStore  # noqa: E402
+from learning_mcp.jobs_db import JobStatus  # noqa: E402
+
+from tests.mocks.backends import (  # noqa: E402
+    Faults, Latency, MockServer, cloudflare_app, ollama_app, qdrant_app,
+)
+
+_WORDS = (
+    "camera stream snapshot config network user password channel record video audio "
+    "motion alarm event storage disk schedule ptz preset zoom focus firmware upgrade "
+    "reboot time zone ntp dns http https port token session api request response"
+).split()
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    data = sorted(values)
+    k = min(len(data) - 1, max(0, int(round(q / 100.0 * (len(data) - 1)))))
+    return round(data[k], 2)
+
+
+def make_json_docs(out_dir: Path, docs: int, records: int, seed: int = 7) -> List[str]:
+    """Synthetic JSON documents: `records` objects per file with nested fields."""
+    rng = random.Random(seed)
+    paths = []
+    for d in range(docs):
+        items = []
+        for r in range(records):
+            items.append({
+                "id": f"{d}-{r}",
+                "title": " ".join(rng.choices(_WORDS, k=4)),
+                "endpoint": f"/api/v1/{rng.choice(_WORDS)}/{rng.choice(_WORDS)}",
+                "description": " ".join(rng.choices(_WORDS, k=rng.randint(20, 60))) + ".",
+                "params": {w: rng.choice(_WORDS) for w in rng.sample(_WORDS, 3)},
+            })
+        path = out_dir / f"doc_{d}.json"
+        path.write_text(json.dumps({"items": items}), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def build_profile(
+    name: str,
+    paths: List[str],
+    *,
+    backend: str,
+    embed_url: str,
+    qdrant_url: str,
+    dim: int,
+    chunk_size: int,
+) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "documents": [{"type": "json", "path": p} for p in paths],
+        "chunking": {"size": chunk_size, "overlap": 0},
+        "embedding": {
+            "dim": dim,
+            "backend": {"primary": backend},
+            "ollama": {"host": embed_url, "model": "mock-embed"},
+            "cloudflare": {
+                "account_id": "mock", "api_token": "mock", "model": "@cf/mock/embed",
+                "base_url": f"{embed_url}/client/v4",
+            },
+        },
+        "vectordb": {"url": qdrant_url, "collection": name},
+    }
+
+
+async def run_ingest_load(profile: Dict[str, Any], db_path: str) -> Dict[str, Any]:
+    store = AsyncJobStore(db_path)
+    try:
+        job_id = store.db.start_job(
+            profile=profile["name"], provider=profile["embedding"]["backend"]["primary"],
+            model_name="mock-embed", model_dim=profile["embedding"]["dim"], vector_db="qdrant",
+            collection=profile["vectordb"]["collection"], truncate=True,
+            files_total=len(profile["documents"]), pages_total=0,
+        )
+        t0 = time.perf_counter()
+        await run_ingest(job_id, profile, True, store)
+        seconds = time.perf_counter() - t0
+        await store.flush()
+        job = store.db.get_job(job_id)
+    finally:
+        await store.close()
+    chunks = int(job.get("chunks_done") or 0)
+    return {
+        "status": job["status"],
+        "error": job.get("error"),
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "chunks_per_s": round(chunks / seconds, 1) if seconds else None,
+    }
+
+
+async def run_search_load(profile_name: str, queries: List[str], concurrency: int) -> Dict[str, Any]:
+    import httpx
+    from fastapi import FastAPI
+    from learning_mcp.search_routes import router
+
+    app = FastAPI()
+    app.include_router(router)
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://harness") as client:
+        async def one(q: str) -> None:
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post("/search/api_context", json={"q": q, "profile": profile_name, "top_k": 5})
+                    ok = r.status_code == 200 and r.json().get("ok")
+                except Exception:
+                    ok = False
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+                errors += 0 if ok else 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        seconds = time.perf_counter() - t0
+
+    return {
+        "requests": len(queries),
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "qps": round(len(queries) / seconds, 1) if seconds else None,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "max_ms": round(max(latencies), 2) if latencies else None,
+    }
+
+
+def run(
+    *,
+    docs: int = 2,
+    records: int = 50,
+    backend: str = "ollama",
+    dim: int = 64,
+    chunk_size: int = 400,
+    embed_faults: Optional[Faults] = None,
+    qdrant_faults: Optional[Faults] = None,
+    searches: int = 50,
+    search_concurrency: int = 8,
+    pacing_ms: Optional[int] = None,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    """Start the mocks, ingest synthetic docs, fire searches; return the report dict."""
+    app_factory = ollama_app if backend == "ollama" else cloudflare_app
+    with tempfile.TemporaryDirectory() as tmp, \
+         MockServer(app_factory(dim=dim, faults=embed_faults)) as embed_srv, \
+         MockServer(qdrant_app(faults=qdrant_faults)) as qdrant_srv:
+        tmp_path = Path(tmp)
+        paths = make_json_docs(tmp_path, docs, records, seed=seed)
+        profile = build_profile(
+            "load-test", paths, backend=backend, embed_url=embed_srv.url,
+            qdrant_url=qdrant_srv.url, dim=dim, chunk_size=chunk_size,
+        )
+        profiles_file = tmp_path / "learning.yaml"
+        profiles_file.write_text(yaml.safe_dump({"version": 1, "profiles": [profile]}), encoding="utf-8")
+
+        rng = random.Random(seed)
+        queries = [" ".join(rng.choices(_WORDS, k=5)) for _ in range(searches)]
+        pacing = embeddings.EMBED_PACING_MS if pacing_ms is None else pacing_ms
+
+        with patch.object(settings, "PROFILES_PATH", str(profiles_file)), \
+             patch.object(embeddings, "EMBED_PACING_MS", pacing):
+            ingest = asyncio.run(run_ingest_load(profile, str(tmp_path / "jobs.sqlite")))
+            search = (
+                asyncio.run(run_search_load(profile["name"], queries, search_concurrency))
+                if ingest["status"] == JobStatus.COMPLETED.value and searches else None
+            )
+
+        return {
+            "config": {
+                "docs": docs, "records": records, "backend": backend, "dim": dim,
+                "chunk_size": chunk_size, "pacing_ms": pacing, "searches": searches,
+                "search_concurrency": search_concurrency,
+            },
+            "ingest": ingest,
+            "search": search,
+            "backends": {"embed": dict(embed_srv.state.stats), "qdrant": dict(qdrant_srv.state.stats)},
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=2)
+    ap.add_argument("--records", type=int, default=100, help="JSON records per document")
+    ap.add_argument("--backend", choices=["ollama", "cloudflare"], default="ollama")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--chunk-size", type=int, default=400)
+    ap.add_argument("--latency-p50", type=float, default=0.0, help="embedding latency p50 (ms)")
+    ap.add_argument("--latency-p99", type=float, default=None, help="embedding latency p99 (ms); lognormal if set")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit", type=float, default=0.0, help="fraction of 429s")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--qdrant-latency-p50", type=float, default=0.0)
+    ap.add_argument("--searches", type=int, default=100)
+    ap.add_argument("--search-concurrency", type=int, default=8)
+    ap.add_argument("--pacing-ms", type=int, default=None, help="override EMBED_PACING_MS")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    report = run(
+        docs=args.docs, records=args.records, backend=args.backend, dim=args.dim,
+        chunk_size=args.chunk_size,
+        embed_faults=Faults(
+            latency=Latency(args.latency_p50, args.latency_p99), error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit, retry_after_s=args.retry_after, seed=args.seed,
+        ),
+        qdrant_faults=Faults(latency=Latency(args.qdrant_latency_p50), seed=args.seed),
+        searches=args.searches, search_concurrency=args.search_concurrency,
+        pacing_ms=args.pacing_ms, seed=args.seed,
+    )
+    print(json.dumps(report, indent=2))
+    return 0 if report["ingest"]["status"] == JobStatus.COMPLETED.value else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,450 @@
+"""
+Local stand-ins for the embedding services and Qdrant, for load tests and benchmarks.
+
+Purpose:
+- Reproducible backends for measuring Embedder concurrency / retry / pacing and
+  VDB batching without the network:
+    * Ollama:     POST /api/embeddings {"model","prompt"}  and  POST /api/embed {"model","input"}
+    * Cloudflare: POST /client/v4/accounts/{account}/ai/run/{model}  {"text": str | [str]}
+    * Qdrant:     the REST subset VDB uses (collections, upsert, query, count, retrieve, delete)
+- Every server takes a Faults config: a latency distribution (fixed or lognormal
+  from p50/p99), random 500s, random 429s with Retry-After, and a scripted
+  sequence of status codes for deterministic tests. Faults can be changed while
+  the server runs; counters are in `.stats`.
+- Embeddings are the deterministic hashed n-grams from learning_mcp.hashing_embeddings,
+  so search results are stable run to run.
+
+Usage:
+    from tests.mocks.backends import Faults, Latency, MockServer, ollama_app, qdrant_app
+
+    with MockServer(ollama_app(dim=384, faults=Faults(latency=Latency(40, 400)))) as ollama, \\
+         MockServer(qdrant_app()) as qdrant:
+        profile["embedding"]["ollama"]["host"] = ollama.url
+        profile["vectordb"]["url"] = qdrant.url
+        ...
+        ollama.state.stats   # {"requests": ..., "rate_limited": ..., "errors": ...}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from learning_mcp.hashing_embeddings import hashed_ngram_embed
+
+_Z99 = 2.326  # standard normal 99th percentile
+
+
+@dataclass
+class Latency:
+    """Per-request latency: fixed at p50_ms, or lognormal through (p50_ms, p99_ms)."""
+
+    p50_ms: float = 0.0
+    p99_ms: Optional[float] = None
+
+    def sample_s(self, rng: random.Random) -> float:
+        if self.p50_ms <= 0:
+            return 0.0
+        if not self.p99_ms or self.p99_ms <= self.p50_ms:
+            return self.p50_ms / 1000.0
+        sigma = (math.log(self.p99_ms) - math.log(self.p50_ms)) / _Z99
+        return rng.lognormvariate(math.log(self.p50_ms), sigma) / 1000.0
+
+
+@dataclass
+class Faults:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0          # fraction of requests answered 500
+    rate_limit_rate: float = 0.0     # fraction answered 429 + Retry-After
+    retry_after_s: int = 1
+    sequence: List[int] = field(default_factory=list)  # status codes for the next requests, then random
+    seed: Optional[int] = 0
+
+
+class BackendState:
+    """Faults + counters shared by a mock app's handlers."""
+
+    def __init__(self, faults: Optional[Faults] = None):
+        self.faults = faults or Faults()
+        self.rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "items": 0}
+
+    async def gate(self) -> Optional[JSONResponse]:
+        """Apply latency and injected failures; a response means 'answer with this'."""
+        f = self.faults
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = f.latency.sample_s(self.rng)
+            status = f.sequence.pop(0) if f.sequence else None
+            if status is None:
+                roll = self.rng.random()
+                if roll < f.rate_limit_rate:
+                    status = 429
+                elif roll < f.rate_limit_rate + f.error_rate:
+                    status = 500
+        if delay:
+            await asyncio.sleep(delay)
+        if status is None or status < 400:
+            return None
+        with self._lock:
+            self.stats["rate_limited" if status == 429 else "errors"] += 1
+        headers = {"Retry-After": str(f.retry_after_s)} if status == 429 else None
+        return JSONResponse({"error": f"injected {status}"}, status_code=status, headers=headers)
+
+    def served(self, items: int = 1) -> None:
+        with self._lock:
+            self.stats["ok"] += 1
+            self.stats["items"] += items
+
+
+# ---------- Embedding services ----------
+
+def ollama_app(dim: int = 384, faults: Optional[Faults] = None) -> FastAPI:
+    app = FastAPI()
+    app.state.mock = state = BackendState(faults)
+
+    @app.post("/api/embeddings")
+    async def embeddings(request: Request):
+        if (resp := await state.gate()) is not None:
+            return resp
+        body = await request.json()
+        state.served()
+        return {"embedding": hashed_ngram_embed([body.get("prompt", "")], dim)[0].tolist()}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        if (resp := await state.gate()) is not None:
+            return resp
+        body = await request.json()
+        inputs = body.get("input", "")
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        state.served(len(texts))
+        return {"model": body.get("model"), "embeddings": hashed_ngram_embed(texts, dim).tolist()}
+
+    return app
+
+
+def cloudflare_app(dim: int = 384, faults: Optional[Faults] = None) -> FastAPI:
+    """Workers AI; point EmbeddingConfig.cf_base_url at f"{server.url}/client/v4"."""
+    app = FastAPI()
+    app.state.mock = state = BackendState(faults)
+
+    @app.post("/client/v4/accounts/{account_id}/ai/run/{model:path}")
+    async def run(account_id: str, model: str, request: Request):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"success": False, "errors": [{"message": "auth required"}]}, status_code=401)
+        if (resp := await state.gate()) is not None:
+            return resp
+        body = await request.json()
+        text = body.get("text", "")
+        texts = text if isinstance(text, list) else [text]
+        state.served(len(texts))
+        return {
+            "result": {"shape": [len(texts), dim], "data": hashed_ngram_embed(texts, dim).tolist(), "pooling": "mean"},
+            "success": True, "errors": [], "messages": [],
+        }
+
+    return app
+
+
+# ---------- Qdrant (REST subset) ----------
+
+class _Collection:
+    def __init__(self, size: int, distance: str):
+        self.size = size
+        self.distance = distance
+        self.index: Dict[Any, int] = {}
+        self.ids: List[Any] = []
+        self.vectors: List[np.ndarray] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def upsert(self, pid: Any, vector: List[float], payload: Optional[Dict[str, Any]]) -> None:
+        vec = np.asarray(vector, dtype=np.float32)
+        if self.distance == "Cosine":
+            n = float(np.linalg.norm(vec))
+            vec = vec / n if n else vec
+        if pid in self.index:
+            i = self.index[pid]
+            self.vectors[i], self.payloads[i] = vec, payload or {}
+        else:
+            self.index[pid] = len(self.ids)
+            self.ids.append(pid)
+            self.vectors.append(vec)
+            self.payloads.append(payload or {})
+        self._matrix = None
+
+    def delete(self, pids: List[Any]) -> None:
+        keep = [i for i, pid in enumerate(self.ids) if pid not in set(pids)]
+        self.ids = [self.ids[i] for i in keep]
+        self.vectors = [self.vectors[i] for i in keep]
+        self.payloads = [self.payloads[i] for i in keep]
+        self.index = {pid: i for i, pid in enumerate(self.ids)}
+        self._matrix = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack(self.vectors) if self.vectors else np.zeros((0, self.size), np.float32)
+        return self._matrix
+
+
+def _match(payload: Dict[str, Any], cond: Dict[str, Any]) -> bool:
+    if "must" in cond or "should" in cond or "must_not" in cond:
+        return _passes(payload, cond)
+    value = (cond.get("match") or {}).get("value")
+    field = payload.get(cond.get("key"))
+    if isinstance(field, list):  # Qdrant: an array field matches if any element does
+        return value in field
+    return field == value
+
+
+def _passes(payload: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+    if not flt:
+        return True
+    if any(not _match(payload, c) for c in flt.get("must") or []):
+        return False
+    if any(_match(payload, c) for c in flt.get("must_not") or []):
+        return False
+    should = flt.get("should") or []
+    return not should or any(_match(payload, c) for c in should)
+
+
+def _ok(result: Any) -> Dict[str, Any]:
+    return {"result": result, "status": "ok", "time": 0.0}
+
+
+def qdrant_app(faults: Optional[Faults] = None) -> FastAPI:
+    app = FastAPI()
+    app.state.mock = state = BackendState(faults)
+    collections: Dict[str, _Collection] = {}
+    app.state.collections = collections
+    op_id = {"n": 0}
+
+    def missing(name: str) -> JSONResponse:
+        return JSONResponse(
+            {"status": {"error": f"Not found: Collection `{name}` doesn't exist!"}, "time": 0.0},
+            status_code=404,
+        )
+
+    def update_result() -> Dict[str, Any]:
+        op_id["n"] += 1
+        return _ok({"operation_id": op_id["n"], "status": "completed"})
+
+    @app.get("/")
+    async def root():
+        # claim the installed client's version so its compatibility check stays quiet
+        try:
+            from importlib.metadata import version
+            ver = version("qdrant-client")
+        except Exception:
+            ver = "1.15.0"
+        return {"title": "qdrant - vector search engine", "version": ver}
+
+    @app.get("/collections")
+    async def list_collections():
+        return _ok({"collections": [{"name": n} for n in collections]})
+
+    @app.get("/collections/{name}")
+    async def get_collection(name: str):
+        if (resp := await state.gate()) is not None:
+            return resp
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        state.served()
+        n = len(col.ids)
+        return _ok({
+            "status": "green", "optimizer_status": "ok", "segments_count": 1,
+            "points_count": n, "indexed_vectors_count": n, "payload_schema": {},
+            "config": {
+                "params": {"vectors": {"size": col.size, "distance": col.distance}, "shard_number": 1},
+                "hnsw_config": {"m": 16, "ef_construct": 100, "full_scan_threshold": 10000},
+                "optimizer_config": {"deleted_threshold": 0.2, "vacuum_min_vector_number": 1000,
+                                     "default_segment_number": 0, "flush_interval_sec": 5},
+                "wal_config": {"wal_capacity_mb": 32, "wal_segments_ahead": 0},
+            },
+        })
+
+    @app.get("/collections/{name}/exists")
+    async def exists(name: str):
+        return _ok({"exists": name in collections})
+
+    @app.put("/collections/{name}")
+    async def create_collection(name: str, request: Request):
+        body = await request.json()
+        vectors = body.get("vectors") or {}
+        collections[name] = _Collection(int(vectors.get("size", 0)), vectors.get("distance", "Cosine"))
+        return _ok(True)
+
+    @app.delete("/collections/{name}")
+    async def delete_collection(name: str):
+        return _ok(collections.pop(name, None) is not None)
+
+    @app.put("/collections/{name}/points")
+    async def upsert(name: str, request: Request):
+        if (resp := await state.gate()) is not None:
+            return resp
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        body = await request.json()
+        points = body.get("points")
+        if points is None:  # Batch form: {"batch": {"ids", "vectors", "payloads"}}
+            b = body.get("batch") or {}
+            payloads = b.get("payloads") or [None] * len(b.get("ids", []))
+            points = [{"id": i, "vector": v, "payload": p} for i, v, p in zip(b["ids"], b["vectors"], payloads)]
+        for p in points:
+            if len(p["vector"]) != col.size:
+                return JSONResponse(
+                    {"status": {"error": f"Wrong input: Vector dimension error: expected dim: {col.size}, "
+                                         f"got {len(p['vector'])}"}, "time": 0.0},
+                    status_code=400,
+                )
+            col.upsert(p["id"], p["vector"], p.get("payload"))
+        state.served(len(points))
+        return update_result()
+
+    def nearest(col: _Collection, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        q = body.get("query")
+        if isinstance(q, dict):
+            q = q.get("nearest")
+        qv = np.asarray(q, dtype=np.float32)
+        limit = int(body.get("limit") or 10)
+        rows = [i for i, p in enumerate(col.payloads) if _passes(p, body.get("filter"))]
+        points: List[Dict[str, Any]] = []
+        if rows:
+            mat = col.matrix()[rows]
+            if col.distance == "Euclid":
+                scores = np.linalg.norm(mat - qv, axis=1)
+                order = np.argsort(scores)[:limit]
+            else:
+                if col.distance == "Cosine":
+                    n = float(np.linalg.norm(qv))
+                    qv = qv / n if n else qv
+                scores = mat @ qv
+                order = np.argsort(-scores)[:limit]
+            with_payload = body.get("with_payload", True)
+            for k in order:
+                i = rows[int(k)]
+                points.append({
+                    "id": col.ids[i], "version": 0, "score": float(scores[k]),
+                    "payload": col.payloads[i] if with_payload else None,
+                })
+        return points
+
+    @app.post("/collections/{name}/points/query")
+    async def query(name: str, request: Request):
+        if (resp := await state.gate()) is not None:
+            return resp
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        points = nearest(col, await request.json())
+        state.served()
+        return _ok({"points": points})
+
+    @app.post("/collections/{name}/points/query/batch")
+    async def query_batch(name: str, request: Request):
+        if (resp := await state.gate()) is not None:
+            return resp
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        searches = (await request.json()).get("searches") or []
+        result = [{"points": nearest(col, body)} for body in searches]
+        state.served()
+        return _ok(result)
+
+    @app.post("/collections/{name}/points/count")
+    async def count(name: str, request: Request):
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        body = await request.json() if await request.body() else {}
+        n = sum(1 for p in col.payloads if _passes(p, (body or {}).get("filter")))
+        return _ok({"count": n})
+
+    @app.post("/collections/{name}/points")
+    async def retrieve(name: str, request: Request):
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        body = await request.json()
+        out = []
+        for pid in body.get("ids") or []:
+            if pid in col.index:
+                i = col.index[pid]
+                out.append({"id": pid, "payload": col.payloads[i]})
+        return _ok(out)
+
+    @app.post("/collections/{name}/points/delete")
+    async def delete_points(name: str, request: Request):
+        col = collections.get(name)
+        if col is None:
+            return missing(name)
+        body = await request.json()
+        col.delete(body.get("points") or [])
+        return update_result()
+
+    return app
+
+
+# ---------- Running a mock app ----------
+
+class MockServer:
+    """Serve a mock app with uvicorn on a free localhost port, in a background thread."""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1"):
+        self.app = app
+        self.host = host
+        self.port = 0
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def state(self) -> BackendState:
+        return self.app.state.mock
+
+    def start(self) -> "MockServer":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, 0))
+        self.port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("mock server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,38 @@
+"""Smoke tests for the benchmark suite (tests/benchmarks): tiny sizes, comparison logic."""
+
+import json
+
+import sys
+sys.path.insert(0, 'src')
+from tests.benchmarks import bench, synth
+from learning_mcp.pdf_loader import load_pdf_structured
+
+
+def test_synthetic_pdf_is_extractable(tmp_path):
+    """The hand-written PDF round-trips through the real loader."""
+    path = synth.make_pdf(tmp_path / "s.pdf", 3, lines_per_page=10, kinds=["prose", "code"])
+    chunks = load_pdf_structured(str(path), doc_id="s")
+    assert chunks
+    assert {c["page_start"] for c in chunks} <= {1, 2, 3}
+
+
+def test_run_benchmarks_tiny_scale():
+    """Loader and chunker benchmarks run end to end and report their primary metric."""
+    report = bench.run_benchmarks(["pdf_load", "classify", "json_load", "flatten", "chunker"], scale=0.01, repeat=1)
+    for name in ("pdf_load", "classify", "json_load", "flatten", "chunker"):
+        res = report["results"][name]
+        assert "error" not in res, res
+        assert res[bench.BENCHMARKS[name].metric] > 0
+    json.dumps(report)  # serializable as-is
+
+
+def test_compare_flags_regressions_in_metric_direction():
+    """Throughput drops and latency rises beyond tolerance are regressions; small noise is not."""
+    baseline = {"results": {"chunker": {"mb_per_s": 100.0}, "search": {"p95_ms": 100.0},
+                            "upsert": {"points_per_s": 1000.0}}}
+    current = {"results": {"chunker": {"mb_per_s": 60.0}, "search": {"p95_ms": 140.0},
+                           "upsert": {"points_per_s": 950.0}}}
+    rows = {r["benchmark"]: r for r in bench.compare(current, baseline, tolerance=0.25)}
+    assert rows["chunker"]["regression"] is True
+    assert rows["search"]["regression"] is True
+    assert rows["upsert"]["regression"] is False
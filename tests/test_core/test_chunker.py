@@ -0,0 +1,79 @@
+"""Tests for the shared chunking engine (learning_mcp.chunker)."""
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import chunker
+from learning_mcp.chunker import chunk_text, chunking_params, count_tokens, split_text
+
+PROSE = (
+    "The camera exposes a config API. Each call returns key=value lines! "
+    "Is the session token required? Yes, for every request after login. "
+    "Snapshots are served as JPEG and streams as RTSP. "
+) * 8
+
+
+@pytest.fixture
+def byte_tokens(monkeypatch):
+    """Offline tiktoken encoding with one token per UTF-8 byte."""
+    tiktoken = pytest.importorskip("tiktoken")
+    enc = tiktoken.Encoding(
+        name="bytes", pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={},
+    )
+    monkeypatch.setattr(chunker, "_encoding", lambda name: enc)
+    return enc
+
+
+def test_offsets_point_into_source():
+    """Every chunk is exactly text[start:end], in order, within the size limit."""
+    chunks = split_text(PROSE, 200, 40)
+    assert len(chunks) > 3
+    assert all(PROSE[c.start:c.end] == c.text for c in chunks)
+    assert all(len(c.text) <= 200 for c in chunks)
+    assert [c.start for c in chunks] == sorted(c.start for c in chunks)
+    # sentence-aware: chunks end after punctuation, and overlap reuses the previous tail
+    assert all(c.text[-1] in ".!?" for c in chunks[:-1])
+    assert all(b.start < a.end for a, b in zip(chunks, chunks[1:]))
+
+
+def test_long_runs_are_split_not_kept_whole():
+    """No sentence or word boundary: hard cuts still respect the size (no silent truncation later)."""
+    assert [len(c.text) for c in split_text("x" * 2500, 1000)] == [1000, 1000, 500]
+    words = " ".join(["word"] * 500)
+    assert all(len(c.text) <= 120 for c in split_text(words, 120, 20))
+
+
+def test_lines_mode_keeps_lines_whole():
+    code = "\n".join(f"    table.Network.eth{i}.IPAddress=10.0.0.{i};" for i in range(60))
+    chunks = split_text(code, 300, 60, breaks="lines")
+    for c in chunks:
+        assert code[c.start:c.end] == c.text
+        assert c.end == len(code) or code[c.end] == "\n"
+    assert chunks[1].text.startswith("table.Network.eth")  # overlap starts on a line
+
+
+def test_token_sizing(byte_tokens):
+    """unit=tokens bounds every chunk by the tokenizer's count, overlap included."""
+    text = PROSE.replace("camera", "caméra")
+    chunks = split_text(text, 64, 8, unit="tokens")
+    assert all(len(byte_tokens.encode(c.text)) <= 64 for c in chunks)
+    assert all(text[c.start:c.end] == c.text for c in chunks)
+    assert count_tokens("ab é") == 5
+
+
+def test_word_units_and_chunk_text():
+    assert chunk_text("one two three four five six seven eight nine ten", 4, 1) == [
+        "one two three four", "four five six seven", "seven eight nine ten",
+    ]
+    assert [len(c.text.split()) for c in split_text(PROSE, 30, 0, unit="words")][0] <= 30
+
+
+def test_chunking_params_from_profile():
+    assert chunking_params(None) == (1200, 200, "chars")
+    assert chunking_params({"size": 600, "overlap": 100}) == (600, 100, "chars")
+    assert chunking_params({"max_tokens": 480, "overlap": 64}) == (480, 64, "tokens")
+    assert chunking_params({"size": 200, "overlap": 20, "unit": "words"}) == (200, 20, "words")
+    with pytest.raises(ValueError):
+        chunking_params({"unit": "pages"})
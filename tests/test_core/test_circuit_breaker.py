@@ -0,0 +1,148 @@
+"""Unit tests for embedding circuit breakers and breaker-aware backend routing."""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import embeddings
+from learning_mcp.circuit_breaker import (
+    CircuitBreaker, CLOSED, OPEN, HALF_OPEN, get_breaker, breaker_states, reset_breakers,
+)
+from learning_mcp.embeddings import Embedder, EmbeddingConfig, EmbeddingError
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """N consecutive failures open the breaker; a success resets the count."""
+    br = CircuitBreaker("b", failure_threshold=3, open_s=30, clock=FakeClock())
+    br.record_failure("x")
+    br.record_failure("x")
+    br.record_success(5)
+    br.record_failure("x")
+    br.record_failure("x")
+    assert br.state == CLOSED
+
+    br.record_failure("boom")
+    assert br.state == OPEN
+    assert not br.allow()
+    assert br.snapshot()["last_error"] == "boom"
+
+
+def test_half_open_single_probe_then_close_or_reopen():
+    """After open_s one probe is admitted; its outcome closes or re-opens."""
+    clock = FakeClock()
+    br = CircuitBreaker("b", failure_threshold=1, open_s=30, clock=clock)
+    br.record_failure("down")
+    clock.t += 31
+    assert br.state == HALF_OPEN
+    assert br.available()
+    assert br.allow()          # the probe
+    assert not br.allow()      # concurrent calls are still rejected
+    br.record_failure("still down")
+    assert br.state == OPEN
+
+    clock.t += 31
+    assert br.allow()
+    br.record_success(12)
+    assert br.state == CLOSED
+    assert br.trips == 2
+
+
+def test_slow_success_counts_as_failure():
+    """Responses slower than slow_ms feed the breaker like errors."""
+    br = CircuitBreaker("b", failure_threshold=2, slow_ms=1000, clock=FakeClock())
+    br.record_success(5000)
+    br.record_success(5000)
+    assert br.state == OPEN
+    assert br.latency_percentile(95) == 5000
+
+
+def test_latency_percentiles():
+    br = CircuitBreaker("b", clock=FakeClock())
+    for ms in range(1, 101):
+        br.record_success(float(ms))
+    assert br.latency_percentile(50) == pytest.approx(50, abs=1)
+    assert br.latency_percentile(95) == pytest.approx(95, abs=1)
+
+
+@pytest.fixture
+def dual_config():
+    return EmbeddingConfig(
+        dim=4,
+        primary="ollama",
+        fallback="cloudflare",
+        ollama_host="http://ollama:11434",
+        ollama_model="nomic-embed-text",
+        cf_account_id="acct",
+        cf_api_token="token",
+        cf_model="@cf/test",
+        max_retries=0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_open_primary_routes_straight_to_fallback(dual_config):
+    """Once the primary trips, later calls never touch it until it half-opens."""
+    embedder = Embedder(dual_config)
+    calls = {"ollama": 0, "cf": 0}
+
+    async def ollama_down(text):
+        calls["ollama"] += 1
+        raise httpx.ConnectError("refused")
+
+    async def cf_ok(text, client):
+        calls["cf"] += 1
+        return [0.3] * 4
+
+    with patch.object(embeddings, "EMBED_PACING_MS", 0), \
+         patch.object(embedder, "_ollama_one_once", side_effect=ollama_down), \
+         patch.object(embedder, "_cf_one_once", side_effect=cf_ok):
+        for _ in range(3):
+            assert await embedder.embed(["q"]) == [[0.3] * 4]
+        assert calls["ollama"] == 3
+        assert get_breaker("ollama:http://ollama:11434:nomic-embed-text").state == OPEN
+
+        await embedder.embed(["q"])
+        assert calls["ollama"] == 3  # skipped while open
+        assert calls["cf"] == 4
+    await embedder.close()
+
+    states = breaker_states()
+    assert states["ollama:http://ollama:11434:nomic-embed-text"]["state"] == OPEN
+    assert states["cloudflare:@cf/test"]["state"] == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_bad_input_does_not_trip_breaker(dual_config):
+    """A 400 for one input means the backend is up; it is not a health failure."""
+    embedder = Embedder(dual_config)
+    req = httpx.Request("POST", "http://ollama:11434/api/embeddings")
+
+    async def bad_request(text):
+        raise httpx.HTTPStatusError("bad", request=req, response=httpx.Response(400, request=req))
+
+    embedder.fallback = None
+    with patch.object(embeddings, "EMBED_PACING_MS", 0), \
+         patch.object(embedder, "_ollama_one_once", side_effect=bad_request):
+        for _ in range(5):
+            with pytest.raises(EmbeddingError):
+                await embedder.embed(["q"])
+    assert get_breaker("ollama:http://ollama:11434:nomic-embed-text").state == CLOSED
+    await embedder.close()
@@ -6,7 +6,9 @@ import asyncio
 
 import sys
 sys.path.insert(0, 'src')
-from learning_mcp.embeddings import Embedder, EmbeddingConfig, EmbeddingError
+import numpy as np
+
+from learning_mcp.embeddings import Embedder, EmbeddingConfig, EmbeddingError, PartialEmbeddingError
 
 
 @pytest.fixture
@@ -217,3 +219,323 @@ async def test_embed_single_text_with_retry(ollama_config):
         
         assert len(vectors) == 1
         assert call_count >= 2  # Should have retried
+
+
+@pytest.fixture
+def dual_config():
+    """Ollama primary with a configured Cloudflare fallback (same dim)."""
+    return EmbeddingConfig(
+        dim=4,
+        primary="ollama",
+        fallback="cloudflare",
+        ollama_host="http://localhost:11434",
+        ollama_model="nomic-embed-text",
+        cf_account_id="acct",
+        cf_api_token="token",
+        cf_model="@cf/baai/bge-small-en-v1.5",
+    )
+
+
+@pytest.mark.asyncio
+async def test_embed_partial_failure_reroutes_only_failed_items(dual_config):
+    """Successful primary vectors are kept; only failures go to the fallback."""
+    embedder = Embedder(dual_config)
+
+    async def primary(texts, concurrency):
+        vecs = [[1.0] * 4 for _ in texts]
+        vecs[1] = None
+        raise PartialEmbeddingError(vecs, {1: RuntimeError("poison")})
+
+    fallback_inputs = []
+
+    async def fallback(texts, concurrency):
+        fallback_inputs.append(list(texts))
+        return [[2.0] * 4 for _ in texts]
+
+    with patch.object(embedder, '_embed_ollama', side_effect=primary), \
+         patch.object(embedder, '_embed_cloudflare', side_effect=fallback):
+        vectors = await embedder.embed(["a", "b", "c"])
+
+    assert fallback_inputs == [["b"]]
+    assert vectors == [[1.0] * 4, [2.0] * 4, [1.0] * 4]
+
+
+@pytest.mark.asyncio
+async def test_embed_dead_letters_quarantine_poison_items(dual_config):
+    """Items failing on every backend are reported, not fatal, when dead_letters is given."""
+    embedder = Embedder(dual_config)
+
+    async def backend(texts, concurrency):
+        vecs = [[0.5] * 4 if t != "poison" else [float("nan")] * 4 for t in texts]
+        return vecs
+
+    with patch.object(embedder, '_embed_ollama', side_effect=backend), \
+         patch.object(embedder, '_embed_cloudflare', side_effect=backend):
+        dead = []
+        vectors = await embedder.embed(["ok", "poison", "fine"], dead_letters=dead)
+        assert vectors[0] == [0.5] * 4 and vectors[1] is None and vectors[2] == [0.5] * 4
+        assert [d["index"] for d in dead] == [1]
+        assert dead[0]["backends"] == ["ollama", "cloudflare"]
+
+        # Without a dead-letter list the call stays all-or-nothing
+        with pytest.raises(EmbeddingError):
+            await embedder.embed(["ok", "poison"])
+
+
+@pytest.mark.asyncio
+async def test_embed_total_outage_still_raises(dual_config):
+    """If nothing succeeds on any backend, dead_letters does not hide the outage."""
+    embedder = Embedder(dual_config)
+
+    async def down(texts, concurrency):
+        raise RuntimeError("connection refused")
+
+    with patch.object(embedder, '_embed_ollama', side_effect=down), \
+         patch.object(embedder, '_embed_cloudflare', side_effect=down):
+        dead = []
+        with pytest.raises(EmbeddingError, match="connection refused"):
+            await embedder.embed(["a", "b"], dead_letters=dead)
+        assert dead == []
+
+
+@pytest.fixture
+def hedge_config():
+    """Same model (bge-small) on both backends, hedging on with a short delay."""
+    return EmbeddingConfig(
+        dim=4,
+        primary="cloudflare",
+        fallback="ollama",
+        ollama_host="http://localhost:11434",
+        ollama_model="bge-small-en-v1.5:latest",
+        cf_account_id="acct",
+        cf_api_token="token",
+        cf_model="@cf/baai/bge-small-en-v1.5",
+        max_retries=0,
+        hedge=True,
+        hedge_min_delay_ms=10,
+        hedge_default_delay_ms=20,
+    )
+
+
+@pytest.fixture
+def fresh_breakers():
+    from learning_mcp.circuit_breaker import reset_breakers
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+@pytest.mark.asyncio
+async def test_embed_query_hedges_slow_primary_to_fallback(hedge_config, fresh_breakers):
+    """A primary slower than the hedge delay loses to the fallback and is cancelled."""
+    embedder = Embedder(hedge_config)
+    cancelled = asyncio.Event()
+
+    async def slow_cf(text, client):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return [1.0] * 4
+
+    async def fast_ollama(text):
+        return [2.0] * 4
+
+    with patch.object(embedder, '_cf_one_once', side_effect=slow_cf), \
+         patch.object(embedder, '_ollama_one_once', side_effect=fast_ollama):
+        vec = await asyncio.wait_for(embedder.embed_query("q"), timeout=2)
+
+    assert vec.tolist() == [2.0] * 4
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_embed_query_fast_primary_does_not_hedge(hedge_config, fresh_breakers):
+    """Answers inside the delay never touch the fallback."""
+    embedder = Embedder(hedge_config)
+    fallback = AsyncMock(return_value=[2.0] * 4)
+
+    with patch.object(embedder, '_cf_one_once', AsyncMock(return_value=[1.0] * 4)), \
+         patch.object(embedder, '_ollama_one_once', fallback):
+        assert (await embedder.embed_query("q")).tolist() == [1.0] * 4
+    fallback.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_embed_query_incompatible_fallback_hedges_on_primary(dual_config, fresh_breakers):
+    """Different models on the two backends: the hedge is a second primary request."""
+    from dataclasses import replace
+    cfg = replace(dual_config, hedge=True, hedge_min_delay_ms=10, hedge_default_delay_ms=20, max_retries=0)
+    embedder = Embedder(cfg)
+    assert not embedder._hedge_compatible()
+    calls = []
+
+    async def ollama(text):
+        calls.append(text)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return [3.0] * 4
+
+    fallback = AsyncMock(return_value=[2.0] * 4)
+    with patch.object(embedder, '_ollama_one_once', side_effect=ollama), \
+         patch.object(embedder, '_cf_one_once', fallback):
+        vec = await asyncio.wait_for(embedder.embed_query("q"), timeout=2)
+
+    assert vec.tolist() == [3.0] * 4
+    assert calls == ["q", "q"]
+    fallback.assert_not_called()
+
+
+def test_hedge_config_from_profile():
+    """profile.embedding.hedge accepts a bool or a mapping."""
+    cfg = EmbeddingConfig.from_profile({"embedding": {"dim": 4, "hedge": {"enabled": True, "min_delay_ms": 80}}})
+    assert cfg.hedge and cfg.hedge_min_delay_ms == 80
+    assert not EmbeddingConfig.from_profile({"embedding": {"dim": 4, "hedge": False}}).hedge
+
+
+@pytest.mark.asyncio
+async def test_embed_array_returns_float32_matrix(dual_config):
+    """embed_array: contiguous (n, dim) float32; dead-lettered rows are NaN."""
+    embedder = Embedder(dual_config)
+
+    async def backend(texts, concurrency):
+        return [[0.25] * 4 if t != "poison" else [None] * 4 for t in texts]
+
+    with patch.object(embedder, '_embed_ollama', side_effect=backend), \
+         patch.object(embedder, '_embed_cloudflare', side_effect=backend):
+        dead = []
+        mat = await embedder.embed_array(["a", "poison", "b"], dead_letters=dead)
+
+    assert mat.shape == (3, 4) and mat.dtype == np.float32 and mat.flags["C_CONTIGUOUS"]
+    assert np.isnan(mat[1]).all()
+    assert mat[[0, 2]].tolist() == [[0.25] * 4, [0.25] * 4]
+    assert [d["index"] for d in dead] == [1]
+
+
+@pytest.mark.asyncio
+async def test_embed_rejects_inf_and_wrong_dim(dual_config):
+    """The vectorized check catches Inf and bad dims like the per-float loop did."""
+    embedder = Embedder(dual_config)
+    for bad in ([1.0, float("inf"), 0.0, 0.0], [1.0, 2.0]):
+        async def backend(texts, concurrency, bad=bad):
+            return [bad for _ in texts]
+
+        with patch.object(embedder, '_embed_ollama', side_effect=backend), \
+             patch.object(embedder, '_embed_cloudflare', side_effect=backend):
+            with pytest.raises(EmbeddingError):
+                await embedder.embed(["x"])
+
+
+@pytest.mark.asyncio
+async def test_backend_responses_with_bools_are_rejected(dual_config):
+    """JSON true/false in a vector is refused where each backend's response is decoded."""
+    import httpx
+
+    responses = {
+        "localhost": {"embedding": [1.0, True, 0.0, 0.0]},
+        "api.cloudflare.com": {"result": {"data": [[1.0, 0.0, False, 0.0]]}, "success": True},
+    }
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=responses[request.url.host]))
+    embedder = Embedder(dual_config)
+    embedder._client = httpx.AsyncClient(transport=transport)
+    try:
+        with pytest.raises(EmbeddingError, match="bool"):
+            await embedder._ollama_one_once("x")
+        with pytest.raises(EmbeddingError, match="bool"):
+            await embedder._cf_one_once("x", embedder._client)
+        responses["localhost"] = {"embedding": [1.0, 1, 0.0, 0.0]}  # ints are numbers
+        assert await embedder._ollama_one_once("x") == [1.0, 1, 0.0, 0.0]
+    finally:
+        await embedder.close()
+
+
+@pytest.mark.asyncio
+async def test_embed_dedups_identical_texts_within_call(dual_config):
+    """Duplicates are sent once and fanned back out (progress still counts every item)."""
+    embedder = Embedder(dual_config)
+    sent = []
+
+    async def backend(texts, concurrency, on_item=None):
+        sent.extend(texts)
+        return [[float(len(t))] * 4 for t in texts]
+
+    progress = []
+    with patch.object(embedder, '_embed_ollama', side_effect=backend):
+        vectors = await embedder.embed(["aa", "b", "aa", "aa"], on_progress=progress.append)
+
+    assert sent == ["aa", "b"]
+    assert vectors == [[2.0] * 4, [1.0] * 4, [2.0] * 4, [2.0] * 4]
+    assert sum(progress) == 2  # the 2 duplicates (the mock backend does not call on_item)
+
+
+@pytest.mark.asyncio
+async def test_embed_single_flight_across_concurrent_calls(dual_config):
+    """Concurrent calls for the same text share one backend request."""
+    calls = []
+    release = asyncio.Event()
+
+    async def backend(texts, concurrency):
+        calls.append(list(texts))
+        await release.wait()
+        return [[0.5] * 4 for _ in texts]
+
+    a, b = Embedder(dual_config), Embedder(dual_config)
+    with patch.object(a, '_embed_ollama', side_effect=backend), \
+         patch.object(b, '_embed_ollama', side_effect=backend):
+        first = asyncio.create_task(a.embed(["same query"]))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(b.embed_array(["same query", "other"]))
+        await asyncio.sleep(0.01)
+        release.set()
+        v1, v2 = await asyncio.gather(first, second)
+
+    assert calls == [["same query"], ["other"]]
+    assert v1 == [[0.5] * 4]
+    assert v2.tolist() == [[0.5] * 4, [0.5] * 4]
+
+
+@pytest.mark.asyncio
+async def test_embed_single_flight_shares_failures(dual_config):
+    """A joined request that fails fails the joiner too, and nothing stays registered."""
+    from learning_mcp import embeddings
+    release = asyncio.Event()
+
+    async def down(texts, concurrency):
+        await release.wait()
+        raise RuntimeError("connection refused")
+
+    a, b = Embedder(dual_config), Embedder(dual_config)
+    with patch.object(a, '_embed_ollama', side_effect=down), \
+         patch.object(a, '_embed_cloudflare', side_effect=down), \
+         patch.object(b, '_embed_ollama', side_effect=down) as b_backend:
+        first = asyncio.create_task(a.embed(["q"]))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(b.embed(["q"]))
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+
+    assert all(isinstance(r, EmbeddingError) for r in results)
+    b_backend.assert_not_called()
+    assert embeddings._INFLIGHT == {}
+
+
+@pytest.mark.asyncio
+async def test_hashing_backend_is_offline_and_deterministic():
+    """backend.primary=hashing embeds locally: unit-norm, stable, similar texts score higher."""
+    from learning_mcp.hashing_embeddings import hashed_ngram_embed
+    cfg = EmbeddingConfig.from_profile({"embedding": {"dim": 64, "backend": {"primary": "hashing"}}})
+    assert cfg.primary == "hashing"
+    embedder = Embedder(cfg)
+
+    with patch("httpx.AsyncClient.post", side_effect=AssertionError("no network")):
+        mat = await embedder.embed_array(["reset the camera password", "reset camera password", "weather"])
+        listed = await embedder.embed(["reset the camera password"])
+
+    assert mat.shape == (3, 64) and mat.dtype == np.float32
+    assert np.allclose(np.linalg.norm(mat, axis=1), 1.0, atol=1e-5)
+    assert mat[0] @ mat[1] > mat[0] @ mat[2]
+    assert np.array_equal(mat, hashed_ngram_embed(
+        ["reset the camera password", "reset camera password", "weather"], 64))
+    assert isinstance(listed[0], list) and np.allclose(listed[0], mat[0])
@@ -0,0 +1,245 @@
+"""Unit tests for the ingest pipeline (run_ingest): checkpoints and resume."""
+
+import shutil
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import ingest_worker
+from learning_mcp.ingest_worker import run_ingest
+from learning_mcp.job_events import JobEventBus, is_terminal
+from learning_mcp.jobs_db import JobsDB, JobStatus
+from learning_mcp.job_store import AsyncJobStore
+from learning_mcp.json_loader import iter_json_chunks, load_json
+
+FIXTURE = "tests/fixtures/sample.json"  # 11 chunks at chunk_size=100
+
+
+class FakeEmbedder:
+    """Records embedded texts; raises on the call number given in fail_on.
+    Texts containing `poison` are quarantined like Embedder does with dead_letters."""
+
+    def __init__(self, fail_on=None, poison=None):
+        self.fail_on = fail_on
+        self.poison = poison
+        self.calls = 0
+        self.texts = []
+
+    async def embed_array(self, texts, on_progress=None, dead_letters=None):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError("backend down")
+        self.texts.extend(texts)
+        out = np.full((len(texts), 8), 0.1, dtype=np.float32)
+        for i, t in enumerate(texts):
+            if self.poison and self.poison in t:
+                dead_letters.append({"index": i, "error": "NaN in vector", "backends": ["ollama"]})
+                out[i] = np.nan
+        if on_progress:
+            on_progress(len(texts) - len(dead_letters or []))
+        return out
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def profile(tmp_path):
+    paths = []
+    for name in ("a.json", "b.json"):
+        dst = tmp_path / name
+        shutil.copy(FIXTURE, dst)
+        paths.append(str(dst))
+    return {
+        "name": "resume-test",
+        "documents": [{"type": "json", "path": p} for p in paths],
+        "chunking": {"size": 100, "overlap": 0},
+        "vectordb": {"collection": "resume-test"},
+    }
+
+
+@pytest.fixture
+async def store(tmp_path):
+    s = AsyncJobStore(str(tmp_path / "worker.sqlite"), flush_interval_ms=20)
+    yield s
+    await s.close()
+
+
+async def _run(store, job_id, profile, embedder, vdb, truncate=False):
+    with patch.object(ingest_worker, "CHECKPOINT_CHUNKS", 4), \
+         patch("learning_mcp.ingest_worker.EmbeddingConfig") as cfg, \
+         patch("learning_mcp.ingest_worker.Embedder", return_value=embedder), \
+         patch("learning_mcp.ingest_worker.VDB", return_value=vdb):
+        cfg.from_profile.return_value = Mock(dim=8)
+        await run_ingest(job_id, profile, truncate, store)
+    await store.flush()
+    return store.db.get_job(job_id)
+
+
+def _vdb():
+    vdb = Mock()
+    vdb.upsert.side_effect = lambda vectors, payloads, ids, on_batch=None: on_batch(len(ids))
+    return vdb
+
+
+def _upserted_ids(vdb):
+    return [pid for call in vdb.upsert.call_args_list for pid in call.args[2]]
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_work(store, profile):
+    """A resumed job re-extracts only the partial file and embeds only what's left."""
+    job_id = store.db.start_job(
+        profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection="resume-test", truncate=True,
+        files_total=2, pages_total=0,
+    )
+
+    # First run dies on the 4th batch (chunks 12..15): 3 batches = 12 chunks upserted
+    vdb1 = _vdb()
+    job = await _run(store, job_id, profile, FakeEmbedder(fail_on=4), vdb1, truncate=True)
+    assert job["status"] == JobStatus.FAILED.value
+    assert "resumable from chunk 12/22" in job["error"]
+    cp = JobsDB.checkpoint_of(job)
+    assert cp["upserted"] == 12
+    assert cp["chunk_size"] == 100
+    assert [f["chunks"] for f in cp["files"]] == [11, 11]
+    assert cp["last"]["chunk_idx"] == 11
+    vdb1.truncate.assert_called_once()
+
+    # Resume: file a.json is complete and must not be loaded again
+    store.db.requeue_job(job_id)
+    profile["chunking"] = {"size": 5000, "overlap": 0}  # ignored: checkpoint params win
+    embedder2, vdb2 = FakeEmbedder(), _vdb()
+    with patch("learning_mcp.document_loaders.load_json", wraps=load_json) as spy:
+        job = await _run(store, job_id, profile, embedder2, vdb2, truncate=True)
+    assert job["status"] == JobStatus.COMPLETED.value
+    assert [c.args[0] for c in spy.call_args_list] == [profile["documents"][1]["path"]]
+    assert len(embedder2.texts) == 10
+    assert job["chunks_done"] == 22
+    assert job["files_done"] == 2
+    vdb2.truncate.assert_not_called()
+
+    # Point ids match an uninterrupted run
+    straight_id = store.db.start_job(
+        profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection="resume-test", truncate=False,
+        files_total=2, pages_total=0,
+    )
+    profile["chunking"] = {"size": 100, "overlap": 0}
+    vdb3 = _vdb()
+    await _run(store, straight_id, profile, FakeEmbedder(), vdb3)
+    assert _upserted_ids(vdb1) + _upserted_ids(vdb2) == _upserted_ids(vdb3)
+
+
+@pytest.mark.asyncio
+async def test_streamed_documents_upsert_like_loaded_ones(store, profile):
+    """Streamed (ChunkStream) documents produce the same points, batch by batch, incl. resume."""
+    def new_job():
+        return store.db.start_job(
+            profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+            vector_db="qdrant", collection="resume-test", truncate=False,
+            files_total=2, pages_total=0,
+        )
+
+    vdb_list = _vdb()
+    await _run(store, new_job(), profile, FakeEmbedder(), vdb_list)
+
+    streamed = dict(profile, documents=[dict(d, stream=True) for d in profile["documents"]])
+    with patch("learning_mcp.document_loaders.iter_json_chunks", wraps=iter_json_chunks) as spy:
+        vdb = _vdb()
+        job = await _run(store, new_job(), streamed, FakeEmbedder(), vdb)
+    assert spy.call_count == 2  # one pass per file: counted while embedding, no pre-scan
+    assert [f["chunks"] for f in JobsDB.checkpoint_of(job)["files"]] == [11, 11]
+    assert job["chunks_total"] == 22 and _upserted_ids(vdb) == _upserted_ids(vdb_list)
+
+    # fail_on=2: a.json not read to the end (count unknown); fail_on=6: b.json counted, 2 chunks left
+    for fail_on, counts in ((2, [None, None]), (6, [11, 11])):
+        job_id = new_job()
+        vdb1 = _vdb()
+        job = await _run(store, job_id, streamed, FakeEmbedder(fail_on=fail_on), vdb1)
+        assert job["status"] == JobStatus.FAILED.value
+        assert [f["chunks"] for f in JobsDB.checkpoint_of(job)["files"]] == counts
+        store.db.requeue_job(job_id)
+        vdb2 = _vdb()
+        job = await _run(store, job_id, streamed, FakeEmbedder(), vdb2)
+        assert job["status"] == JobStatus.COMPLETED.value
+        assert _upserted_ids(vdb1) + _upserted_ids(vdb2) == _upserted_ids(vdb_list)
+
+
+@pytest.mark.asyncio
+async def test_resume_refuses_changed_documents(store, profile):
+    """A checkpoint for a different document list is not silently reused."""
+    job_id = store.db.start_job(
+        profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection="resume-test", truncate=False,
+        files_total=2, pages_total=0,
+    )
+    store.db.save_checkpoint(job_id, {
+        "chunk_size": 100, "chunk_overlap": 0, "upserted": 3,
+        "files": [{"path": "/gone.json", "chunks": 5, "pages": 0}], "last": None,
+    })
+    job = await _run(store, job_id, profile, FakeEmbedder(), Mock())
+    assert job["status"] == JobStatus.FAILED.value
+    assert "changed since the checkpoint" in job["error"]
+
+
+@pytest.mark.asyncio
+async def test_poison_chunk_is_dead_lettered_not_fatal(store, profile):
+    """A chunk failing on every backend is recorded on the job and skipped."""
+    job_id = store.db.start_job(
+        profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection="resume-test", truncate=False,
+        files_total=2, pages_total=0,
+    )
+    vdb = _vdb()
+    job = await _run(store, job_id, profile, FakeEmbedder(poison="Avi Cohen"), vdb)
+
+    assert job["status"] == JobStatus.COMPLETED.value
+    dead = JobsDB.dead_letters_of(job)
+    assert [d["chunk_idx"] for d in dead] == [0, 11]  # "Name: Avi Cohen" in each file
+    assert dead[0]["doc_path"] == profile["documents"][0]["path"]
+    assert "NaN" in dead[0]["error"]
+    assert len(_upserted_ids(vdb)) == 20
+    upserted = np.concatenate([call.args[0] for call in vdb.upsert.call_args_list])
+    assert upserted.dtype == np.float32 and np.isfinite(upserted).all()
+    assert JobsDB.checkpoint_of(job)["upserted"] == 22
+
+
+@pytest.mark.asyncio
+async def test_too_many_dead_letters_fail_the_job(store, profile):
+    """Past INGEST_MAX_DEAD_LETTERS the job fails (resumable) instead of skipping."""
+    job_id = store.db.start_job(
+        profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection="resume-test", truncate=False,
+        files_total=2, pages_total=0,
+    )
+    with patch.object(ingest_worker, "MAX_DEAD_LETTERS", 1):
+        job = await _run(store, job_id, profile, FakeEmbedder(poison="Avi Cohen"), _vdb())
+    assert job["status"] == JobStatus.FAILED.value
+    assert "INGEST_MAX_DEAD_LETTERS=1" in job["error"]
+    assert "resumable from chunk 8/22" in job["error"]
+
+
+@pytest.mark.asyncio
+async def test_terminal_status_is_the_last_event(tmp_path, profile):
+    """progress.finish() runs before finish_job: nothing follows the terminal status."""
+    bus = JobEventBus()
+    s = AsyncJobStore(str(tmp_path / "events.sqlite"), flush_interval_ms=20, events=bus)
+    try:
+        for embedder in (FakeEmbedder(), FakeEmbedder(fail_on=2)):
+            job_id = s.db.start_job(
+                profile="resume-test", provider="ollama", model_name="m", model_dim=8,
+                vector_db="qdrant", collection="resume-test", truncate=False,
+                files_total=2, pages_total=0,
+            )
+            q = bus.subscribe(job_id)
+            job = await _run(s, job_id, profile, embedder, _vdb())
+            events = [q.get_nowait() for _ in range(q.qsize())]
+            assert is_terminal(events[-1]) and events[-1]["data"]["status"] == job["status"]
+            assert sum(e["event"] == "status" and is_terminal(e) for e in events) == 1
+    finally:
+        await s.close()
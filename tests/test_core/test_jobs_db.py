@@ -0,0 +1,286 @@
+"""Unit tests for the SQLite job tracker (jobs_db), its async store and event bus."""
+
+import asyncio
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp.jobs_db import JobsDB, JobStatus, JobPhase, SCHEMA_VERSION
+from learning_mcp.job_store import AsyncJobStore
+from learning_mcp.job_events import JobEventBus, coalesce, is_terminal
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh JobsDB in a temp directory."""
+    return JobsDB(str(tmp_path / "state" / "jobs.sqlite"))
+
+
+def _start(db, profile="dahua-camera"):
+    return db.start_job(
+        profile=profile,
+        provider="cloudflare",
+        model_name="@cf/baai/bge-small-en-v1.5",
+        model_dim=384,
+        vector_db="qdrant",
+        collection=profile,
+        truncate=False,
+        files_total=1,
+        pages_total=10,
+    )
+
+
+def test_wal_mode_and_synchronous(db):
+    """Connections run in WAL mode with synchronous=NORMAL."""
+    conn = db._connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_connection_is_reused_per_thread(db):
+    """Same thread gets the same pooled connection; other threads get their own."""
+    assert db._connect() is db._connect()
+
+    other = {}
+    t = threading.Thread(target=lambda: other.setdefault("conn", db._connect()))
+    t.start()
+    t.join()
+    assert other["conn"] is not db._connect()
+
+
+def test_schema_migrated_with_indexes(db):
+    """Migrations bring the schema to the latest version with list indexes."""
+    assert db.schema_version() == SCHEMA_VERSION
+    names = {
+        r[0]
+        for r in db._connect().execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {"idx_jobs_created_at", "idx_jobs_profile_created_at", "idx_jobs_status_created_at"} <= names
+
+
+def test_list_jobs_uses_index(db):
+    """Profile-filtered listing is served by an index, not a full scan."""
+    plan = db._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM jobs WHERE 1=1 AND profile=? ORDER BY created_at DESC LIMIT ?",
+        ("x", 5),
+    ).fetchall()
+    detail = " ".join(str(r[-1]) for r in plan)
+    assert "idx_jobs_profile_created_at" in detail
+
+
+def test_migrates_legacy_database(tmp_path):
+    """A pre-versioning DB (user_version=0, no indexes) is upgraded in place."""
+    path = tmp_path / "legacy.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, profile TEXT, status TEXT, created_at TEXT)")
+    conn.execute("INSERT INTO jobs VALUES ('old', 'p', 'completed', '2024-01-01')")
+    conn.commit()
+    conn.close()
+
+    db = JobsDB(str(path))
+    assert db.schema_version() == SCHEMA_VERSION
+    assert db.get_job("old")["status"] == "completed"
+
+
+def test_failed_migration_step_is_rolled_back(tmp_path):
+    """A step failing midway leaves none of its statements applied, so a retry succeeds."""
+    from learning_mcp import jobs_db
+
+    path = str(tmp_path / "jobs.sqlite")
+    JobsDB(path)
+    bad = jobs_db._MIGRATIONS + [(SCHEMA_VERSION + 1, [
+        "ALTER TABLE jobs ADD COLUMN extra INTEGER",
+        "CREATE INDEX idx_missing ON no_such_table (x)",
+    ])]
+    conn = jobs_db._open_connection(path)
+    with patch.object(jobs_db, "_MIGRATIONS", bad):
+        with pytest.raises(sqlite3.OperationalError):
+            jobs_db._migrate(conn)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert "extra" not in {r[1] for r in conn.execute("PRAGMA table_info(jobs)")}
+        bad[-1][1][1] = "CREATE INDEX idx_extra ON jobs (extra)"
+        assert jobs_db._migrate(conn) == SCHEMA_VERSION + 1
+    conn.close()
+
+
+def test_job_lifecycle(db):
+    """start → running → progress → finish round-trips through the DB."""
+    job_id = _start(db)
+    assert db.get_job(job_id)["status"] == JobStatus.QUEUED.value
+
+    db.mark_running(job_id)
+    db.set_phase(job_id, JobPhase.EMBED)
+    db.update_progress(job_id, chunks_done=42)
+    db.finish_job(job_id, status=JobStatus.COMPLETED)
+
+    job = db.get_job(job_id)
+    assert job["status"] == JobStatus.COMPLETED.value
+    assert job["phase"] == JobPhase.FINISHED.value
+    assert job["chunks_done"] == 42
+
+
+def test_recover_running_moves_every_running_row(db):
+    """Startup recovery is one unbounded UPDATE: no cap on how many orphans it sees."""
+    conn = db._connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO jobs (job_id, profile, status, created_at) VALUES (?, 'p', 'running', '2024-01-01')",
+            [(f"j{i}",) for i in range(1200)],
+        )
+    queued = _start(db)
+    ids = db.recover_running(requeue=False, error="restart")
+    assert len(ids) == 1200
+    assert db.count_by_status() == {JobStatus.FAILED.value: 1200, JobStatus.QUEUED.value: 1}
+    assert db.get_job("j7")["error"] == "restart" and db.get_job(queued)["status"] == JobStatus.QUEUED.value
+
+
+def test_list_jobs_filters(db):
+    """list_jobs filters by profile and status, newest first."""
+    a = _start(db, "a")
+    b = _start(db, "b")
+    db.finish_job(b, status=JobStatus.FAILED, error="boom")
+
+    assert [j["job_id"] for j in db.list_jobs(profile="a")] == [a]
+    assert [j["job_id"] for j in db.list_jobs(status="failed")] == [b]
+    assert len(db.list_jobs(limit=1)) == 1
+
+
+def test_cancel_queued_or_running_for_profile(db):
+    """Only queued/running jobs of the given profile are canceled."""
+    j1 = _start(db, "p")
+    j2 = _start(db, "p")
+    db.finish_job(j2, status=JobStatus.COMPLETED)
+    _start(db, "other")
+
+    assert db.cancel_queued_or_running_for_profile("p") == 1
+    assert db.get_job(j1)["status"] == JobStatus.CANCELED.value
+
+
+# ---------- AsyncJobStore ----------
+
+@pytest.fixture
+async def store(tmp_path):
+    """Async store with a long flush interval so coalescing is observable."""
+    s = AsyncJobStore(str(tmp_path / "store.sqlite"), flush_interval_ms=60_000)
+    yield s
+    await s.close()
+
+
+async def _astart(store, profile="p"):
+    return await store.start_job(
+        profile=profile, provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection=profile, truncate=False,
+        files_total=1, pages_total=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_coalesces_progress(store):
+    """Many progress updates collapse into one latest-wins write."""
+    job_id = await _astart(store)
+    with patch.object(store.db, "update_many", wraps=store.db.update_many) as spy:
+        for n in range(1, 101):
+            store.update_progress(job_id, chunks_done=n)
+        # not yet persisted, but visible to reads
+        assert store.db.get_job(job_id)["chunks_done"] == 0
+        assert (await store.get_job(job_id))["chunks_done"] == 100
+
+        await store.flush()
+        assert spy.call_count == 1
+    assert store.db.get_job(job_id)["chunks_done"] == 100
+
+
+@pytest.mark.asyncio
+async def test_store_terminal_state_flushes_progress_first(store):
+    """finish_job persists immediately, after pending progress."""
+    job_id = await _astart(store)
+    store.update_progress(job_id, chunks_done=7, phase=JobPhase.EMBED.value)
+    await store.finish_job(job_id, JobStatus.COMPLETED)
+
+    job = store.db.get_job(job_id)
+    assert job["status"] == JobStatus.COMPLETED.value
+    assert job["phase"] == JobPhase.FINISHED.value
+    assert job["chunks_done"] == 7
+
+
+@pytest.mark.asyncio
+async def test_store_periodic_flush(tmp_path):
+    """Pending progress is flushed on the timer without any other op."""
+    s = AsyncJobStore(str(tmp_path / "timer.sqlite"), flush_interval_ms=20)
+    try:
+        job_id = await _astart(s)
+        s.update_progress(job_id, pages_done=3)
+        for _ in range(50):
+            if s.db.get_job(job_id)["pages_done"] == 3:
+                break
+            await asyncio.sleep(0.02)
+        assert s.db.get_job(job_id)["pages_done"] == 3
+    finally:
+        await s.close()
+
+
+@pytest.mark.asyncio
+async def test_store_close_flushes_and_rejects_writes(tmp_path):
+    """close() persists pending progress; later writes fail loudly."""
+    s = AsyncJobStore(str(tmp_path / "close.sqlite"), flush_interval_ms=60_000)
+    job_id = await _astart(s)
+    s.update_progress(job_id, files_done=1)
+    await s.close()
+
+    assert s.db.get_job(job_id)["files_done"] == 1
+    with pytest.raises(RuntimeError):
+        await s.mark_running(job_id)
+
+
+# ---------- JobEventBus ----------
+
+@pytest.mark.asyncio
+async def test_store_publishes_events(tmp_path):
+    """Lifecycle and progress writes are fanned out to job subscribers."""
+    bus = JobEventBus()
+    s = AsyncJobStore(str(tmp_path / "events.sqlite"), flush_interval_ms=60_000, events=bus)
+    try:
+        job_id = await _astart(s)
+        q = bus.subscribe(job_id)
+        await s.set_phase(job_id, JobPhase.EMBED)
+        s.update_progress(job_id, chunks_embedded=3)
+        await s.finish_job(job_id, JobStatus.FAILED, error="boom")
+        await asyncio.sleep(0)  # deliveries hop through call_soon_threadsafe
+
+        events = [q.get_nowait() for _ in range(q.qsize())]
+        assert [e["event"] for e in events] == ["phase", "progress", "status"]
+        assert events[-1]["data"]["status"] == "failed"
+        assert is_terminal(events[-1])
+    finally:
+        await s.close()
+
+
+@pytest.mark.asyncio
+async def test_bus_bounded_queue_drops_oldest():
+    """A slow subscriber never blocks publishers; oldest events are dropped."""
+    bus = JobEventBus(queue_size=2)
+    q = bus.subscribe("j")
+    for i in range(5):
+        bus.publish("j", "progress", {"n": i})
+    await asyncio.sleep(0)
+    assert [q.get_nowait()["data"]["n"] for _ in range(q.qsize())] == [3, 4]
+
+    bus.unsubscribe("j", q)
+    assert bus.subscriber_count("j") == 0
+
+
+def test_coalesce_merges_progress_keeps_order():
+    """Consecutive progress ticks merge; phase/status boundaries are kept."""
+    evts = [
+        {"event": "progress", "data": {"a": 1}},
+        {"event": "progress", "data": {"a": 2, "b": 1}},
+        {"event": "phase", "data": {"phase": "upsert"}},
+        {"event": "progress", "data": {"c": 1}},
+    ]
+    out = coalesce(evts)
+    assert [e["event"] for e in out] == ["progress", "phase", "progress"]
+    assert out[0]["data"] == {"a": 2, "b": 1}
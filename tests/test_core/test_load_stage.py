@@ -0,0 +1,102 @@
+"""Tests for the executor-backed loader stage (learning_mcp.load_stage)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import load_stage
+from learning_mcp.document_loaders import iter_document_chunks
+from learning_mcp.progress import IngestProgress
+from tests.benchmarks import synth
+
+
+@pytest.mark.asyncio
+async def test_load_documents_matches_inline_loading(tmp_path, monkeypatch):
+    """PDFs in the process pool and JSON in threads give the inline chunks, in profile order."""
+    monkeypatch.setattr(load_stage, "LOAD_PDF", "process")
+    pdfs = [synth.make_pdf(tmp_path / f"{i}.pdf", 6 + i, lines_per_page=6, seed=i) for i in range(2)]
+    prof = {"name": "stage", "documents": [
+        {"type": "pdf", "path": str(pdfs[0])},
+        {"type": "json", "path": str(synth.make_json(tmp_path / "a.json", 20))},
+        {"type": "txt", "path": "ignored"},
+        {"type": "pdf", "path": str(pdfs[1])},
+    ]}
+    progress = IngestProgress()
+    loaded = [d async for d in load_stage.load_documents(
+        prof, chunk_size=400, chunk_overlap=0, progress=progress,
+        skip=lambda d: d["path"].endswith("1.pdf"),
+    )]
+    inline = list(iter_document_chunks(prof, chunk_size=400, chunk_overlap=0))
+
+    assert [d.spec for d in loaded] == [spec for spec, _ in inline]
+    assert [list(d.chunks) for d in loaded[:2]] == [list(p) for _, p in inline[:2]]
+    assert loaded[2].chunks is None  # skipped
+    assert [d.pages for d in loaded] == [6, 0, 0]
+    assert (progress.pages_done, progress.files_done) == (6, 2)  # relayed from the pool process
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_thread_loader_and_loop_stays_responsive(monkeypatch):
+    monkeypatch.setattr(load_stage, "LOAD_JSON", "thread")
+    stopped = threading.Event()
+
+    def slow_loader(doc_spec, *, progress=None, **kwargs):
+        try:
+            for page in range(1, 10_000):
+                time.sleep(0.005)  # blocks the loader thread only
+                progress.page_done(page)
+        finally:
+            stopped.set()
+        return []
+
+    monkeypatch.setattr(load_stage, "load_document", slow_loader)
+    prof = {"name": "stage", "documents": [{"type": "json", "path": "x.json"}]}
+
+    progress = IngestProgress()
+
+    async def consume():
+        return [d async for d in load_stage.load_documents(prof, chunk_size=100, chunk_overlap=0, progress=progress)]
+
+    task = asyncio.create_task(consume())
+    t0 = time.perf_counter()
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+    assert time.perf_counter() - t0 < 0.5  # the loop kept running while the loader worked
+    assert progress.pages_done > 0
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await asyncio.to_thread(stopped.wait, 2.0)  # LoadCanceled at the next page
+
+
+@pytest.mark.asyncio
+async def test_batch_reader_parses_off_the_loop_and_stops_on_cancel(monkeypatch):
+    monkeypatch.setattr(load_stage, "LOAD_JSON", "thread")
+    read = []
+
+    def slow_stream():
+        for i in range(10_000):
+            time.sleep(0.005)  # parsing a chunk blocks the reader thread only
+            read.append(threading.current_thread() is threading.main_thread())
+            yield {"text": str(i), "metadata": {}}
+
+    reader = load_stage.BatchReader(slow_stream())
+    assert [c["text"] for c in await reader.next(3)] == ["0", "1", "2"]
+
+    task = asyncio.create_task(reader.next(10_000))
+    t0 = time.perf_counter()
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+    assert time.perf_counter() - t0 < 0.5  # the loop kept running while the batch was read
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.05)
+    stopped_at = len(read)
+    await asyncio.sleep(0.05)
+    assert len(read) == stopped_at < 1000  # the thread stopped at the next chunk
+    assert not any(read)
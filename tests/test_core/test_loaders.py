@@ -7,9 +7,10 @@ import json
 
 import sys
 sys.path.insert(0, 'src')
-from learning_mcp.document_loaders import collect_chunks, known_document_count
-from learning_mcp.json_loader import load_json
-from learning_mcp.pdf_loader import load_pdf_structured
+from learning_mcp import json_loader
+from learning_mcp.document_loaders import ChunkStream, collect_chunks, iter_document_chunks, known_document_count
+from learning_mcp.json_loader import _flatten, iter_json_chunks, load_json, load_jsonl
+from learning_mcp.pdf_loader import OutlineIndex, _classify_text, load_pdf_structured, section_ancestors
 
 
 def test_known_document_count():
@@ -229,3 +230,170 @@ def test_collect_chunks_stats():
         assert "files_total" in stats
         assert stats["files_total"] > 0
 
+
+NESTED = {
+    "title": "Guide. Part one! Done?",
+    "tags": ["a", 1, None, True],
+    "items": [{"name": "x", "vals": [1.5, 2]}, 3, [], {"deep": {"er": [[1], {"k": "v"}]}}],
+    "empty": {},
+    "big": 12345678901234567890,
+}
+
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_iter_json_chunks_matches_load_json(tmp_path, use_ijson):
+    """Streaming yields exactly load_json's chunks (paths, prefixes, metadata), with or without ijson."""
+    path = tmp_path / "nested.json"
+    path.write_text(json.dumps(NESTED), encoding="utf-8")
+    ijson = json_loader.ijson if use_ijson else None
+    if use_ijson and ijson is None:
+        pytest.skip("ijson not installed")
+    with patch.object(json_loader, "ijson", ijson):
+        streamed = list(iter_json_chunks(str(path), chunk_size=10, chunk_overlap=2))
+    assert streamed == load_json(str(path), chunk_size=10, chunk_overlap=2)
+
+
+def test_json_fallback_without_ijson_warns_once(tmp_path, caplog, monkeypatch):
+    """Without ijson a streamed file is loaded whole; that is logged, once per process."""
+    path = tmp_path / "nested.json"
+    path.write_text(json.dumps(NESTED), encoding="utf-8")
+    monkeypatch.setattr(json_loader, "ijson", None)
+    monkeypatch.setattr(json_loader, "_warned_no_ijson", False)
+    with caplog.at_level("WARNING", logger="learning_mcp.json_loader"):
+        for _ in range(2):
+            list(iter_json_chunks(str(path), chunk_size=10, chunk_overlap=2))
+    assert [r.message for r in caplog.records].count(
+        "ijson is not installed: streamed JSON is loaded whole (memory grows with file size)"
+    ) == 1
+
+
+def test_load_jsonl_paths_match_json_array(tmp_path):
+    """A JSONL file indexes like the equivalent top-level JSON array; blank lines are skipped."""
+    records = [{"name": "a", "tags": ["x", "y"]}, {"name": "b", "nested": {"k": 1}}]
+    (tmp_path / "r.jsonl").write_text("\n".join(json.dumps(r) for r in records[:1]) + "\n\n"
+                                      + json.dumps(records[1]) + "\n", encoding="utf-8")
+    (tmp_path / "r.json").write_text(json.dumps(records), encoding="utf-8")
+    lines = load_jsonl(str(tmp_path / "r.jsonl"))
+    array = load_json(str(tmp_path / "r.json"))
+    assert [c["metadata"]["path"] for c in lines] == ["/0/name", "/0/tags", "/1/name", "/1/nested/k"]
+    assert [c["text"] for c in lines] == [c["text"] for c in array]
+
+    (tmp_path / "bad.jsonl").write_text('{"ok": 1}\n{"broken": \n', encoding="utf-8")
+    with pytest.raises(ValueError, match="line 2"):
+        load_jsonl(str(tmp_path / "bad.jsonl"))
+
+
+def test_large_json_documents_are_streamed(tmp_path):
+    """`stream: true` (or a file past JSON_STREAM_MIN_BYTES) yields a re-iterable ChunkStream."""
+    path = tmp_path / "data.jsonl"
+    path.write_text("\n".join(json.dumps({"id": i, "text": f"record {i}"}) for i in range(5)), encoding="utf-8")
+    profile = {"name": "p", "documents": [{"type": "jsonl", "path": str(path), "stream": True},
+                                          {"type": "jsonl", "path": str(path)}]}
+    assert known_document_count(profile) == 2
+
+    (_, streamed), (_, listed) = list(iter_document_chunks(profile, chunk_size=100, chunk_overlap=0))
+    assert isinstance(streamed, ChunkStream) and isinstance(listed, list)
+    assert len(streamed) == 10
+    assert list(streamed) == list(streamed) == listed
+    assert listed[0]["metadata"]["doc_path"] == str(path)
+
+
+def test_flatten_paths_and_array_classification():
+    """Primitive arrays join into one leaf; mixed arrays index every element; empties vanish."""
+    assert list(_flatten(NESTED)) == [
+        ("/title", "Guide. Part one! Done?"),
+        ("/tags", "a, 1, , True"),
+        ("/items/0/name", "x"),
+        ("/items/0/vals", "1.5, 2"),
+        ("/items/1", 3),
+        ("/items/3/deep/er/0", "1"),
+        ("/items/3/deep/er/1/k", "v"),
+        ("/big", 12345678901234567890),
+    ]
+    assert list(_flatten([1, None])) == [("/", "1, ")]
+    assert list(_flatten("x")) == [("/", "x")]
+
+
+def test_deeply_nested_json_loads(tmp_path):
+    """Nesting past the recursion limit flattens, and load_json falls back to streaming for it."""
+    depth = sys.getrecursionlimit() * 3
+    value = node = {}
+    for _ in range(depth):
+        node["a"] = {}
+        node = node["a"]
+    node["leaf"] = "bottom"
+    [(path, leaf)] = list(_flatten(value))
+    assert leaf == "bottom" and path.count("/a") == depth
+
+    if json_loader.ijson is None:
+        pytest.skip("ijson not installed")
+    path = tmp_path / "deep.json"
+    path.write_text('{"a":' * depth + '"bottom"' + "}" * depth, encoding="utf-8")
+    [chunk] = load_json(str(path), chunk_size=10**6)
+    assert chunk["metadata"]["path"].count("/a") == depth
+
+
+def test_cross_page_chunking_spans_pages(tmp_path):
+    """Short pages merge into denser chunks with accurate page_start/page_end and offsets."""
+    from tests.benchmarks import synth
+    pdf = synth.make_pdf(tmp_path / "short.pdf", 12, lines_per_page=3)
+    per_page = load_pdf_structured(str(pdf), doc_id="d", chunk_size=600, chunk_overlap=0)
+    cross = load_pdf_structured(str(pdf), doc_id="d", chunk_size=600, chunk_overlap=0, cross_pages=True)
+
+    assert len(per_page) == 12
+    assert len(cross) < len(per_page)
+    assert any(c["page_end"] > c["page_start"] for c in cross)
+    assert cross[0]["page_start"] == 1 and cross[-1]["page_end"] == 12
+    # spans are contiguous and in page order
+    assert all(a["page_end"] <= b["page_start"] + 1 for a, b in zip(cross, cross[1:]))
+
+    # offsets index the selected pages' cleaned text joined back to back (one run: same kind)
+    sep = "\n" if per_page[0]["has_code"] or per_page[0]["has_table"] else " "
+    joined = sep.join(c["text"] for c in per_page)
+    for c in cross:
+        assert joined[c["char_start"]:c["char_end"]] == c["text"]
+    assert len({c["chunk_id"] for c in cross}) == len(cross)
+
+
+
+def test_classify_text_code_and_tables():
+    from tests.benchmarks import synth
+    pages = synth.pathological_pages(4000)
+    assert _classify_text(pages["code"]) == (True, False)
+    assert _classify_text(pages["table"]) == (False, True)
+    assert _classify_text(pages["prose"]) == (False, False)
+    assert _classify_text('{"action": "getConfig", "name": "Network"}') == (True, False)
+    assert _classify_text("Name\tType\tDefault\nport\tint\t80\nhost\tstring\t-") == (False, True)
+    assert _classify_text("alpha beta\ngamma delta\nepsilon zeta") == (False, False)
+
+
+def test_classify_text_is_linear_on_pathological_pages():
+    """Inputs that made the old regexes backtrack (seconds per page) classify in milliseconds."""
+    import time
+    from tests.benchmarks import synth
+    for name, text in synth.pathological_pages(100_000).items():
+        t0 = time.perf_counter()
+        _classify_text(text)
+        assert time.perf_counter() - t0 < 1.0, name
+
+
+def test_pdf_outline_fills_headings_and_sections(tmp_path):
+    """Bookmarks give each page its heading path and a numbered section id (pages before the first: p{n})."""
+    from tests.benchmarks import synth
+    pdf = synth.make_pdf(tmp_path / "manual.pdf", 8, lines_per_page=4)
+    synth.add_outline(pdf, [("Network", 3, 0), ("TCP/IP", 3, 1), ("DNS", 5, 1), ("Audio", 7, 0)])
+
+    by_page = {c["page_start"]: c for c in load_pdf_structured(str(pdf), doc_id="d")}
+    assert [by_page[p]["section_id"] for p in (1, 3, 4, 5, 7, 8)] == ["p1", "s1.1", "s1.1", "s1.2", "s2", "s2"]
+    assert by_page[5]["heading_path"] == ["Network", "DNS"]
+    assert by_page[1]["heading_path"] == []
+    assert section_ancestors("s1.2") == ["s1", "s1.2"] and section_ancestors("p1") == ["p1"]
+
+    plain = load_pdf_structured(str(pdf), doc_id="d", use_outline=False)
+    assert all(c["heading_path"] == [] and c["section_id"] == f"p{c['page_start']}" for c in plain)
+
+    chunks, _ = collect_chunks({"name": "cam", "documents": [{"type": "pdf", "path": str(pdf)}]},
+                               chunk_size=600, chunk_overlap=0)
+    meta = chunks[4]["metadata"]
+    assert (meta["section"], meta["title"], meta["sections"]) == ("s1.2", "DNS", ["s1", "s1.2"])
+    assert len(OutlineIndex([])) == 0
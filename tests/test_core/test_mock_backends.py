@@ -0,0 +1,72 @@
+"""Tests for the mock embedding/Qdrant servers and the load harness (tests/mocks, tests/load)."""
+
+import numpy as np
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp.embeddings import Embedder, EmbeddingConfig
+from learning_mcp.vdb import VDB
+from tests.load import harness
+from tests.mocks.backends import Faults, MockServer, cloudflare_app, ollama_app, qdrant_app
+
+
+@pytest.mark.asyncio
+async def test_embedder_retries_mock_ollama_429():
+    """A scripted 429 (Retry-After) is retried by the Embedder and counted by the mock."""
+    with MockServer(ollama_app(dim=16, faults=Faults(sequence=[429], retry_after_s=0))) as srv:
+        emb = Embedder(EmbeddingConfig(dim=16, primary="ollama", ollama_host=srv.url, ollama_model="m", max_retries=1))
+        try:
+            vecs = await emb.embed(["hello", "hello world"])
+        finally:
+            await emb.close()
+    assert len(vecs) == 2 and len(vecs[0]) == 16
+    assert srv.state.stats["rate_limited"] == 1
+    assert srv.state.stats["ok"] == 2
+
+
+@pytest.mark.asyncio
+async def test_embedder_uses_configured_cloudflare_base_url():
+    """cloudflare.base_url points the Embedder at the Workers AI mock."""
+    with MockServer(cloudflare_app(dim=8)) as srv:
+        cfg = EmbeddingConfig.from_profile({"embedding": {
+            "dim": 8, "backend": {"primary": "cloudflare"},
+            "cloudflare": {"account_id": "a", "api_token": "t", "model": "@cf/x/y",
+                           "base_url": f"{srv.url}/client/v4"},
+        }})
+        emb = Embedder(cfg)
+        try:
+            vec = await emb.embed_query("hello")
+        finally:
+            await emb.close()
+    assert vec.shape == (8,)
+    assert srv.state.stats["ok"] == 1
+
+
+def test_vdb_against_mock_qdrant():
+    """VDB's REST calls (create, upsert, filtered query, count) work against the Qdrant mock."""
+    with MockServer(qdrant_app()) as srv:
+        vdb = VDB(url=srv.url, collection="c", dim=4)
+        vdb.truncate()
+        vectors = np.eye(4, dtype=np.float32)
+        ids = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(4)]
+        vdb.upsert(vectors, [{"doc_id": "a" if i < 2 else "b", "i": i} for i in range(4)], ids)
+
+        assert vdb.count() == 4
+        hits = vdb.search([0.0, 1.0, 0.1, 0.0], top_k=2, filter_by={"doc_id": "a"})
+        assert [h.payload["i"] for h in hits] == [1, 0]
+        assert vdb.search([0.0, 0.0, 1.0, 0.0], top_k=1)[0].payload["i"] == 2
+
+        # array payloads match on any element (section-scoped search over section ancestors)
+        vdb.upsert(vectors, [{"doc_id": "s", "sections": ["s2", f"s2.{i}"] if i else ["s1"], "i": i} for i in range(4)], ids)
+        assert sorted(h.payload["i"] for h in vdb.search([1.0, 1.0, 1.0, 1.0], top_k=4, filter_by={"sections": "s2"})) == [1, 2, 3]
+
+
+def test_load_harness_smoke():
+    """The harness ingests synthetic docs through run_ingest and serves searches."""
+    report = harness.run(docs=1, records=8, dim=32, searches=5, search_concurrency=2, pacing_ms=0)
+    assert report["ingest"]["status"] == "completed"
+    assert report["ingest"]["chunks"] > 0
+    assert report["search"]["errors"] == 0
+    assert report["search"]["p99_ms"] is not None
+    assert report["backends"]["embed"]["ok"] >= report["ingest"]["chunks"] // 2
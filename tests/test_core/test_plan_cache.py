@@ -0,0 +1,76 @@
+"""Tests for the persistent planner cache (learning_mcp.plan_cache)."""
+
+import asyncio
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import retrieval
+from learning_mcp.jobs_db import JobsDB, JobStatus
+from learning_mcp.plan_cache import PlanCache, collection_generation, hints_version, normalize_goal
+from learning_mcp.retrieval import LocalRetriever
+
+RESULT = {
+    "status": "ok",
+    "plan": {"endpoint": "/cgi-bin/configManager.cgi", "method": "GET",
+             "params": {"action": "getConfig", "name": "AudioEncode"}, "body": None},
+    "confidence": 0.9,
+    "notes": None,
+}
+HINTS = {"endpoint": {"allow_pattern": "^/cgi-bin/configManager\\.cgi$"}}
+
+
+def _ingest(db, finish=True):
+    job = db.start_job(profile="cam", provider="ollama", model_name="m", model_dim=16, vector_db="qdrant",
+                       collection="cam", truncate=True, files_total=1, pages_total=1)
+    db.mark_running(job)
+    if finish:
+        db.finish_job(job, JobStatus.COMPLETED)
+    return job
+
+
+def test_hits_survive_reopen_and_expire_on_new_generation(tmp_path):
+    path = str(tmp_path / "plans.sqlite")
+    cache = PlanCache(path)
+    hv = hints_version(HINTS)
+    assert cache.get("enable audio on camera", "cam", hv, "g1") is None
+    cache.put("enable audio on camera", "cam", hv, "g1", RESULT, llm_calls=4)
+    cache.close()
+
+    cache = PlanCache(path)  # persistent
+    assert cache.get("  Enable AUDIO on camera! ", "cam", hv, "g1") == RESULT
+    assert cache.get("enable audio on camera", "other", hv, "g1") is None
+    assert cache.get("enable audio on camera", "cam", hints_version({"endpoint": {}}), "g1") is None
+    assert cache.get("enable audio on camera", "cam", hv, None) is None  # ingest running: bypass, not counted
+    assert cache.stats("cam") == {"lookups": 3, "hits": 1, "hit_rate": 0.3333, "saved_llm_calls": 4, "entries": 1}
+
+    # re-ingest: the old plan no longer matches and is dropped on the next store
+    assert cache.get("enable audio on camera", "cam", hv, "g2") is None
+    cache.put("snapshot", "cam", hv, "g2", RESULT, llm_calls=2)
+    assert cache.stats("cam")["entries"] == 1
+    assert cache.get("snapshot", "cam", hv, "g2") == RESULT
+    cache.close()
+
+
+def test_generation_follows_ingest_jobs(tmp_path, monkeypatch):
+    assert normalize_goal("Get  the\tvideo config?") == "get the video config"
+    assert hints_version({"a": 1, "b": 2}) == hints_version({"b": 2, "a": 1})
+    assert collection_generation([]) == "0"
+    assert collection_generation([{"job_id": "q", "status": "queued"}]) == "0"
+    assert collection_generation([{"job_id": "r", "status": "running"}, {"job_id": "a", "status": "completed"}]) is None
+
+    db_path = str(tmp_path / "jobs.sqlite")
+    monkeypatch.setattr(retrieval, "JOBS_DB_PATH", db_path)
+
+    def generation():
+        return asyncio.run(LocalRetriever().generation("cam"))
+
+    assert generation() is None  # no jobs DB: the ingest history is unknown, bypass
+    db = JobsDB(db_path)
+    job = _ingest(db, finish=False)
+    assert generation() is None  # running: collection in flux
+    db.finish_job(job, JobStatus.COMPLETED)
+    first = generation()
+    assert first not in (None, "0")
+    assert generation() == first
+    _ingest(db)
+    assert generation() not in (None, first)
@@ -0,0 +1,111 @@
+"""Unit tests for live ingest progress (IngestProgress, job_pct)."""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp.progress import IngestProgress, job_pct
+from learning_mcp.pdf_loader import load_pdf_structured
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_loader_counters_reach_sink(clock):
+    """File/page callbacks update counters and push column updates to the sink."""
+    sink = Mock()
+    p = IngestProgress(files_total=1, pages_total=3, sink=sink, clock=clock)
+
+    p.start_file("/data/manual.pdf")
+    p.page_done(4, selected_pages=3)
+    p.page_done(5, selected_pages=3)
+    p.file_done()
+
+    assert p.pages_done == 2
+    assert p.files_done == 1
+    sink.assert_any_call({"current_file": "/data/manual.pdf", "current_file_pages": None, "current_page": None})
+    sink.assert_any_call({"pages_done": 2, "current_page": 5, "current_file_pages": 3})
+
+
+def test_rolling_rate_and_eta(clock):
+    """chunks/min comes from the rolling window; ETA uses remaining chunks."""
+    p = IngestProgress(clock=clock, window_s=60)
+    p.set_chunks_total(100)
+
+    for _ in range(10):
+        p.chunks_embedded_add(1)
+        clock.t += 6.0  # 10 chunks per minute
+
+    assert p.chunks_per_min() == pytest.approx(10.0)
+    assert p.eta_seconds() == pytest.approx(90 * 6.0)
+
+    # events older than the window drop out
+    clock.t += 120
+    assert p.chunks_per_min() is None
+
+
+def test_phase_durations_accumulate(clock):
+    """Each phase records wall time; finish() closes the running one."""
+    p = IngestProgress(clock=clock)
+    p.enter_phase("extract")
+    clock.t += 2.5
+    p.enter_phase("embed")
+    clock.t += 4.0
+    p.finish()
+
+    assert p.phase_durations() == {"extract": 2.5, "embed": 4.0}
+    assert json.loads(p.snapshot()["phase_durations"]) == {"extract": 2.5, "embed": 4.0}
+
+
+def test_counters_clamped_to_total(clock):
+    """Re-reported chunks (e.g. retried on fallback) never exceed the total."""
+    p = IngestProgress(clock=clock)
+    p.set_chunks_total(3)
+    p.chunks_embedded_add(5)
+    p.chunks_upserted_add(5)
+    assert p.chunks_embedded == 3
+    assert p.chunks_done == 3
+
+
+def test_job_pct_weights_phases():
+    """pct blends extract/embed/upsert progress; completed is always 100."""
+    assert job_pct({"status": "completed"}) == 100
+    assert job_pct({"status": "running", "phase": "extract", "pages_done": 5, "pages_total": 10}) == 10
+    assert job_pct({
+        "status": "running", "phase": "embed",
+        "chunks_total": 100, "chunks_embedded": 50, "chunks_done": 0,
+    }) == 55
+    assert job_pct({"status": "queued", "phase": "preflight"}) == 0
+
+
+def test_pdf_loader_reports_every_selected_page():
+    """load_pdf_structured calls on_page for each selected page, even empty ones."""
+    with patch('learning_mcp.pdf_loader.PdfReader') as mock_reader:
+        pages = [Mock(), Mock(), Mock()]
+        pages[0].extract_text.return_value = "First page text."
+        pages[1].extract_text.return_value = ""
+        pages[2].extract_text.return_value = "Third page text."
+        mock_reader.return_value.pages = pages
+
+        seen = []
+        load_pdf_structured(
+            "/fake/test.pdf",
+            doc_id="doc",
+            exclude_pages="3",
+            on_page=lambda page, total: seen.append((page, total)),
+        )
+
+    assert seen == [(1, 2), (2, 2)]
@@ -0,0 +1,123 @@
+"""Tests for in-process planner retrieval (learning_mcp.retrieval)."""
+
+import os
+from unittest.mock import patch
+
+import httpx
+import pytest
+import yaml
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp import retrieval
+from learning_mcp.config import load_profiles_cached, settings
+from learning_mcp.embeddings import Embedder, EmbeddingConfig
+from learning_mcp.retrieval import LocalRetriever, close_profile_resources, merge_hits, profile_resources, ranked
+from learning_mcp.vdb import VDB
+from tests.mocks.backends import MockServer, ollama_app, qdrant_app
+
+DOCS = [
+    "GET /cgi-bin/configManager.cgi?action=getConfig&name=AudioEncode returns the audio settings.",
+    "Set AudioEnable=true with action=setConfig to enable audio on the camera.",
+    "The snapshot endpoint returns a JPEG image of the current frame.",
+]
+
+
+def _profile(embed_url, qdrant_url, dim=16):
+    return {
+        "name": "cam",
+        "embedding": {"dim": dim, "backend": {"primary": "ollama"}, "ollama": {"host": embed_url, "model": "m"}},
+        "vectordb": {"url": qdrant_url, "collection": "cam"},
+        "autogen_hints": {"endpoint": {"allow_pattern": "^/cgi-bin/configManager\\\\.cgi$"}},
+    }
+
+
+@pytest.fixture
+def backends(tmp_path):
+    with MockServer(ollama_app(dim=16)) as embed_srv, MockServer(qdrant_app()) as qdrant_srv:
+        path = tmp_path / "learning.yaml"
+        path.write_text(yaml.safe_dump({"profiles": [_profile(embed_srv.url, qdrant_srv.url)]}), encoding="utf-8")
+        with patch.object(settings, "PROFILES_PATH", str(path)):
+            yield path, embed_srv, qdrant_srv
+
+
+async def _index(prof):
+    emb = Embedder(EmbeddingConfig.from_profile(prof))
+    try:
+        vectors = await emb.embed_array(DOCS)
+    finally:
+        await emb.close()
+    vdb = VDB(url=prof["vectordb"]["url"], collection="cam", dim=16)
+    vdb.truncate()
+    ids = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(len(DOCS))]
+    vdb.upsert(vectors, [{"doc_id": "cam", "text": t, "chunk_idx": i} for i, t in enumerate(DOCS)], ids)
+
+
+@pytest.mark.asyncio
+async def test_local_retriever_matches_api_context_route(backends):
+    from fastapi import FastAPI
+    from learning_mcp.search_routes import router
+
+    await _index(load_profiles_cached()["profiles"][0])
+    app = FastAPI()
+    app.include_router(router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        r = await client.post("/search/api_context", json={"q": "enable audio", "profile": "cam", "top_k": 3})
+    expected = r.json()["results"]
+
+    retriever = LocalRetriever()
+    try:
+        assert await retriever.search("enable audio", "cam", top_k=3) == expected
+        assert (await retriever.hints("cam"))["endpoint"]["allow_pattern"].startswith("^/cgi-bin")
+        # the planner's searches share one embedder/VDB per profile
+        assert profile_resources("cam") == profile_resources("cam")
+        await retriever.search("snapshot", "cam")
+    finally:
+        await retriever.close()
+        await close_profile_resources()
+    assert retrieval._REGISTRY == {}
+
+
+@pytest.mark.asyncio
+async def test_config_cache_and_resources_follow_file_changes(backends):
+    path, embed_srv, qdrant_srv = backends
+    first = load_profiles_cached()
+    assert load_profiles_cached() is first  # no re-read while the file is unchanged
+    emb, _ = profile_resources("cam")
+    assert profile_resources("cam")[0] is emb
+
+    path.write_text(yaml.safe_dump({"profiles": [_profile(embed_srv.url, qdrant_srv.url, dim=32)]}), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_profiles_cached()["profiles"][0]["embedding"]["dim"] == 32
+    new_emb, vdb = profile_resources("cam")
+    assert new_emb is not emb and vdb.dim == 32
+    await close_profile_resources()
+
+
+@pytest.mark.asyncio
+async def test_search_many_batches_and_merges_by_chunk(backends):
+    _, _, qdrant_srv = backends
+    await _index(load_profiles_cached()["profiles"][0])
+    queries = ["enable audio", "snapshot jpeg", "getConfig AudioEncode"]
+    retriever = LocalRetriever()
+    try:
+        stats = qdrant_srv.state.stats
+        before = stats["requests"]
+        singles = [await retriever.search(q, "cam", top_k=2) for q in queries]
+        per_search = (stats["requests"] - before) // len(queries)
+        before = stats["requests"]
+        batched = await retriever.search_many(queries, "cam", top_k=2, timeout_s=10)
+        assert stats["requests"] - before == per_search  # all queries in one query_batch_points call
+    finally:
+        await close_profile_resources()
+    assert batched == singles
+
+    merged = merge_hits(None, *batched)
+    ids = [h["chunk_id"] for hits in batched for h in hits]
+    assert len(merged) == len(set(ids)) < len(ids)  # 3 docs, 6 hits: duplicates collapse
+    for key, hit in merged.items():
+        assert hit["score"] == max(h["score"] for hits in batched for h in hits if h["chunk_id"] == key)
+    # merging the same hits again (a later loop) adds nothing
+    assert len(merge_hits(merged, *batched)) == len(merged)
+    assert [h["score"] for h in ranked(merged)] == sorted((h["score"] for h in merged.values()), reverse=True)
@@ -0,0 +1,109 @@
+"""Tests for the rule-based planner fast path (learning_mcp.agents.rule_planner)."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+import yaml
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp.agents.rule_planner import plan_kind, rule_plan, valid_endpoint
+
+CONFIG = Path(__file__).resolve().parents[2] / "config" / "learning.yaml"
+HINTS = next(
+    p for p in yaml.safe_load(CONFIG.read_text(encoding="utf-8"))["profiles"] if p["name"] == "dahua-camera"
+)["autogen_hints"]
+
+HITS = [
+    {"score": 0.8, "snippet": "URL: http://192.168.1.108/cgi-bin/configManager.cgi?action=getConfig&name=AudioEncode "
+                              "returns the audio encode config.", "hints": {}},
+    {"score": 0.7, "snippet": "Example: http://<server>/cgi-bin/configManager.cgi?action=setConfig"
+                              "&Encode[0].MainFormat[0].AudioEnable=true", "hints": {}},
+    {"score": 0.6, "snippet": "GET /cgi-bin/configManager.cgi?action=getConfig&name=VideoInOptions", "hints": {}},
+]
+
+
+def test_rule_plan_builds_reads_and_writes_from_evidence():
+    read = rule_plan("Get the audio encode config", HINTS, HITS)
+    assert read["plan"] == {
+        "endpoint": "/cgi-bin/configManager.cgi", "method": "GET",
+        "params": {"action": "getConfig", "name": "AudioEncode"}, "body": None,
+    }
+    assert read["status"] == "ok" and read["confidence"] == 0.9
+
+    write = rule_plan("disable audio on camera", HINTS, HITS)
+    assert write["plan"]["params"] == {"action": "setConfig", "Encode[0].MainFormat[0].AudioEnable": "false"}
+    assert plan_kind(write["plan"], HINTS) == "write" and plan_kind(read["plan"], HINTS) == "read"
+
+    # feature only in the profile's endpoint_examples: still a plan, lower confidence,
+    # when it covers the whole goal or the evidence mentions it
+    assert rule_plan("audio encode", HINTS, HITS[2:])["confidence"] == 0.75
+    mentioned = [{"snippet": "AudioEncode holds the audio settings of each channel.", "hints": {}}] + HITS[2:]
+    assert rule_plan("show audio volume", HINTS, mentioned)["plan"]["params"]["name"] == "AudioEncode"
+
+
+@pytest.mark.parametrize("goal, hits, hints", [
+    ("what is the network config", HITS, HINTS),       # no matching feature
+    ("get video audio", HITS, HINTS),                  # tie: AudioEncode vs VideoInOptions
+    ("enable audio", HITS[:1], HINTS),                 # write param not in evidence (example required)
+    ("set audio to 5", HITS, HINTS),                   # non-boolean value for an Enable param
+    ("get audio encode config", HITS, {}),             # profile without templates
+    ("get video encode config", [{"snippet": "The camera supports many features.", "hints": {}}], HINTS),
+    ("show audio input volume", [{"snippet": "The camera supports many features.", "hints": {}}], HINTS),
+])                                                     # ^ curated name shares one goal word only
+def test_rule_plan_falls_through_when_unsure(goal, hits, hints):
+    assert rule_plan(goal, hints, hits) is None
+    assert not valid_endpoint("/app/data/dahua/DAHUA_IPC_HTTP_API_V1.pdf", "", HINTS["endpoint"]["forbid_patterns"])
+
+
+class _Retriever:
+    def __init__(self):
+        self.searches = 0
+
+    async def hints(self, profile):
+        return HINTS
+
+    async def search_many(self, queries, profile, top_k=8, section=None, timeout_s=None):
+        self.searches += 1
+        return [HITS for _ in queries]
+
+    async def generation(self, profile):
+        return None
+
+    async def close(self):
+        pass
+
+
+def test_planner_fast_path_needs_no_llm(monkeypatch):
+    from learning_mcp.agents import autogen_planner
+
+    monkeypatch.setattr(autogen_planner, "get_plan_cache", lambda: None)
+    monkeypatch.setattr(autogen_planner, "AssistantAgent", None)  # as when autogen is not installed
+    retriever = _Retriever()
+    result = asyncio.run(autogen_planner.plan_with_autogen("enable audio", "dahua-camera", retriever=retriever))
+    assert result["status"] == "ok"
+    assert result["plan"]["params"]["Encode[0].MainFormat[0].AudioEnable"] == "true"
+    assert retriever.searches == 1
+
+    result = asyncio.run(autogen_planner.plan_with_autogen("what is the network config", "dahua-camera", retriever=retriever))
+    assert result == {"status": "needs_input", "reason": "AutoGen not installed"}
+
+
+def test_fast_path_plans_are_cached(tmp_path, monkeypatch):
+    from learning_mcp.agents import autogen_planner
+    from learning_mcp.plan_cache import PlanCache
+
+    class Retriever(_Retriever):
+        async def generation(self, profile):
+            return "g1"
+
+    cache = PlanCache(str(tmp_path / "plans.sqlite"))
+    monkeypatch.setattr(autogen_planner, "get_plan_cache", lambda: cache)
+    retriever = Retriever()
+    first = asyncio.run(autogen_planner.plan_with_autogen("enable audio", "dahua-camera", retriever=retriever))
+    again = asyncio.run(autogen_planner.plan_with_autogen("enable audio", "dahua-camera", retriever=retriever))
+    assert again["plan"] == first["plan"] and again["cache"]["hit"]
+    assert retriever.searches == 1  # the hit needs no search either
+    assert cache.stats("dahua-camera") == {"lookups": 2, "hits": 1, "hit_rate": 0.5, "saved_llm_calls": 0, "entries": 1}
+    cache.close()
@@ -0,0 +1,304 @@
+"""Unit tests for the ingest job queue (JobsDB claim) and IngestScheduler."""
+
+import asyncio
+
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+from learning_mcp.jobs_db import JobsDB, JobStatus
+from learning_mcp.job_store import AsyncJobStore
+from learning_mcp.job_events import JobEventBus
+from learning_mcp.job_scheduler import IngestScheduler
+
+
+def _enqueue(db, profile, priority=0):
+    return db.start_job(
+        profile=profile, provider="ollama", model_name="m", model_dim=8,
+        vector_db="qdrant", collection=profile, truncate=False,
+        files_total=1, pages_total=1, priority=priority,
+    )
+
+
+# ---------- JobsDB queue ----------
+
+def test_claim_orders_by_priority_then_fifo(tmp_path):
+    """Higher priority first; oldest first within a priority."""
+    db = JobsDB(str(tmp_path / "q.sqlite"))
+    low = _enqueue(db, "a", priority=0)
+    high = _enqueue(db, "b", priority=5)
+    low2 = _enqueue(db, "c", priority=0)
+
+    claimed = [db.claim_next_job()["job_id"] for _ in range(3)]
+    assert claimed == [high, low, low2]
+    assert db.claim_next_job() is None
+    job = db.get_job(high)
+    assert job["status"] == JobStatus.RUNNING.value
+    assert job["started_at"]
+
+
+def test_claim_one_running_job_per_profile(tmp_path):
+    """A profile's second job waits until the first is no longer running."""
+    db = JobsDB(str(tmp_path / "q.sqlite"))
+    first = _enqueue(db, "p")
+    second = _enqueue(db, "p")
+    other = _enqueue(db, "other")
+
+    assert db.claim_next_job()["job_id"] == first
+    assert db.claim_next_job()["job_id"] == other
+    assert db.claim_next_job() is None
+
+    db.finish_job(first, status=JobStatus.COMPLETED)
+    assert db.claim_next_job()["job_id"] == second
+
+
+# ---------- IngestScheduler (inline mode) ----------
+
+class GatedRunner:
+    """Fake ingest: records start order and blocks until released."""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+
+    async def __call__(self, job_id, prof, truncate, store):
+        self.started.append(job_id)
+        gate = self.gates.setdefault(job_id, asyncio.Event())
+        try:
+            await gate.wait()
+            await store.finish_job(job_id, status=JobStatus.COMPLETED)
+        except asyncio.CancelledError:
+            await store.finish_job(job_id, status=JobStatus.CANCELED, error="Cancelled by user")
+            raise
+
+    def release(self, job_id):
+        self.gates.setdefault(job_id, asyncio.Event()).set()
+
+
+async def _until(pred, timeout=3.0):
+    for _ in range(int(timeout / 0.01)):
+        if pred():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+async def store(tmp_path):
+    s = AsyncJobStore(str(tmp_path / "sched.sqlite"), flush_interval_ms=20, events=JobEventBus())
+    yield s
+    await s.close()
+
+
+def _scheduler(store, runner, workers=1):
+    return IngestScheduler(
+        store, max_workers=workers, mode="inline", runner=runner,
+        profile_loader=lambda name: {"name": name}, poll_s=0.05,
+    )
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency(store):
+    """With one worker, the second job stays QUEUED until the first finishes."""
+    runner = GatedRunner()
+    sched = _scheduler(store, runner)
+    a = _enqueue(store.db, "a")
+    b = _enqueue(store.db, "b")
+    await sched.start()
+    try:
+        await _until(lambda: runner.started == [a])
+        await asyncio.sleep(0.1)
+        assert runner.started == [a]
+        assert store.db.get_job(b)["status"] == JobStatus.QUEUED.value
+
+        runner.release(a)
+        await _until(lambda: runner.started == [a, b])
+        runner.release(b)
+        await _until(lambda: not sched.running_ids())
+        assert store.db.get_job(b)["status"] == JobStatus.COMPLETED.value
+    finally:
+        await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancel_running_and_queued(store):
+    """cancel() stops a running job and drops a queued one."""
+    runner = GatedRunner()
+    sched = _scheduler(store, runner)
+    a = _enqueue(store.db, "a")
+    b = _enqueue(store.db, "b")
+    await sched.start()
+    try:
+        await _until(lambda: runner.started == [a])
+        assert await sched.cancel(b)
+        assert await sched.cancel(a)
+        assert store.db.get_job(a)["status"] == JobStatus.CANCELED.value
+        assert store.db.get_job(b)["status"] == JobStatus.CANCELED.value
+        assert runner.started == [a]
+        assert not await sched.cancel("missing")
+    finally:
+        await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_fails_orphaned_running_jobs(store):
+    """RUNNING rows left by a previous server are failed on start."""
+    orphan = _enqueue(store.db, "p")
+    store.db.mark_running(orphan)
+    queued = _enqueue(store.db, "p")
+
+    runner = GatedRunner()
+    sched = _scheduler(store, runner)
+    await sched.start()
+    try:
+        await _until(lambda: runner.started == [queued])
+        assert store.db.get_job(orphan)["status"] == JobStatus.FAILED.value
+    finally:
+        await sched.stop()
+    assert store.db.get_job(queued)["status"] == JobStatus.FAILED.value  # interrupted by stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_resumes_orphans_when_enabled(store):
+    """With resume_orphans, interrupted jobs are requeued (on start and on stop)."""
+    orphan = _enqueue(store.db, "p")
+    store.db.mark_running(orphan)
+
+    runner = GatedRunner()
+    sched = IngestScheduler(
+        store, max_workers=1, mode="inline", runner=runner,
+        profile_loader=lambda name: {"name": name}, poll_s=0.05, resume_orphans=True,
+    )
+    await sched.start()
+    try:
+        await _until(lambda: runner.started == [orphan])
+    finally:
+        await sched.stop()
+    assert store.db.get_job(orphan)["status"] == JobStatus.QUEUED.value
+
+
+# ---------- IngestScheduler (process mode) ----------
+
+async def finishing_runner(job_id, prof, truncate, store):
+    """Module-level so spawned worker processes can import it."""
+    store.update_progress(job_id, chunks_done=3)
+    await store.finish_job(job_id, status=JobStatus.COMPLETED)
+
+
+async def crashing_runner(job_id, prof, truncate, store):
+    import os
+    os._exit(3)
+
+
+def _sleep_forever():
+    import time
+    while True:
+        time.sleep(1)
+
+
+async def child_starting_runner(job_id, prof, truncate, store):
+    """Starts a grandchild, as the PDF load pool does (a daemonic worker could not)."""
+    import multiprocessing
+    child = multiprocessing.get_context("spawn").Process(target=_sleep_forever)
+    child.start()
+    with open(prof["pid_file"], "w") as fh:
+        fh.write(str(child.pid))
+    await asyncio.sleep(3600)
+
+
+def _alive(pid):
+    import os
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    with open(f"/proc/{pid}/stat") as fh:  # a zombie is dead too
+        return fh.read().split(")")[-1].split()[0] != "Z"
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancel_kills_the_workers_children(store, tmp_path):
+    """Workers may start children; cancelling the job takes them down with it."""
+    pid_file = tmp_path / "child.pid"
+    job_id = _enqueue(store.db, "p")
+    sched = IngestScheduler(
+        store, max_workers=1, mode="process", runner=child_starting_runner,
+        profile_loader=lambda name: {"name": name, "pid_file": str(pid_file)}, poll_s=0.05,
+    )
+    await sched.start()
+    try:
+        await _until(lambda: pid_file.exists() and pid_file.read_text(), timeout=30)
+        child = int(pid_file.read_text())
+        assert _alive(child)
+        assert await sched.cancel(job_id)
+        assert store.db.get_job(job_id)["status"] == JobStatus.CANCELED.value
+        await _until(lambda: not _alive(child), timeout=10)
+    finally:
+        await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_process_mode_relays_events(store):
+    """Jobs run in a worker process; DB writes and live events reach the server."""
+    job_id = _enqueue(store.db, "p")
+    q = store.events.subscribe(job_id)
+    sched = IngestScheduler(
+        store, max_workers=1, mode="process", runner=finishing_runner,
+        profile_loader=lambda name: {"name": name}, poll_s=0.05,
+    )
+    await sched.start()
+    try:
+        await _until(lambda: store.db.get_job(job_id)["status"] == JobStatus.COMPLETED.value, timeout=30)
+        await _until(lambda: not sched.running_ids())
+        assert store.db.get_job(job_id)["chunks_done"] == 3
+        await _until(lambda: q.qsize() >= 2)
+        events = [q.get_nowait()["event"] for _ in range(q.qsize())]
+        assert "progress" in events and events[-1] == "status"
+    finally:
+        await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_process_crash_marks_failed(store):
+    """A worker that dies without recording an outcome leaves a FAILED job."""
+    job_id = _enqueue(store.db, "p")
+    sched = IngestScheduler(
+        store, max_workers=1, mode="process", runner=crashing_runner,
+        profile_loader=lambda name: {"name": name}, poll_s=0.05,
+    )
+    await sched.start()
+    try:
+        await _until(lambda: store.db.get_job(job_id)["status"] == JobStatus.FAILED.value, timeout=30)
+        assert "exited with code 3" in store.db.get_job(job_id)["error"]
+    finally:
+        await sched.stop()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_process_mode_ingests_a_pdf(store, tmp_path):
+    """Default config end to end: run_ingest in a worker process, PDFs in its nested load pool."""
+    from learning_mcp.vdb import VDB
+    from tests.benchmarks import synth
+    from tests.mocks.backends import MockServer, qdrant_app
+
+    pdf = synth.make_pdf(tmp_path / "manual.pdf", 4, lines_per_page=6, seed=1)
+    with MockServer(qdrant_app()) as qdrant:
+        prof = {
+            "name": "pdf",
+            "documents": [{"type": "pdf", "path": str(pdf)}],
+            "chunking": {"size": 400, "overlap": 0},
+            "embedding": {"dim": 16, "backend": {"primary": "hashing"}},
+            "vectordb": {"url": qdrant.url, "collection": "pdf"},
+        }
+        job_id = _enqueue(store.db, "pdf")
+        sched = IngestScheduler(store, max_workers=1, mode="process", profile_loader=lambda name: prof, poll_s=0.05)
+        await sched.start()
+        try:
+            await _until(lambda: store.db.get_job(job_id)["status"] != JobStatus.QUEUED.value, timeout=30)
+            await _until(lambda: store.db.get_job(job_id)["status"] != JobStatus.RUNNING.value, timeout=60)
+            job = store.db.get_job(job_id)
+            assert job["status"] == JobStatus.COMPLETED.value, job["error"]
+            assert job["pages_done"] == 4 and job["chunks_done"] > 0
+            assert VDB(url=qdrant.url, collection="pdf", dim=16).count() == job["chunks_done"]
+        finally:
+            await sched.stop()
@@ -183,6 +183,17 @@ def test_search_empty_results(vdb_config, mock_qdrant_client):
     assert results == []
 
 
+def test_search_batch_without_queries(vdb_config, mock_qdrant_client):
+    """An empty batch returns [] without a Qdrant round trip."""
+    import numpy as np
+    mock_client = mock_qdrant_client.return_value
+    vdb = VDB(vdb_config["url"], vdb_config["collection"], vdb_config["dim"])
+
+    assert vdb.search_batch([]) == []
+    assert vdb.search_batch(np.zeros((0, 768), dtype=np.float32)) == []
+    mock_client.query_batch_points.assert_not_called()
+
+
 def test_upsert_batch_size():
     """Test that upsert can handle large batches."""
     with patch('learning_mcp.vdb.QdrantClient') as mock_qdrant:
@@ -234,3 +245,38 @@ def test_vdb_connection_error_handling(vdb_config):
         
         with pytest.raises(ConnectionError):
             VDB(vdb_config["url"], vdb_config["collection"], vdb_config["dim"])
+
+
+def test_upsert_accepts_float32_matrix(vdb_config, mock_qdrant_client):
+    """An (n, dim) float32 array from Embedder.embed_array upserts without conversion by the caller."""
+    import numpy as np
+    mock_client = mock_qdrant_client.return_value
+    mock_client.get_collection.return_value = Mock(name="collection_info")
+    vdb = VDB(vdb_config["url"], vdb_config["collection"], vdb_config["dim"])
+
+    vectors = np.full((3, 768), 0.5, dtype=np.float32)
+    ids = [str(uuid5(NAMESPACE_DNS, f"doc1|path|{i}")) for i in range(3)]
+    assert vdb.upsert(vectors, [{"text": str(i)} for i in range(3)], ids) == ids
+    points = mock_client.upsert.call_args[1]["points"]
+    assert points[2].vector == [0.5] * 768
+
+
+def test_upsert_rejects_invalid_vectors(vdb_config, mock_qdrant_client):
+    """NaN/Inf, bools, wrong dims and ragged rows are refused before anything is written."""
+    import numpy as np
+    mock_client = mock_qdrant_client.return_value
+    vdb = VDB(vdb_config["url"], vdb_config["collection"], vdb_config["dim"])
+    payloads = [{"text": "a"}, {"text": "b"}]
+
+    bad_inputs = [
+        [[0.1] * 768, [float("nan")] * 768],
+        np.array([[0.1] * 768, [np.inf] * 768], dtype=np.float32),
+        [[0.1] * 768, [0.1] * 767],
+        [[0.1] * 384, [0.1] * 384],
+        [[True] * 768, [False] * 768],
+        np.ones((2, 768), dtype=bool),
+    ]
+    for bad in bad_inputs:
+        with pytest.raises(ValueError):
+            vdb.upsert(bad, payloads)
+    mock_client.upsert.assert_not_called()